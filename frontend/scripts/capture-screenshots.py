@@ -2,92 +2,986 @@
 """
 Workshop Screenshot Capture Script using Selenium
 More stable alternative to Puppeteer/Playwright
+
+The frontend must run as a dev server (npm run dev) or be built with
+NEXT_PUBLIC_ENABLE_STEP_LINKS=true; production builds ignore ?step=N.
+
+Each step is captured by jumping straight to /workshop?step=N with the
+workshop_state that "빠른 테스트" would have built up seeded into
+localStorage, so steps are independent and run on several headless
+browsers in parallel. The seeded data is read from src/config/devWorkshopData.json,
+the same file fillDevData uses; --check-seed verifies that every seeded step
+matches actually clicking through from step 1. Instead of fixed sleeps each step waits for its
+data-workshop-step marker, document.readyState, fetch/XHR idle and
+fonts/images, and the actual wait per step is reported.
+
+Full-page captures go through the DevTools protocol (Page.captureScreenshot
+with captureBeyondViewport) on an emulated viewport, so the browser window
+is never resized. --viewports captures desktop/tablet/mobile from the same
+loaded step in one pass.
+
+Captures that match the previous file (see screenshot_diff.py) are not
+rewritten; screenshot_changes.json lists what changed and where.
+
+--serve keeps a pool of warm headless browsers running behind a local HTTP
+API, each holding recently captured steps open in tabs, so a capture costs
+only the render. Other runs hand their jobs to it with --daemon:
+
+    POST /capture  {"step": 3, "viewport": "mobile", "output": "png" | "file", "fresh": false}
+    GET  /capture?step=3&viewport=mobile
+    GET  /health
+
+"png" returns the image bytes; "file" writes it to the screenshots directory
+(unchanged captures are kept) and returns the path and change info as JSON.
+"fresh" reloads the step instead of reusing its open page.
+
+Usage:
+    python capture-screenshots.py
+    python capture-screenshots.py --workers 4 --steps 3,6-8 --base-url http://localhost:3000
+    python capture-screenshots.py --timeout 60   # 느린 CI 환경
+    python capture-screenshots.py --viewports all
+    python capture-screenshots.py --serve --workers 2          # 캡처 데몬 실행
+    python capture-screenshots.py --daemon --viewports all     # 데몬으로 캡처
+    python capture-screenshots.py --check-seed                 # 주입 상태 == 빠른 테스트 클릭 결과 확인
 """
 
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+from PIL import Image
+import argparse
+import base64
+import io
+import json
+import threading
 import time
 import os
+import urllib.error
+import urllib.request
+
+from screenshot_diff import DEFAULT_THRESHOLD, MIN_REGION_PIXELS, write_if_changed, write_report
 
 # 스크린샷 저장 디렉토리
 SCREENSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'screenshots')
 os.makedirs(SCREENSHOT_DIR, exist_ok=True)
 
-def capture_workshop_screenshots():
-    print('🚀 Starting workshop screenshot capture with Selenium...\n')
-    
+BASE_URL = 'http://localhost:3000'
+TOTAL_STEPS = 11
+# 뷰포트 이름: (너비, 높이, deviceScaleFactor, 모바일 에뮬레이션)
+VIEWPORTS = {
+    'desktop': (1920, 1080, 1, False),
+    'tablet': (768, 1024, 1, True),
+    'mobile': (390, 844, 2, True),
+}
+DEFAULT_VIEWPORT = 'desktop'
+# Chrome이 한 번에 캡처할 수 있는 최대 픽셀 높이, 넘으면 타일로 나눠 이어 붙임
+MAX_CAPTURE_PX = 16384
+DEFAULT_WORKERS = 4
+DEFAULT_TIMEOUT = 30
+# 진행 중인 요청이 없는 상태가 이만큼 유지되면 네트워크 idle로 판단 (ms)
+NETWORK_IDLE_MS = 500
+POLL_INTERVAL = 0.05
+# 캡처 데몬은 로컬에서만 접속 가능
+DAEMON_HOST = '127.0.0.1'
+DAEMON_PORT = 9230
+DAEMON_URL = f'http://{DAEMON_HOST}:{DAEMON_PORT}'
+# 브라우저 하나가 탭으로 열어 두는 단계 페이지 수
+DEFAULT_MAX_PAGES = 4
+
+# 페이지 스크립트보다 먼저 실행되어 fetch/XHR 진행 수를 추적
+NETWORK_TRACKER_JS = """
+(() => {
+  if (window.__captureNet) return;
+  const net = window.__captureNet = { pending: 0, last: performance.now() };
+  const begin = () => { net.pending += 1; net.last = performance.now(); };
+  const end = () => { net.pending = Math.max(0, net.pending - 1); net.last = performance.now(); };
+  const originalFetch = window.fetch;
+  window.fetch = function (...args) {
+    begin();
+    return originalFetch.apply(this, args).finally(end);
+  };
+  const originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    begin();
+    this.addEventListener('loadend', end, { once: true });
+    return originalSend.apply(this, args);
+  };
+})();
+"""
+
+# 단계 마커, readyState, 네트워크 idle, 폰트/이미지 로드가 모두 충족되면 null, 아니면 대기 사유
+READINESS_JS = """
+const step = arguments[0], idleMs = arguments[1];
+if (!document.querySelector(`[data-workshop-step="${step}"]`)) return 'step marker';
+if (document.readyState !== 'complete') return 'document';
+const net = window.__captureNet;
+if (net && (net.pending > 0 || performance.now() - net.last < idleMs)) return 'network';
+if (document.fonts && document.fonts.status !== 'loaded') return 'fonts';
+if (Array.from(document.images).some(img => !img.complete)) return 'images';
+return null;
+"""
+
+# 레이아웃 변경 후 두 프레임이 그려질 때까지 대기
+NEXT_PAINT_JS = """
+const done = arguments[arguments.length - 1];
+requestAnimationFrame(() => requestAnimationFrame(() => done(document.body.scrollHeight)));
+"""
+
+# 전체 페이지 높이: h-screen + overflow-hidden 레이아웃은 내부 스크롤 영역이 넘치는 만큼 더 필요
+FULL_HEIGHT_JS = """
+let overflow = 0;
+for (const el of document.querySelectorAll('*')) {
+  const overflowY = getComputedStyle(el).overflowY;
+  if ((overflowY === 'auto' || overflowY === 'scroll') && el.scrollHeight > el.clientHeight) {
+    overflow = Math.max(overflow, el.scrollHeight - el.clientHeight);
+  }
+}
+return Math.max(document.documentElement.scrollHeight, document.body.scrollHeight) + overflow;
+"""
+
+# ============================================
+# 빠른 테스트(fillDevData)가 단계별로 채우는 데이터
+# page.tsx 의 fillDevData 와 같은 파일을 읽음 (--check-seed 로 실제 클릭 결과와 비교)
+# ============================================
+
+DEV_DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'src', 'config', 'devWorkshopData.json')
+with open(DEV_DATA_PATH, encoding='utf-8') as f:
+    DEV_DATA = json.load(f)
+
+# 빠른 테스트 상태를 담는 localStorage 키
+WORKSHOP_STATE_KEY = 'workshop_state'
+MANUAL_TASK_INPUT_KEY = 'workshop_manual_task_input'
+
+# 개발 서버에서 페이지가 노출하는 현재 React 상태 {workshop, manualTaskInput}
+DEV_STATE_JS = "return window.__workshopDevState || null;"
+DEV_BUTTON_XPATH = "//button[contains(., '빠른 테스트')]"
+
+
+def create_dev_workshop(base_url):
+    """빠른 테스트 Step 6과 같은 방식으로 백엔드에 워크샵을 한 번만 생성"""
+    request = urllib.request.Request(
+        f'{base_url}/api/workshops',
+        data=json.dumps(DEV_DATA['workshopRequest']).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            data = json.loads(response.read().decode('utf-8'))
+        if data.get('success'):
+            return data.get('id', '')
+        print(f'⚠️  Workshop creation failed: {data.get("error")}')
+    except Exception as e:
+        print(f'⚠️  Workshop creation failed: {str(e)}')
+    return ''
+
+
+def workshop_state_for_step(step, workshop_id):
+    """Step 1부터 step-1까지 빠른 테스트를 누른 뒤의 workshop_state (없으면 None)"""
+    if step < 3:
+        return None
+
+    state = {
+        'id': '',
+        'domains': DEV_DATA['domainsStep2'],
+        'fileIds': [],
+        'tasks': [],
+        'selectedTaskIds': [],
+    }
+    if step >= 6:
+        state['domains'] = DEV_DATA['domainsStep5']
+    if step >= 7:
+        state['id'] = workshop_id
+        state['tasks'] = DEV_DATA['tasks']
+    if step >= 11:
+        state['selectedTaskIds'] = DEV_DATA['selectedTaskIds']
+    return state
+
+
+def storage_for_step(step, workshop_id):
+    """step 화면에 주입할 localStorage 키와 값 (None이면 키 삭제)"""
+    return {
+        WORKSHOP_STATE_KEY: workshop_state_for_step(step, workshop_id),
+        # Step 6에서 입력한 업무 내용
+        MANUAL_TASK_INPUT_KEY: DEV_DATA['manualTaskInput'] if step >= 7 else None,
+    }
+
+
+def parse_steps(spec):
+    """'1-3,7' 형식의 단계 목록 파싱"""
+    steps = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            steps.update(range(int(start), int(end) + 1))
+        else:
+            steps.add(int(part))
+    invalid = [s for s in steps if not 1 <= s <= TOTAL_STEPS]
+    if invalid:
+        raise ValueError(f'Steps must be between 1 and {TOTAL_STEPS}: {sorted(invalid)}')
+    return sorted(steps)
+
+
+def create_driver():
     # Chrome 옵션 설정
     chrome_options = Options()
     chrome_options.add_argument('--headless=new')
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--window-size=1920,1080')
-    
+    width, height = VIEWPORTS[DEFAULT_VIEWPORT][:2]
+    chrome_options.add_argument(f'--window-size={width},{height}')
+    driver = webdriver.Chrome(options=chrome_options)
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS})
+    return driver
+
+
+def wait_until_ready(driver, step, timeout=DEFAULT_TIMEOUT):
+    """단계 화면이 그려지고 네트워크/폰트/이미지가 모두 안정될 때까지 대기, 대기 시간(초) 반환"""
+    start = time.perf_counter()
+    pending = []
+
+    def ready(d):
+        reason = d.execute_script(READINESS_JS, step, NETWORK_IDLE_MS)
+        pending[:] = [reason]
+        return reason is None
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(ready)
+    except TimeoutException:
+        raise TimeoutException(f'Step {step} not ready after {timeout}s (waiting on {pending[0] if pending else "page"})')
+    return time.perf_counter() - start
+
+
+def wait_for_paint(driver):
+    """다음 프레임까지 대기 후 문서 높이 반환"""
+    return driver.execute_async_script(NEXT_PAINT_JS)
+
+
+def parse_viewports(spec):
+    """'desktop,mobile' 또는 'all' 형식의 뷰포트 목록 파싱"""
+    if spec.strip() == 'all':
+        return list(VIEWPORTS)
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in VIEWPORTS]
+    if unknown or not names:
+        raise ValueError(f'Unknown viewports {unknown}; choose from {", ".join(VIEWPORTS)} or all')
+    return names
+
+
+def screenshot_filename(step, viewport):
+    # desktop은 기존 파일명 유지
+    if viewport == DEFAULT_VIEWPORT:
+        return f'step_{step}_fullpage.png'
+    return f'step_{step}_{viewport}_fullpage.png'
+
+
+def set_viewport(driver, viewport, height=None):
+    """창 크기는 그대로 두고 DevTools로 뷰포트만 에뮬레이션"""
+    width, default_height, scale, mobile = VIEWPORTS[viewport]
+    driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+        'width': width,
+        'height': height or default_height,
+        'deviceScaleFactor': scale,
+        'mobile': mobile,
+    })
+
+
+def capture_png(driver, width, height, scale):
+    """Page.captureScreenshot으로 (width x height) CSS 픽셀 영역을 PNG 바이트로 캡처"""
+    def grab(y, tile_height):
+        result = driver.execute_cdp_cmd('Page.captureScreenshot', {
+            'format': 'png',
+            'captureBeyondViewport': True,
+            'clip': {'x': 0, 'y': y, 'width': width, 'height': tile_height, 'scale': 1},
+        })
+        return base64.b64decode(result['data'])
+
+    if height * scale <= MAX_CAPTURE_PX:
+        return grab(0, height)
+
+    # 아주 긴 페이지는 타일로 캡처해서 이어 붙임
+    tile_height = MAX_CAPTURE_PX // scale
+    canvas = Image.new('RGB', (width * scale, height * scale))
+    for y in range(0, height, tile_height):
+        tile = Image.open(io.BytesIO(grab(y, min(tile_height, height - y))))
+        canvas.paste(tile, (0, y * scale))
+    out = io.BytesIO()
+    canvas.save(out, format='PNG')
+    return out.getvalue()
+
+
+def render_viewport(driver, step, viewport, timeout=DEFAULT_TIMEOUT):
+    """현재 로드된 단계를 한 뷰포트로 전체 페이지 렌더링, (PNG 바이트, 대기 시간) 반환"""
+    width, _, scale, _ = VIEWPORTS[viewport]
+    set_viewport(driver, viewport)
+    waited = wait_until_ready(driver, step, timeout)
+
+    # 내부 스크롤 영역이 다 펼쳐질 때까지 뷰포트 높이를 늘림 (창 크기 변경 없음)
+    paint_start = time.perf_counter()
+    total_height = driver.execute_script(FULL_HEIGHT_JS)
+    for _ in range(3):
+        set_viewport(driver, viewport, total_height)
+        wait_for_paint(driver)
+        measured = driver.execute_script(FULL_HEIGHT_JS)
+        if measured <= total_height:
+            break
+        total_height = measured
+    waited += time.perf_counter() - paint_start
+
+    return capture_png(driver, width, total_height, scale), waited
+
+
+def capture_viewport(driver, step, viewport, timeout=DEFAULT_TIMEOUT, threshold=DEFAULT_THRESHOLD):
+    """현재 로드된 단계를 한 뷰포트로 전체 페이지 캡처, (파일명, 변경 정보, 대기 시간) 반환"""
+    png, waited = render_viewport(driver, step, viewport, timeout)
+
+    # 이전 캡처와 차이가 없으면 기존 파일 유지
+    filename = screenshot_filename(step, viewport)
+    change = write_if_changed(os.path.join(SCREENSHOT_DIR, filename), png, threshold)
+    return filename, change, waited
+
+
+def seed_state(driver, step, workshop_id):
+    """Step 1부터 빠른 테스트로 온 상태를 localStorage에 주입 (현재 탭이 같은 origin이어야 함)"""
+    for key, value in storage_for_step(step, workshop_id).items():
+        if value is None:
+            driver.execute_script("localStorage.removeItem(arguments[0])", key)
+        else:
+            driver.execute_script(
+                "localStorage.setItem(arguments[0], arguments[1])",
+                key, json.dumps(value, ensure_ascii=False)
+            )
+
+
+def load_step(driver, base_url, step, viewport=DEFAULT_VIEWPORT):
+    """뷰포트를 맞춘 뒤 ?step=N 으로 이동"""
+    set_viewport(driver, viewport)
+    driver.get(f'{base_url}/workshop?step={step}')
+
+
+def capture_step(driver, base_url, step, workshop_id, viewports=(DEFAULT_VIEWPORT,),
+                 timeout=DEFAULT_TIMEOUT, threshold=DEFAULT_THRESHOLD):
+    """workshop_state를 주입하고 ?step=N 으로 한 번만 이동해서 모든 뷰포트를 캡처"""
+    seed_state(driver, step, workshop_id)
+    load_step(driver, base_url, step, viewports[0])
+
+    changes = {}
+    waited = 0.0
+    for viewport in viewports:
+        filename, change, viewport_wait = capture_viewport(driver, step, viewport, timeout, threshold)
+        changes[filename] = change
+        waited += viewport_wait
+    return changes, waited
+
+
+def print_change(step, filename, change):
+    if change['status'] == 'unchanged':
+        print(f'   ⏭️  Step {step} unchanged: {filename}')
+    else:
+        print(f'   ✅ Step {step} {change["status"]}: {filename} '
+              f'({change["changed_ratio"]:.2%} pixels, {len(change["boxes"])} regions)')
+
+
+def capture_worker(base_url, steps, workshop_id, viewports=(DEFAULT_VIEWPORT,), timeout=DEFAULT_TIMEOUT,
+                   threshold=DEFAULT_THRESHOLD):
+    """브라우저 하나로 할당된 단계들을 순서대로 캡처, ({step: 대기 시간}, {파일명: 변경 정보}) 반환"""
     driver = None
+    waits = {}
+    changes = {}
     try:
-        # Chrome 드라이버 시작
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # 워크샵 페이지로 이동
-        print('📍 Navigating to workshop page...')
-        driver.get('http://localhost:3000/workshop')
-        time.sleep(3)  # 페이지 로드 대기
-        
-        # Step 1-11까지 반복
-        for step in range(1, 12):
-            print(f'\n📸 Capturing Step {step}...')
-            
-            # 페이지가 완전히 로드될 때까지 대기
-            time.sleep(2)
-            
-            # 전체 페이지 높이 계산
-            total_height = driver.execute_script("return document.body.scrollHeight")
-            viewport_height = driver.execute_script("return window.innerHeight")
-            
-            # 뷰포트 크기 조정 (전체 페이지 캡처를 위해)
-            driver.set_window_size(1920, total_height)
-            time.sleep(1)
-            
-            # 스크린샷 캡처
-            screenshot_path = os.path.join(SCREENSHOT_DIR, f'step_{step}_fullpage.png')
-            driver.save_screenshot(screenshot_path)
-            print(f'   ✅ Saved: {screenshot_path}')
-            
-            # 원래 뷰포트 크기로 복원
-            driver.set_window_size(1920, 1080)
-            
-            # 마지막 단계가 아니면 "빠른 테스트" 버튼 클릭
-            if step < 11:
-                try:
-                    # XPath로 버튼 찾기
-                    button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), '빠른 테스트')]"))
-                    )
-                    button.click()
-                    print(f'   🖱️  Clicked Quick Test button')
-                    time.sleep(2)  # 다음 단계로 전환 대기
-                except Exception as e:
-                    print(f'   ⚠️  Error clicking button: {str(e)}')
-        
-        print('\n✨ All screenshots captured successfully!')
-        print(f'📁 Screenshots saved to: {SCREENSHOT_DIR}')
-        
-    except Exception as error:
-        print(f'\n❌ Error during screenshot capture: {str(error)}')
-        raise
+        driver = create_driver()
+        # localStorage 접근을 위해 같은 origin을 한 번 로드
+        driver.get(f'{base_url}/workshop')
+        for step in steps:
+            step_changes, waited = capture_step(driver, base_url, step, workshop_id, viewports, timeout, threshold)
+            for filename, change in step_changes.items():
+                print_change(step, filename, change)
+            print(f'   ⏱️  Step {step} waited {waited:.2f}s')
+            waits[step] = waited
+            changes.update(step_changes)
+    finally:
+        if driver:
+            driver.quit()
+    return waits, changes
+
+
+def capture_workshop_screenshots(steps=None, workers=DEFAULT_WORKERS, base_url=BASE_URL,
+                                 viewports=(DEFAULT_VIEWPORT,), timeout=DEFAULT_TIMEOUT,
+                                 threshold=DEFAULT_THRESHOLD):
+    print('🚀 Starting workshop screenshot capture with Selenium...\n')
+    steps = steps or list(range(1, TOTAL_STEPS + 1))
+    workers = max(1, min(workers, len(steps)))
+    start = time.perf_counter()
+
+    workshop_id = ''
+    if any(step >= 7 for step in steps):
+        print('📍 Creating dev workshop...')
+        workshop_id = create_dev_workshop(base_url)
+
+    # 단계를 브라우저별로 라운드 로빈 분배
+    assignments = [steps[i::workers] for i in range(workers)]
+    print(f'📸 Capturing {len(steps)} steps x {len(viewports)} viewports ({", ".join(viewports)}) '
+          f'with {workers} browsers...\n')
+
+    waits = {}
+    changes = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(capture_worker, base_url, assigned, workshop_id, viewports, timeout, threshold): assigned
+            for assigned in assignments
+        }
+        for future in as_completed(futures):
+            try:
+                worker_waits, worker_changes = future.result()
+                waits.update(worker_waits)
+                changes.update(worker_changes)
+            except Exception as e:
+                errors.append(e)
+                print(f'   ❌ Error capturing steps {futures[future]}: {str(e)}')
+
+    return finish_capture(steps, waits, changes, errors, threshold, start, unit='browser(s)')
+
+
+def finish_capture(steps, waits, changes, errors, threshold, start, unit):
+    """변경 리포트 저장 후 결과 요약 출력"""
+    if changes:
+        report_path = write_report(SCREENSHOT_DIR, changes, threshold)
+        changed = sum(1 for change in changes.values() if change['status'] != 'unchanged')
+        print(f'\n📝 {changed}/{len(changes)} screenshots changed, report: {report_path}')
+
+    if errors:
+        raise RuntimeError(f'{len(errors)} {unit} failed; {len(waits)}/{len(steps)} steps captured')
+
+    print(f'\n✨ All screenshots captured successfully in {time.perf_counter() - start:.1f}s!')
+    print('⏱️  Readiness wait per step: ' + ', '.join(f'{step}: {waits[step]:.2f}s' for step in sorted(waits)))
+    print(f'   total {sum(waits.values()):.2f}s, slowest step {max(waits, key=waits.get)}')
+    print(f'📁 Screenshots saved to: {SCREENSHOT_DIR}')
+    return waits
+
+def check_seeded_state(steps=None, base_url=BASE_URL, timeout=DEFAULT_TIMEOUT):
+    """빠른 테스트를 실제로 눌러 도달한 상태와 ?step=N 으로 주입한 상태를 단계별로 비교, 불일치 단계 목록 반환"""
+    print('🔍 Comparing seeded state with a fillDevData click-through...\n')
+    steps = steps or list(range(1, TOTAL_STEPS + 1))
+    driver = None
+    clicked = {}
+    mismatches = []
+    try:
+        driver = create_driver()
+        # Step 1부터 빈 상태로 시작
+        driver.get(f'{base_url}/workshop')
+        driver.execute_script("localStorage.clear()")
+        driver.get(f'{base_url}/workshop')
+        wait_until_ready(driver, 1, timeout)
+        clicked[1] = driver.execute_script(DEV_STATE_JS)
+        for step in range(2, max(steps) + 1):
+            driver.find_element(By.XPATH, DEV_BUTTON_XPATH).click()
+            wait_until_ready(driver, step, timeout)
+            clicked[step] = driver.execute_script(DEV_STATE_JS)
+        if clicked[1] is None:
+            raise RuntimeError('Page does not expose window.__workshopDevState (dev server or '
+                               'NEXT_PUBLIC_ENABLE_STEP_LINKS=true required)')
+
+        # 클릭으로 만든 워크샵 id를 그대로 주입해서 나머지 필드를 정확히 비교
+        workshop_id = clicked[max(steps)]['workshop'].get('id', '')
+        for step in steps:
+            seed_state(driver, step, workshop_id)
+            load_step(driver, base_url, step)
+            wait_until_ready(driver, step, timeout)
+            seeded = driver.execute_script(DEV_STATE_JS)
+            if seeded == clicked[step]:
+                print(f'   ✅ Step {step} matches')
+                continue
+            mismatches.append(step)
+            for part in ('workshop', 'manualTaskInput'):
+                if seeded.get(part) != clicked[step].get(part):
+                    print(f'   ❌ Step {step} {part} differs\n'
+                          f'      seeded:  {json.dumps(seeded.get(part), ensure_ascii=False)}\n'
+                          f'      clicked: {json.dumps(clicked[step].get(part), ensure_ascii=False)}')
     finally:
         if driver:
             driver.quit()
-            print('Browser closed')
+    return mismatches
+
+# ============================================
+# 캡처 데몬: 브라우저를 계속 띄워 두고 로컬 HTTP로 캡처 작업을 받음
+# ============================================
+
+class WarmBrowser:
+    """최근 캡처한 단계들을 탭으로 열어 두는 브라우저, 한 번에 한 스레드만 사용"""
+
+    def __init__(self, base_url, max_pages=DEFAULT_MAX_PAGES):
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.driver = create_driver()
+        # localStorage 접근을 위해 같은 origin을 한 번 로드
+        self.driver.get(f'{base_url}/workshop')
+        self.free_tabs = [self.driver.current_window_handle]
+        # 단계 -> 탭 핸들, 가장 오래 안 쓴 단계가 앞
+        self.pages = OrderedDict()
+
+    def open_step(self, step, workshop_id, viewport=DEFAULT_VIEWPORT, fresh=False):
+        """단계 탭으로 전환, 이미 열려 있으면 다시 로드하지 않음. 열린 페이지를 재사용했는지 반환"""
+        handle = self.pages.get(step)
+        if handle is not None:
+            self.pages.move_to_end(step)
+            self.driver.switch_to.window(handle)
+            if not fresh:
+                return True
+
+        # localStorage는 origin 단위로 탭끼리 공유되므로 지금 탭에서 주입한 뒤 이동
+        seed_state(self.driver, step, workshop_id)
+        if handle is None:
+            handle = self._take_tab()
+            self.pages[step] = handle
+            self.driver.switch_to.window(handle)
+        load_step(self.driver, self.base_url, step, viewport)
+        return False
+
+    def forget(self, step):
+        """로드가 실패한 단계는 다음 요청 때 다시 로드"""
+        handle = self.pages.pop(step, None)
+        if handle is not None:
+            self.free_tabs.append(handle)
+
+    def _take_tab(self):
+        if self.free_tabs:
+            return self.free_tabs.pop()
+        if len(self.pages) < self.max_pages:
+            self.driver.switch_to.new_window('tab')
+            # 문서 시작 스크립트는 탭마다 등록해야 함
+            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS})
+            return self.driver.current_window_handle
+        # 탭이 꽉 찼으면 가장 오래 안 쓴 단계의 탭을 재활용
+        _, handle = self.pages.popitem(last=False)
+        return handle
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class CaptureService:
+    """따뜻한 브라우저 풀로 (단계, 뷰포트) 캡처 작업을 처리"""
+
+    def __init__(self, base_url=BASE_URL, browsers=DEFAULT_WORKERS, max_pages=DEFAULT_MAX_PAGES,
+                 timeout=DEFAULT_TIMEOUT, threshold=DEFAULT_THRESHOLD):
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.threshold = threshold
+        self.condition = threading.Condition()
+        self.workshop_lock = threading.Lock()
+        self.workshop_id = None
+        # 요청 스레드들이 동시에 갱신하므로 stats_lock 으로만 읽고 씀
+        self.stats_lock = threading.Lock()
+        self.stats = {'captures': 0, 'reused': 0, 'errors': 0, 'restarts': 0}
+
+        # 브라우저는 병렬로 띄우고, 하나라도 실패하면 이미 뜬 브라우저 정리
+        with ThreadPoolExecutor(max_workers=browsers) as pool:
+            futures = [pool.submit(WarmBrowser, base_url, max_pages) for _ in range(browsers)]
+        started = [f.result() for f in futures if f.exception() is None]
+        failed = [f.exception() for f in futures if f.exception() is not None]
+        if failed:
+            for browser in started:
+                browser.quit()
+            raise RuntimeError(f'{len(failed)} browser(s) failed to start: {failed[0]}')
+        self.browsers = started
+        self.idle = list(started)
+
+    def dev_workshop_id(self):
+        """Step 7 이후 화면에 필요한 개발용 워크샵, 데몬 수명 동안 한 번만 생성"""
+        with self.workshop_lock:
+            if self.workshop_id is None:
+                print('📍 Creating dev workshop...')
+                self.workshop_id = create_dev_workshop(self.base_url)
+            return self.workshop_id
+
+    def preload(self, steps):
+        """시작할 때 단계들을 브라우저별 탭에 미리 로드"""
+        steps = list(steps)
+        workshop_id = self.dev_workshop_id() if any(step >= 7 for step in steps) else ''
+        count = len(self.browsers)
+
+        def load(browser, assigned):
+            for step in assigned[:self.max_pages]:
+                try:
+                    browser.open_step(step, workshop_id)
+                    wait_until_ready(browser.driver, step, self.timeout)
+                except Exception as e:
+                    browser.forget(step)
+                    print(f'   ⚠️  Could not preload step {step}: {str(e)}')
+
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            list(pool.map(load, self.browsers, [steps[i::count] for i in range(count)]))
+
+    def _count(self, **increments):
+        with self.stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _checkout(self, step):
+        # 단계를 열어 둔 브라우저가 있으면 바쁘더라도 그 브라우저를 기다림 (렌더링이 새로 로드보다 빠름)
+        def pick():
+            owners = [b for b in self.idle if step in b.pages]
+            if owners:
+                return owners[0]
+            if self.idle and not any(step in b.pages for b in self.browsers):
+                return self.idle[0]
+            return None
+
+        with self.condition:
+            self.condition.wait_for(lambda: pick() or not self.browsers)
+            if not self.browsers:
+                raise RuntimeError('No browsers left in the capture pool')
+            browser = pick()
+            self.idle.remove(browser)
+            return browser
+
+    def _checkin(self, browser):
+        with self.condition:
+            if browser is not None:
+                self.idle.append(browser)
+            self.condition.notify_all()
+
+    def _restart(self, browser):
+        """응답하지 않는 브라우저를 새 브라우저로 교체, 실패하면 풀에서 제거하고 None 반환"""
+        browser.quit()
+        self._count(restarts=1)
+        print('   🔄 Restarting crashed browser...')
+        try:
+            replacement = WarmBrowser(self.base_url, self.max_pages)
+        except Exception as e:
+            print(f'   ❌ Browser restart failed: {str(e)}')
+            replacement = None
+        with self.condition:
+            index = self.browsers.index(browser)
+            if replacement is None:
+                del self.browsers[index]
+            else:
+                self.browsers[index] = replacement
+        return replacement
+
+    def capture(self, step, viewport=DEFAULT_VIEWPORT, fresh=False, save=False, threshold=None):
+        """
+        단계 하나를 한 뷰포트로 캡처
+
+        Args:
+            step: 워크샵 단계 (1-11)
+            viewport: VIEWPORTS 이름
+            fresh: 열려 있는 페이지를 재사용하지 않고 다시 로드
+            save: 스크린샷 디렉토리에 저장 (이전 캡처와 같으면 기존 파일 유지)
+            threshold: 저장 시 영역 크기와 관계없이 변경으로 볼 변경 픽셀 비율
+
+        Returns:
+            step, viewport, png, waited, seconds, reused 와 저장 시 file, change 를 담은 dict
+        """
+        workshop_id = self.dev_workshop_id() if step >= 7 else ''
+        start = time.perf_counter()
+        browser = self._checkout(step)
+        try:
+            reused = browser.open_step(step, workshop_id, viewport, fresh)
+            png, waited = render_viewport(browser.driver, step, viewport, self.timeout)
+        except Exception as e:
+            self._count(errors=1)
+            browser.forget(step)
+            if isinstance(e, WebDriverException) and not isinstance(e, TimeoutException):
+                browser = self._restart(browser)
+            raise
+        finally:
+            self._checkin(browser)
+
+        result = {
+            'step': step,
+            'viewport': viewport,
+            'png': png,
+            'waited': waited,
+            'seconds': time.perf_counter() - start,
+            'reused': reused,
+        }
+        self._count(captures=1, reused=int(reused))
+        if save:
+            filename = screenshot_filename(step, viewport)
+            result['file'] = os.path.abspath(os.path.join(SCREENSHOT_DIR, filename))
+            result['change'] = write_if_changed(result['file'], png,
+                                                self.threshold if threshold is None else threshold)
+        print(f'   📸 Step {step} {viewport}: {result["seconds"]:.2f}s '
+              f'({"reused page" if reused else "loaded"}, waited {waited:.2f}s)')
+        return result
+
+    def status(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        with self.condition:
+            return {
+                'browsers': len(self.browsers),
+                'idle': len(self.idle),
+                'pages': [sorted(browser.pages) for browser in self.browsers],
+                **stats,
+            }
+
+    def close(self):
+        for browser in self.browsers:
+            browser.quit()
+
+
+def parse_flag(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+class CaptureHandler(BaseHTTPRequestHandler):
+    """POST /capture (JSON), GET /capture?step=N&viewport=..., GET /health"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self.send_json(200, self.server.service.status())
+        elif url.path == '/capture':
+            self.capture(dict(parse_qsl(url.query)))
+        else:
+            self.send_json(404, {'error': f'Unknown path {url.path}'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/capture':
+            self.send_json(404, {'error': f'Unknown path {url.path}'})
+            return
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            params = json.loads(body or b'{}')
+        except ValueError as e:
+            self.send_json(400, {'error': f'Invalid JSON body: {str(e)}'})
+            return
+        self.capture({**dict(parse_qsl(url.query)), **params})
+
+    def capture(self, params):
+        service = self.server.service
+        try:
+            step = int(params.get('step', 0))
+            if not 1 <= step <= TOTAL_STEPS:
+                raise ValueError(f'step must be between 1 and {TOTAL_STEPS}')
+            viewport = params.get('viewport', DEFAULT_VIEWPORT)
+            if viewport not in VIEWPORTS:
+                raise ValueError(f'Unknown viewport {viewport!r}; choose from {", ".join(VIEWPORTS)}')
+            output = params.get('output', 'png')
+            if output not in ('png', 'file'):
+                raise ValueError('output must be "png" or "file"')
+            threshold = float(params.get('threshold', service.threshold))
+        except (TypeError, ValueError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        try:
+            result = service.capture(step, viewport, fresh=parse_flag(params.get('fresh')),
+                                     save=output == 'file', threshold=threshold)
+        except TimeoutException as e:
+            self.send_json(504, {'error': str(e)})
+            return
+        except Exception as e:
+            print(f'   ❌ Error capturing step {step} {viewport}: {str(e)}')
+            self.send_json(500, {'error': str(e)})
+            return
+
+        png = result.pop('png')
+        headers = {
+            'X-Capture-Seconds': f'{result["seconds"]:.3f}',
+            'X-Capture-Wait': f'{result["waited"]:.3f}',
+            'X-Capture-Reused': '1' if result['reused'] else '0',
+        }
+        if output == 'file':
+            self.send_json(200, result, headers)
+        else:
+            self.send_body(200, 'image/png', png, headers)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_body(status, 'application/json; charset=utf-8', body, headers)
+
+    def send_body(self, status, content_type, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 요청 로그 대신 캡처마다 한 줄씩 출력
+        pass
+
+
+def serve_captures(base_url=BASE_URL, browsers=DEFAULT_WORKERS, port=DAEMON_PORT, preload=(),
+                   max_pages=DEFAULT_MAX_PAGES, timeout=DEFAULT_TIMEOUT, threshold=DEFAULT_THRESHOLD):
+    """브라우저 풀을 띄워 두고 Ctrl+C까지 캡처 요청 처리"""
+    print(f'🔥 Starting capture daemon with {browsers} warm browsers...')
+    start = time.perf_counter()
+    service = CaptureService(base_url, browsers, max_pages, timeout, threshold)
+    server = None
+    try:
+        if preload:
+            service.preload(preload)
+        server = ThreadingHTTPServer((DAEMON_HOST, port), CaptureHandler)
+        server.daemon_threads = True
+        server.service = service
+        print(f'✨ Ready in {time.perf_counter() - start:.1f}s, pages open: {service.status()["pages"]}')
+        print(f'📡 Listening on http://{DAEMON_HOST}:{port} (POST /capture, GET /capture?step=N, GET /health)')
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n🛑 Shutting down capture daemon...')
+    finally:
+        if server is not None:
+            server.server_close()
+        service.close()
+
+
+def request_capture(daemon_url, step, viewport, threshold=DEFAULT_THRESHOLD, fresh=False, timeout=None):
+    """데몬에 캡처 하나를 요청해서 저장, 응답 JSON(dict) 반환"""
+    payload = {'step': step, 'viewport': viewport, 'output': 'file', 'threshold': threshold, 'fresh': fresh}
+    request = urllib.request.Request(
+        f'{daemon_url}/capture',
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode('utf-8')).get('error')
+        except ValueError:
+            message = e.reason
+        raise RuntimeError(f'Daemon returned {e.code}: {message}')
+
+
+def capture_with_daemon(steps=None, workers=DEFAULT_WORKERS, daemon_url=DAEMON_URL,
+                        viewports=(DEFAULT_VIEWPORT,), timeout=DEFAULT_TIMEOUT,
+                        threshold=DEFAULT_THRESHOLD, fresh=False):
+    """실행 중인 캡처 데몬으로 단계 x 뷰포트를 캡처, 브라우저 시작/첫 로드 비용 없음"""
+    print(f'🚀 Sending capture jobs to {daemon_url}...\n')
+    steps = steps or list(range(1, TOTAL_STEPS + 1))
+    jobs = [(step, viewport) for step in steps for viewport in viewports]
+    start = time.perf_counter()
+
+    waits = {}
+    changes = {}
+    errors = []
+    failed_steps = set()
+    # 데몬 쪽 대기 시간 + 캡처 시간보다 넉넉하게
+    request_timeout = timeout * 2 + 30
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = {
+            pool.submit(request_capture, daemon_url, step, viewport, threshold, fresh, request_timeout): (step, viewport)
+            for step, viewport in jobs
+        }
+        for future in as_completed(futures):
+            step, viewport = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                failed_steps.add(step)
+                print(f'   ❌ Error capturing step {step} {viewport}: {str(e)}')
+                continue
+            filename = os.path.basename(result['file'])
+            print_change(step, filename, result['change'])
+            print(f'   ⏱️  Step {step} {viewport} took {result["seconds"]:.2f}s '
+                  f'({"reused page" if result["reused"] else "loaded"}, waited {result["waited"]:.2f}s)')
+            changes[filename] = result['change']
+            waits[step] = waits.get(step, 0.0) + result['waited']
+
+    for step in failed_steps:
+        waits.pop(step, None)
+    return finish_capture(steps, waits, changes, errors, threshold, start, unit='capture(s)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Capture full-page screenshots of every workshop step')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Parallel headless browsers (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--steps', default=f'1-{TOTAL_STEPS}',
+                        help=f'Steps to capture, e.g. "1-3,7" (default: 1-{TOTAL_STEPS})')
+    parser.add_argument('--base-url', default=BASE_URL, help=f'Frontend URL (default: {BASE_URL})')
+    parser.add_argument('--viewports', default=DEFAULT_VIEWPORT,
+                        help=f'Comma-separated viewports ({", ".join(VIEWPORTS)}) or "all" (default: {DEFAULT_VIEWPORT})')
+    parser.add_argument('--diff-threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Changed-pixel ratio above which a screenshot counts as changed; any changed '
+                             f'region of {MIN_REGION_PIXELS}+ pixels also counts (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Max seconds to wait for a step to become ready (default: {DEFAULT_TIMEOUT})')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run a capture daemon with --workers warm browsers, preloading --steps')
+    parser.add_argument('--port', type=int, default=DAEMON_PORT,
+                        help=f'Capture daemon port (default: {DAEMON_PORT})')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help=f'Step pages each daemon browser keeps open (default: {DEFAULT_MAX_PAGES})')
+    parser.add_argument('--daemon', nargs='?', const=DAEMON_URL, metavar='URL',
+                        help=f'Capture through a running daemon (default URL: {DAEMON_URL})')
+    parser.add_argument('--fresh', action='store_true',
+                        help='With --daemon, reload each step instead of reusing its open page')
+    parser.add_argument('--check-seed', action='store_true',
+                        help='Check that the seeded state of --steps matches clicking "빠른 테스트" from step 1')
+    args = parser.parse_args()
+
+    steps = parse_steps(args.steps)
+    base_url = args.base_url.rstrip('/')
+    if args.check_seed:
+        mismatches = check_seeded_state(steps, base_url, args.timeout)
+        if mismatches:
+            raise RuntimeError(f'Seeded state differs from the click-through at steps {mismatches}')
+        print('\n✨ Seeded state matches the click-through for every step')
+        return False
+    if args.serve:
+        serve_captures(
+            base_url=base_url,
+            browsers=max(1, args.workers),
+            port=args.port,
+            preload=steps,
+            max_pages=max(1, args.max_pages),
+            timeout=args.timeout,
+            threshold=args.diff_threshold
+        )
+        return False
+
+    if args.daemon:
+        capture_with_daemon(
+            steps=steps,
+            workers=args.workers,
+            daemon_url=args.daemon.rstrip('/'),
+            viewports=parse_viewports(args.viewports),
+            timeout=args.timeout,
+            threshold=args.diff_threshold,
+            fresh=args.fresh
+        )
+        return True
+
+    capture_workshop_screenshots(
+        steps=steps,
+        workers=args.workers,
+        base_url=base_url,
+        viewports=parse_viewports(args.viewports),
+        timeout=args.timeout,
+        threshold=args.diff_threshold
+    )
+    return True
+
 
 if __name__ == '__main__':
     try:
-        capture_workshop_screenshots()
-        print('\n🎉 Screenshot capture completed!')
+        if main():
+            print('\n🎉 Screenshot capture completed!')
     except Exception as error:
         print(f'\n💥 Fatal error: {str(error)}')
         exit(1)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Screenshot change detection for capture-screenshots.py
+
+Compares a fresh capture against the previous file with a difference hash
+(dHash) and a NumPy pixel diff. Unchanged captures leave the old file
+untouched (same bytes, same mtime) so incremental doc builds only pick up
+steps that really changed; the result per file, with diff bounding boxes,
+goes into a JSON change report.
+
+Usage:
+    python screenshot_diff.py old.png new.png
+"""
+
+from PIL import Image
+import numpy as np
+import argparse
+import io
+import json
+import os
+import time
+
+REPORT_FILENAME = 'screenshot_changes.json'
+# 채널 차이가 이 값 이하인 픽셀은 변경으로 보지 않음 (안티앨리어싱/블러 노이즈)
+PIXEL_TOLERANCE = 16
+# 변경 픽셀 비율이 이 값을 넘으면 변경 (흩어진 노이즈가 화면 전체에 퍼진 경우)
+DEFAULT_THRESHOLD = 0.001
+# 변경 픽셀이 이 수 이상인 영역이 하나라도 있으면 변경 (글자 하나 수정도 잡힘), 더 작은 영역은 노이즈
+MIN_REGION_PIXELS = 4
+# 바운딩 박스를 묶는 격자 크기 (px)
+CELL_SIZE = 16
+
+
+def load_rgb(source):
+    """파일 경로 또는 PNG 바이트를 (H, W, 3) uint8 배열로 로드"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with Image.open(source) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def dhash(pixels, size=8):
+    """64비트 difference hash (16진 문자열)"""
+    gray = Image.fromarray(pixels).convert('L').resize((size + 1, size), Image.BOX)
+    rows = np.asarray(gray, dtype=np.int16)
+    bits = (rows[:, 1:] > rows[:, :-1]).ravel()
+    return f'{int("".join("1" if b else "0" for b in bits), 2):0{size * size // 4}x}'
+
+
+def hamming(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def change_mask(old, new, tolerance=PIXEL_TOLERANCE):
+    """채널별 최대 차이가 tolerance를 넘는 픽셀 마스크"""
+    diff = np.abs(old.astype(np.int16) - new.astype(np.int16)).max(axis=2)
+    return diff > tolerance
+
+
+def bounding_boxes(mask, cell=CELL_SIZE):
+    """
+    변경 마스크를 격자 단위로 묶어 연결된 영역별 바운딩 박스 계산
+
+    Returns:
+        [{'x', 'y', 'width', 'height', 'pixels'}], 픽셀 단위로 좁힌 박스
+    """
+    height, width = mask.shape
+    padded = np.pad(mask, ((0, -height % cell), (0, -width % cell)))
+    rows, cols = padded.shape[0] // cell, padded.shape[1] // cell
+    cells = padded.reshape(rows, cell, cols, cell).any(axis=(1, 3))
+
+    boxes = []
+    seen = np.zeros_like(cells)
+    for start in zip(*np.nonzero(cells)):
+        if seen[start]:
+            continue
+        # 8방향 연결 요소 탐색 (변경된 셀만 방문)
+        stack = [start]
+        seen[start] = True
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while stack:
+            r, c = stack.pop()
+            top, bottom = min(top, r), max(bottom, r)
+            left, right = min(left, c), max(right, c)
+            for nr in range(max(r - 1, 0), min(r + 2, rows)):
+                for nc in range(max(c - 1, 0), min(c + 2, cols)):
+                    if cells[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+
+        y0, x0 = top * cell, left * cell
+        region = mask[y0:(bottom + 1) * cell, x0:(right + 1) * cell]
+        ys = np.flatnonzero(region.any(axis=1))
+        xs = np.flatnonzero(region.any(axis=0))
+        boxes.append({
+            'x': int(x0 + xs[0]),
+            'y': int(y0 + ys[0]),
+            'width': int(xs[-1] - xs[0] + 1),
+            'height': int(ys[-1] - ys[0] + 1),
+            'pixels': int(region.sum()),
+        })
+    boxes.sort(key=lambda b: (b['y'], b['x']))
+    return boxes
+
+
+def compare(old, new, threshold=DEFAULT_THRESHOLD, tolerance=PIXEL_TOLERANCE, min_region=MIN_REGION_PIXELS):
+    """
+    두 캡처 비교
+
+    변경 픽셀이 min_region개 이상인 영역이 하나라도 있거나 변경 비율이 threshold를 넘으면 변경.
+    비율만 보면 큰 화면에서 글자 몇 개가 바뀐 것을 놓침.
+
+    Args:
+        old: 이전 캡처 (경로/바이트), 없으면 None
+        new: 새 캡처 (경로/바이트)
+        threshold: 영역 크기와 관계없이 변경으로 판단할 변경 픽셀 비율
+        tolerance: 픽셀 채널 차이 허용치
+        min_region: 변경으로 판단할 영역의 최소 변경 픽셀 수
+
+    Returns:
+        status('new'|'unchanged'|'changed'), 해시, 변경 비율, 바운딩 박스를 담은 dict
+    """
+    new_pixels = load_rgb(new)
+    height, width = new_pixels.shape[:2]
+    entry = {
+        'status': 'new',
+        'size': [width, height],
+        'phash': dhash(new_pixels),
+        'phash_distance': None,
+        'changed_ratio': 1.0,
+        'boxes': [],
+    }
+    if old is None:
+        return entry
+
+    old_pixels = load_rgb(old)
+    old_hash = dhash(old_pixels)
+    entry['phash_distance'] = hamming(old_hash, entry['phash'])
+
+    if old_pixels.shape != new_pixels.shape:
+        # 페이지 높이가 바뀌면 전체를 변경으로 처리
+        entry['status'] = 'changed'
+        entry['previous_size'] = [old_pixels.shape[1], old_pixels.shape[0]]
+        entry['boxes'] = [{'x': 0, 'y': 0, 'width': width, 'height': height, 'pixels': width * height}]
+        return entry
+
+    mask = change_mask(old_pixels, new_pixels, tolerance)
+    entry['changed_ratio'] = float(mask.mean())
+    boxes = bounding_boxes(mask) if mask.any() else []
+    if entry['changed_ratio'] <= threshold and all(box['pixels'] < min_region for box in boxes):
+        entry['status'] = 'unchanged'
+        return entry
+
+    entry['status'] = 'changed'
+    entry['boxes'] = boxes
+    return entry
+
+
+def write_if_changed(path, png_bytes, threshold=DEFAULT_THRESHOLD):
+    """
+    새 캡처가 이전 파일과 다를 때만 파일을 교체
+
+    Returns:
+        compare() 결과 dict
+    """
+    previous = None
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            previous = f.read()
+
+    if previous == png_bytes:
+        entry = compare(None, png_bytes)
+        entry.update(status='unchanged', phash_distance=0, changed_ratio=0.0)
+        return entry
+
+    entry = compare(previous, png_bytes, threshold)
+    if entry['status'] != 'unchanged':
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(png_bytes)
+        os.replace(tmp_path, path)
+    return entry
+
+
+def write_report(directory, entries, threshold=DEFAULT_THRESHOLD):
+    """변경 리포트(JSON)를 원자적으로 저장하고 경로 반환"""
+    report = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'threshold': threshold,
+        'pixel_tolerance': PIXEL_TOLERANCE,
+        'min_region_pixels': MIN_REGION_PIXELS,
+        'changed': sorted(name for name, e in entries.items() if e['status'] != 'unchanged'),
+        'files': dict(sorted(entries.items())),
+    }
+    path = os.path.join(directory, REPORT_FILENAME)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perceptual + pixel diff of two screenshots')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Changed-pixel ratio above which the screenshot counts as changed '
+                             f'(default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--min-region', type=int, default=MIN_REGION_PIXELS,
+                        help=f'Changed pixels in one region that make the screenshot count as changed '
+                             f'(default: {MIN_REGION_PIXELS})')
+    args = parser.parse_args()
+    print(json.dumps(compare(args.old, args.new, args.threshold, min_region=args.min_region), indent=2))
+
+
+if __name__ == '__main__':
+    main()
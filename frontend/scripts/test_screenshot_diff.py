@@ -0,0 +1,92 @@
+import io
+import json
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from screenshot_diff import (DEFAULT_THRESHOLD, PIXEL_TOLERANCE, REPORT_FILENAME, compare, write_if_changed,
+                             write_report)
+
+
+def page(text='Step 3: 업무 정보 입력', size=(800, 600), pixels=None):
+    """흰 배경에 글자 한 줄을 그린 PNG 바이트"""
+    image = Image.new('RGB', size, 'white')
+    ImageDraw.Draw(image).text((40, 40), text, fill='black')
+    if pixels is not None:
+        image = Image.fromarray(pixels(np.asarray(image).copy()))
+    out = io.BytesIO()
+    image.save(out, format='PNG')
+    return out.getvalue()
+
+
+def test_single_character_edit_is_a_change():
+    entry = compare(page('Step 3'), page('Step 8'))
+    # 바뀐 픽셀은 전체의 0.1%에 한참 못 미치지만 글자 영역이 잡혀야 함
+    assert entry['changed_ratio'] < DEFAULT_THRESHOLD
+    assert entry['status'] == 'changed'
+    [box] = entry['boxes']
+    assert 40 <= box['x'] < 100 and 40 <= box['y'] < 60
+    assert box['width'] < 20
+
+
+def test_noise_is_unchanged():
+    def speckle(pixels):
+        # 외딴 픽셀 하나 + 허용치 이내의 전체 밝기 변화
+        pixels[500, 700] = 0
+        pixels[pixels == 255] = 255 - PIXEL_TOLERANCE
+        return pixels
+
+    entry = compare(page(), page(pixels=speckle))
+    assert entry['status'] == 'unchanged'
+    assert entry['boxes'] == []
+    assert 0 < entry['changed_ratio'] < DEFAULT_THRESHOLD
+
+
+def test_widespread_change_counts_even_without_regions():
+    def scatter(pixels):
+        # 32px 간격의 외딴 픽셀: 영역은 모두 작지만 비율은 임계값을 넘음
+        pixels[::32, ::32] = 0
+        return pixels
+
+    entry = compare(page(''), page('', pixels=scatter), threshold=0.0005)
+    assert entry['status'] == 'changed'
+    assert all(box['pixels'] == 1 for box in entry['boxes'])
+
+
+def test_new_and_resized_captures():
+    assert compare(None, page())['status'] == 'new'
+    entry = compare(page(), page(size=(800, 900)))
+    assert entry['status'] == 'changed'
+    assert entry['previous_size'] == [800, 600]
+    assert entry['boxes'] == [{'x': 0, 'y': 0, 'width': 800, 'height': 900, 'pixels': 800 * 900}]
+
+
+def test_write_if_changed_keeps_unchanged_files(tmp_path):
+    path = str(tmp_path / 'step_3_fullpage.png')
+    assert write_if_changed(path, page())['status'] == 'new'
+    os.utime(path, (1, 1))
+
+    # 같은 바이트, 노이즈만 다른 캡처 모두 기존 파일 유지
+    assert write_if_changed(path, page())['status'] == 'unchanged'
+    assert write_if_changed(path, page(pixels=lambda p: np.minimum(p, 250)))['status'] == 'unchanged'
+    assert os.stat(path).st_mtime == 1
+    with open(path, 'rb') as f:
+        assert f.read() == page()
+
+    entry = write_if_changed(path, page('Step 8: 업무 정보 입력'))
+    assert entry['status'] == 'changed'
+    with open(path, 'rb') as f:
+        assert f.read() == page('Step 8: 업무 정보 입력')
+    assert not os.path.exists(f'{path}.tmp')
+
+
+def test_report_lists_changed_files(tmp_path):
+    entries = {
+        'step_2_fullpage.png': compare(page(), page('Step 4')),
+        'step_1_fullpage.png': compare(page(), page()),
+    }
+    report = json.loads(open(write_report(str(tmp_path), entries), encoding='utf-8').read())
+    assert report['changed'] == ['step_2_fullpage.png']
+    assert list(report['files']) == ['step_1_fullpage.png', 'step_2_fullpage.png']
+    assert os.listdir(tmp_path) == [REPORT_FILENAME]
@@ -10,6 +10,8 @@ import Step8WorkflowEducation from '@/components/workshop/Step8WorkflowEducation
 import Step9AIConsultant from '@/components/workshop/Step9AIConsultant';
 import PhaseSummary from '@/components/workshop/PhaseSummary';
 import { API_CONFIG } from '@/config/api';
+// 빠른 테스트 데이터 (scripts/capture-screenshots.py 도 같은 파일로 단계별 상태를 주입)
+import devWorkshopData from '@/config/devWorkshopData.json';
 
 // 이미지 생성을 위한 동적 import
 const captureElement = async (element: HTMLElement) => {
@@ -141,6 +143,10 @@ const WORKSHOP_STEPS = [
   { id: 13, displayId: '13', title: '워크샵 마무리', description: '여정 확인 및 소감 작성', icon: '🏁', section: 'AI 협업 구조 설계하기' }
 ];
 
+// ?step=N 진입과 개발용 상태 노출은 개발 서버 또는 NEXT_PUBLIC_ENABLE_STEP_LINKS=true 빌드에서만 허용
+const STEP_LINKS_ENABLED =
+  process.env.NODE_ENV !== 'production' || process.env.NEXT_PUBLIC_ENABLE_STEP_LINKS === 'true';
+
 // 현재 단계가 속한 그룹 찾기
 const getCurrentGroup = (step: number) => {
   return WORKSHOP_GROUPS.find(group => group.steps.includes(step)) || WORKSHOP_GROUPS[0];
@@ -526,6 +532,26 @@ export default function WorkshopPage() {
         console.error('Failed to load workshop state', e);
       }
     }
+    const savedManualTasks = localStorage.getItem('workshop_manual_task_input');
+    if (savedManualTasks) {
+      try {
+        setManualTaskInput(JSON.parse(savedManualTasks));
+      } catch (e) {
+        console.error('Failed to load manual task input', e);
+      }
+    }
+  }, []);
+
+  // 스크린샷 캡처용: ?step=N 으로 특정 단계에 바로 진입 (workshop_state는 localStorage로 주입)
+  // 운영 빌드에서는 단계를 건너뛸 수 없음
+  useEffect(() => {
+    if (!STEP_LINKS_ENABLED) {
+      return;
+    }
+    const step = Number(new URLSearchParams(window.location.search).get('step'));
+    if (Number.isInteger(step) && step >= 1 && step <= WORKSHOP_STEPS.length) {
+      setCurrentStep(step);
+    }
   }, []);
 
   useEffect(() => {
@@ -534,6 +560,19 @@ export default function WorkshopPage() {
     }
   }, [workshop]);
 
+  useEffect(() => {
+    if (Object.values(manualTaskInput).some(value => value.trim())) {
+      localStorage.setItem('workshop_manual_task_input', JSON.stringify(manualTaskInput));
+    }
+  }, [manualTaskInput]);
+
+  // 캡처 스크립트의 --check-seed: 주입한 상태와 빠른 테스트로 만든 상태를 비교할 수 있게 노출
+  useEffect(() => {
+    if (STEP_LINKS_ENABLED) {
+      (window as any).__workshopDevState = { workshop, manualTaskInput };
+    }
+  }, [workshop, manualTaskInput]);
+
   // Sync teamSizeInput from workshop.teamSize if available
   useEffect(() => {
     if (workshop.teamSize && workshop.teamSize > 0 && !teamSizeInput) {
@@ -598,7 +637,7 @@ export default function WorkshopPage() {
     } else if (currentStep === 2) {
       setWorkshop(prev => ({
         ...prev,
-        domains: ['고객 문의 처리', '데이터 분석', '보고서 작성']
+        domains: devWorkshopData.domainsStep2
       }));
       setTimeout(() => setCurrentStep(3), 500);
     } else if (currentStep === 3) {
@@ -611,16 +650,12 @@ export default function WorkshopPage() {
       // Step 5: 업무 영역 자동 입력
       setWorkshop(prev => ({
         ...prev,
-        domains: ['고객 문의 처리', '데이터 분석 및 리포트', '회의 및 보고']
+        domains: devWorkshopData.domainsStep5
       }));
       setTimeout(() => setCurrentStep(6), 500);
     } else if (currentStep === 6) {
       // Step 6: 업무 내용 자동 입력
-      setManualTaskInput({
-        '고객 문의 처리': '매일 오전 9시 이메일 확인 (30분)\n고객 문의 분류 및 답변 (2시간)\n긴급 문의 처리 (1시간)',
-        '데이터 분석 및 리포트': '주간 데이터 수집 (1시간)\nExcel 데이터 정제 (2시간)\n리포트 작성 및 차트 생성 (3시간)',
-        '회의 및 보고': '일일 스탠드업 미팅 (30분)\n주간 팀 회의 (1시간)\n월간 보고서 작성 (4시간)'
-      });
+      setManualTaskInput(devWorkshopData.manualTaskInput);
 
       // 워크샵을 백엔드에 실제로 생성
       if (!workshop.id) {
@@ -628,56 +663,14 @@ export default function WorkshopPage() {
           const response = await fetch('/api/workshops', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-              title: '개발 테스트 워크샵',
-              description: '빠른 테스트를 위한 워크샵',
-              mission: '테스트',
-              domains: ['고객 문의 처리', '데이터 분석 및 리포트', '회의 및 보고']
-            }),
+            body: JSON.stringify(devWorkshopData.workshopRequest),
           });
           const data = await response.json();
           if (data.success) {
             setWorkshop(prev => ({
               ...prev,
               id: data.id,
-              tasks: [
-                {
-                  id: 'task1',
-                  title: '고객 이메일 확인 및 분류',
-                  description: '매일 오전 9시 고객 이메일을 확인하고 긴급/일반/기술 문의로 분류',
-                  timeSpent: 30,
-                  frequency: '매일',
-                  automation: 'high' as const,
-                  automationMethod: 'AI 이메일 분류 시스템',
-                  category: '고객 문의 처리',
-                  sourceFileId: 'manual',
-                  sourceFilename: '직접 입력'
-                },
-                {
-                  id: 'task2',
-                  title: '주간 데이터 수집 및 정제',
-                  description: '매주 금요일 데이터베이스에서 주간 데이터를 추출하고 Excel로 정제',
-                  timeSpent: 180,
-                  frequency: '주간',
-                  automation: 'medium' as const,
-                  automationMethod: 'Python 스크립트 자동화',
-                  category: '데이터 분석 및 리포트',
-                  sourceFileId: 'manual',
-                  sourceFilename: '직접 입력'
-                },
-                {
-                  id: 'task3',
-                  title: '월간 보고서 작성',
-                  description: '매월 말 월간 성과 보고서를 작성하고 경영진에게 보고',
-                  timeSpent: 240,
-                  frequency: '월간',
-                  automation: 'low' as const,
-                  automationMethod: '템플릿 활용',
-                  category: '회의 및 보고',
-                  sourceFileId: 'manual',
-                  sourceFilename: '직접 입력'
-                }
-              ]
+              tasks: devWorkshopData.tasks as Task[]
             }));
             setTimeout(() => setCurrentStep(7), 500);
           }
@@ -701,7 +694,7 @@ export default function WorkshopPage() {
       // Step 10: AI 컨설팅 - 선택된 task 설정 후 Step11(워크플로우 설계)으로 이동
       setWorkshop(prev => ({
         ...prev,
-        selectedTaskIds: ['task1'] // 첫 번째 task 자동 선택
+        selectedTaskIds: devWorkshopData.selectedTaskIds // 첫 번째 task 자동 선택
       }));
       setTimeout(() => setCurrentStep(11), 500);
     } else if (currentStep === 11) {
@@ -1600,7 +1593,7 @@ if __name__ == "__main__":
   };
 
   return (
-    <div className="h-screen bg-gradient-to-br from-blue-50 via-indigo-50 to-purple-50 flex flex-col relative overflow-hidden">
+    <div data-workshop-step={currentStep} className="h-screen bg-gradient-to-br from-blue-50 via-indigo-50 to-purple-50 flex flex-col relative overflow-hidden">
       {/* Dev Mode Button - Fixed position */}
       <button
         onClick={fillDevData}
@@ -0,0 +1,281 @@
+"""
+페르소나 사진 스프라이트 아틀라스 빌드
+
+public/images/personas/P001.jpg … 를 PersonaCard 사진 칸(160x208 CSS px) 비율로
+가운데 잘라(object-cover와 동일) 배율 썸네일로 줄이고, 아틀라스 JPEG 몇 장에
+격자로 묶어 좌표를 src/data/personaAtlas.json 에 기록합니다. 카드는 이 매니페스트로
+배경 스프라이트를 그리므로 사진 30장 대신 아틀라스 몇 장을 한 번에 받습니다.
+
+소스는 앱이 로드하는 카드 사진뿐이며, 촬영 스크립트는 실제로 생성된 사진만
+(generate_persona_photos.py --publish) 여기에 반영한 뒤 아틀라스를 갱신합니다.
+
+소스 파일 해시가 바뀐 페르소나가 들어 있는 아틀라스만 다시 만들고, 나머지는
+파일명(내용 해시 포함)까지 그대로 둡니다.
+
+아틀라스와 매니페스트는 저장소에 커밋되므로, 카드 사진을 직접 바꿨다면
+--check 로 매니페스트 해시가 현재 사진과 맞는지 확인합니다.
+
+사용법:
+    python3 scripts/build_persona_atlas.py
+    python3 scripts/build_persona_atlas.py --force --scale 2
+    python3 scripts/build_persona_atlas.py --check
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+import numpy as np
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+import re
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(SCRIPT_DIR, "..", "public", "images", "personas")
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, "..", "src", "data", "personaAtlas.json")
+
+# PersonaCard 사진 칸 (w-40 h-52), CSS px
+SLOT_SIZE = (160, 208)
+# 3x: 화면(레티나)과 인쇄(A4 PDF, 약 290dpi) 모두 선명
+DEFAULT_SCALE = 3
+DEFAULT_QUALITY = 82
+# 아틀라스 한 장의 최대 가로/세로 (모바일 디코딩 한도 고려)
+MAX_SHEET_SIDE = 2048
+MANIFEST_VERSION = 1
+
+SOURCE_PATTERN = re.compile(r"^(P\d+)\.jpg$")
+SHEET_PATTERN = re.compile(r"^atlas-\d+\.[0-9a-f]+\.jpg$")
+
+
+# ==========================================
+# 1. 소스 / 매니페스트
+# ==========================================
+def find_sources(source_dir=SOURCE_DIR):
+    """{페르소나 id: 사진 경로}, id 순서"""
+    found = {}
+    for name in sorted(os.listdir(source_dir)):
+        match = SOURCE_PATTERN.match(name)
+        if match:
+            found[match.group(1)] = os.path.join(source_dir, name)
+    return found
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def load_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def check_atlas(source_dir=SOURCE_DIR, manifest_path=MANIFEST_PATH):
+    """매니페스트가 현재 사진과 어긋난 항목 목록 (비어 있으면 최신)"""
+    manifest = load_manifest(manifest_path)
+    if manifest is None or manifest.get("version") != MANIFEST_VERSION:
+        return [f"{manifest_path}: 매니페스트 없음 또는 버전 불일치"]
+    sources = find_sources(source_dir)
+    sprites = manifest.get("sprites", {})
+    problems = []
+    for pid, path in sources.items():
+        if pid not in sprites:
+            problems.append(f"{pid}: 아틀라스에 없음")
+        elif sprites[pid].get("hash") != file_hash(path):
+            problems.append(f"{pid}: 사진이 바뀜")
+    problems += [f"{pid}: 사진이 삭제됨" for pid in sprites if pid not in sources]
+    problems += [f"{sheet['file']}: 아틀라스 파일 없음" for sheet in manifest.get("sheets", [])
+                 if not os.path.exists(os.path.join(source_dir, sheet["file"]))]
+    return problems
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# ==========================================
+# 2. 배치 계산 (numpy)
+# ==========================================
+def sheet_grid(count, cell, max_side=MAX_SHEET_SIDE):
+    """아틀라스 한 장의 (열, 행): max_side 안에 들어가면서 정사각형에 가깝게"""
+    max_cols = max(1, max_side // cell[0])
+    max_rows = max(1, max_side // cell[1])
+    per_sheet = min(count, max_cols * max_rows)
+    cols = min(max_cols, per_sheet, max(1, math.ceil(math.sqrt(per_sheet * cell[1] / cell[0]))))
+    rows = min(max_rows, math.ceil(per_sheet / cols))
+    return cols, rows
+
+
+def layout(count, cols, rows, cell):
+    """슬롯 순서(행 우선)대로 (아틀라스 번호, x, y) 배열"""
+    sheet, slot = np.divmod(np.arange(count), cols * rows)
+    row, col = np.divmod(slot, cols)
+    return sheet, col * cell[0], row * cell[1]
+
+
+def cover_boxes(sizes, cell):
+    """(N, 2) 소스 크기 → 칸 비율로 가운데를 잘라내는 (N, 4) 박스 (CSS object-cover와 동일)"""
+    sizes = np.asarray(sizes, dtype=np.float64)
+    aspect = cell[0] / cell[1]
+    width = np.minimum(sizes[:, 0], sizes[:, 1] * aspect)
+    height = width / aspect
+    left = (sizes[:, 0] - width) / 2
+    top = (sizes[:, 1] - height) / 2
+    return np.stack([left, top, left + width, top + height], axis=1)
+
+
+# ==========================================
+# 3. 썸네일 / 아틀라스 생성
+# ==========================================
+def make_thumbnail(path, box, cell):
+    """잘라낼 박스를 칸 크기로 줄인 (H, W, 3) 배열"""
+    with Image.open(path) as image:
+        width = image.width
+        # JPEG은 DCT 단계에서 1/2~1/8로 줄여 디코드 (박스가 칸보다 작아지지 않는 만큼)
+        needed = cell[0] * width / (box[2] - box[0])
+        image.draft("RGB", (math.ceil(needed), math.ceil(needed * image.height / width)))
+        factor = image.width / width
+        pixels = image.convert("RGB")
+    scaled = tuple(float(v) * factor for v in box)
+    return np.asarray(pixels.resize(cell, Image.LANCZOS, box=scaled, reducing_gap=3.0))
+
+
+def render_sheet(paths, cols, cell, quality):
+    """사진들을 행 우선 격자로 배치한 아틀라스 JPEG 바이트와 (가로, 세로)"""
+    sizes = []
+    for path in paths:
+        with Image.open(path) as image:
+            sizes.append(image.size)
+    boxes = cover_boxes(sizes, cell)
+
+    # Pillow 디코드/리사이즈는 GIL을 풀기 때문에 스레드로 병렬 처리
+    with ThreadPoolExecutor() as pool:
+        thumbs = list(pool.map(make_thumbnail, paths, boxes, [cell] * len(paths)))
+
+    # (칸, H, W, 3) → (행, H, 열, W, 3) → 한 장으로 재배열, 빈 칸은 흰색
+    rows = math.ceil(len(thumbs) / cols)
+    cells = np.full((rows * cols, cell[1], cell[0], 3), 255, dtype=np.uint8)
+    cells[:len(thumbs)] = np.stack(thumbs)
+    canvas = cells.reshape(rows, cols, cell[1], cell[0], 3).transpose(0, 2, 1, 3, 4)
+    canvas = canvas.reshape(rows * cell[1], cols * cell[0], 3)
+
+    buffer = io.BytesIO()
+    Image.fromarray(canvas).save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue(), (canvas.shape[1], canvas.shape[0])
+
+
+def build_atlas(source_dir=SOURCE_DIR, manifest_path=MANIFEST_PATH, scale=DEFAULT_SCALE,
+                quality=DEFAULT_QUALITY, force=False):
+    """
+    바뀐 사진이 들어 있는 아틀라스만 다시 만들고 매니페스트 저장
+
+    Args:
+        source_dir: 페르소나 사진(P001.jpg …) 폴더, 아틀라스도 여기에 저장
+        manifest_path: PersonaCard가 import 하는 좌표 매니페스트(JSON)
+        scale: 사진 칸(160x208 CSS px) 대비 썸네일 배율
+        quality: 아틀라스 JPEG 품질
+        force: 해시가 같아도 전부 다시 생성
+
+    Returns:
+        매니페스트 dict (사진이 없으면 None)
+    """
+    sources = find_sources(source_dir)
+    if not sources:
+        print(f"⚠️  '{source_dir}'에 페르소나 사진이 없습니다.")
+        return None
+
+    ids = list(sources)
+    hashes = {pid: file_hash(path) for pid, path in sources.items()}
+    cell = (SLOT_SIZE[0] * scale, SLOT_SIZE[1] * scale)
+    cols, rows = sheet_grid(len(ids), cell)
+    sheet_of, xs, ys = layout(len(ids), cols, rows, cell)
+    params = {"cell": list(cell), "grid": [cols, rows], "quality": quality}
+
+    previous = load_manifest(manifest_path)
+    reusable = (not force and previous is not None
+                and previous.get("version") == MANIFEST_VERSION and previous.get("params") == params)
+    old_sprites = previous.get("sprites", {}) if reusable else {}
+    old_sheets = previous.get("sheets", []) if reusable else []
+
+    sheets = []
+    rebuilt = 0
+    for n in range(int(sheet_of.max()) + 1):
+        members = [ids[i] for i in np.flatnonzero(sheet_of == n)]
+        old = old_sheets[n] if n < len(old_sheets) else None
+        if (old is not None and old.get("ids") == members
+                and all(old_sprites.get(pid, {}).get("hash") == hashes[pid] for pid in members)
+                and os.path.exists(os.path.join(source_dir, old["file"]))):
+            sheets.append(old)
+            continue
+
+        data, (width, height) = render_sheet([sources[pid] for pid in members], cols, cell, quality)
+        filename = f"atlas-{n}.{hashlib.sha1(data).hexdigest()[:8]}.jpg"
+        write_atomic(os.path.join(source_dir, filename), data)
+        sheets.append({"file": filename, "width": width, "height": height, "bytes": len(data), "ids": members})
+        rebuilt += 1
+        print(f"   🧩 아틀라스 {n}: {len(members)}명 → {filename} ({width}x{height}, {len(data) / 1024:.0f}KB)")
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "params": params,
+        "cell": {"width": cell[0], "height": cell[1]},
+        "sheets": sheets,
+        "sprites": {
+            pid: {"sheet": int(sheet_of[i]), "x": int(xs[i]), "y": int(ys[i]), "hash": hashes[pid]}
+            for i, pid in enumerate(ids)
+        },
+    }
+    if manifest != previous:
+        write_atomic(manifest_path, (json.dumps(manifest, indent=2, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    # 이번 매니페스트에 없는 이전 아틀라스 파일 정리
+    current = {sheet["file"] for sheet in sheets}
+    for name in os.listdir(source_dir):
+        if SHEET_PATTERN.match(name) and name not in current:
+            os.remove(os.path.join(source_dir, name))
+
+    atlas_bytes = sum(sheet["bytes"] for sheet in sheets)
+    source_bytes = sum(os.path.getsize(path) for path in sources.values())
+    print(f"🧩 사진 {len(ids)}장 → 아틀라스 {len(sheets)}장 (새로 생성 {rebuilt}장, 재사용 {len(sheets) - rebuilt}장), "
+          f"{atlas_bytes / 1024:.0f}KB (원본 {source_bytes / 1024:.0f}KB)")
+    return manifest
+
+
+# ==========================================
+# 메인 실행
+# ==========================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack persona photos into sprite atlases for PersonaCard")
+    parser.add_argument("--source-dir", default=SOURCE_DIR, help="Persona photo folder (atlases are written here)")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Sprite manifest JSON imported by PersonaCard")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE,
+                        help=f"Thumbnail scale of the {SLOT_SIZE[0]}x{SLOT_SIZE[1]} CSS px photo slot "
+                             f"(default: {DEFAULT_SCALE})")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY,
+                        help=f"Atlas JPEG quality (default: {DEFAULT_QUALITY})")
+    parser.add_argument("--force", action="store_true", help="Rebuild every atlas even if no photo changed")
+    parser.add_argument("--check", action="store_true",
+                        help="Only verify that the manifest matches the current photos (exit 1 if stale)")
+    args = parser.parse_args()
+
+    if args.check:
+        problems = check_atlas(args.source_dir, args.manifest)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            print("   python3 scripts/build_persona_atlas.py 로 아틀라스를 다시 만드세요.")
+            raise SystemExit(1)
+        print("✅ 아틀라스가 최신입니다.")
+    else:
+        build_atlas(args.source_dir, args.manifest, args.scale, args.quality, args.force)
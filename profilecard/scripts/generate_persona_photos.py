@@ -1,9 +1,25 @@
-from google import genai
-from google.genai import types
+import argparse
+import asyncio
+import hashlib
 import os
-import time
+import shutil
+import sys
 import json
 import re
+import time
+import urllib.request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 공용 재시도 정책 / 속도 제한 / 프롬프트 템플릿 / 웹용 변환 / 메트릭: workshop-pilot-system/image-generator/
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", "..", "workshop-pilot-system", "image-generator"))
+from image_variants import VariantPool
+from output_manifest import OutputManifest, prompt_hash
+from persona_stream import ArrayItemParser
+from pipeline_metrics import Tracer
+from prompt_templates import register_template
+from rate_limiter import AdaptiveConcurrency, RateLimiter
+from retry_policy import RetryBudget, RetryPolicy, is_throttled
 
 # ==========================================
 # 설정
@@ -12,13 +28,47 @@ import re
 # 만약 직접 입력하려면 아래 주석을 해제하고 입력하세요.
 # os.environ["GOOGLE_API_KEY"] = "YOUR_API_KEY_HERE"
 
-client = genai.Client()
+_client = None
+
+
+def get_client():
+    """genai 클라이언트 (처음 사용할 때 생성)"""
+    global _client
+    if _client is None:
+        # google-genai는 실제 호출 때만 필요 (기획 분할/병합 함수는 없이도 import 가능)
+        from google import genai
+        _client = genai.Client()
+    return _client
+
 
 MODEL_BRAIN = "gemini-2.5-flash-lite"      # 뇌: 최신 Flash Lite 모델
 MODEL_PAINTER = "gemini-3-pro-image-preview" # 손: Gemini 3 Pro 이미지 모델
 
-PERSONAS_FILE_PATH = "../src/data/personas.ts"
-SAVE_DIR = "../public/images/personas"
+# 경로는 모두 이 스크립트 기준 (어느 디렉토리에서 실행해도 같은 위치)
+PERSONAS_FILE_PATH = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "src", "data", "personas.ts"))
+SAVE_DIR = os.path.normpath(os.path.join(SCRIPT_DIR, "..", "public", "images", "personas"))
+# 요청별 구간 측정(spans.jsonl)과 Prometheus 스냅샷(<파이프라인>.prom) 저장 위치 (None이면 출력만)
+METRICS_DIR = os.path.join(SCRIPT_DIR, "metrics")
+
+# 429/5xx/타임아웃 재시도 정책 (Retry-After 존중, decorrelated jitter 백오프)
+PLAN_RETRY = RetryPolicy(max_attempts=3, base_delay=10, max_delay=60)
+SHOOT_RETRY = RetryPolicy(max_attempts=4, base_delay=5, max_delay=60)
+
+# 기획 분할: 묶음당 페르소나 수, 동시 기획 요청 수
+PLAN_CHUNK_SIZE = 5
+PLAN_MAX_IN_FLIGHT = 3
+
+# 촬영 동시성: 최대 동시 요청 수, 분당 요청 수
+SHOOT_MAX_IN_FLIGHT = 4
+SHOOT_RPM = 20
+# 기획 완료 → 촬영 대기열 크기 (가득 차면 기획 응답 소비를 잠시 멈춤)
+SHOOT_QUEUE_SIZE = 8
+
+# 웹용 변환: 카드(<id>.jpg), 썸네일/레티나 WebP
+# 촬영과 동시에 별도 프로세스에서 처리해 public/ 밖의 scripts/web_variants/ 에 저장 (배포물에 포함되지 않음)
+# 실제 촬영된 사진의 카드 변환만 --publish 로 public/images/personas/<id>.jpg 에 반영
+WEB_VARIANTS = ("card", "thumb", "retina")
+WEB_VARIANTS_DIR = os.path.join(SCRIPT_DIR, "web_variants")
 
 # ==========================================
 # 1. 페르소나 데이터 읽기
@@ -36,22 +86,68 @@ def read_personas_file():
 # ==========================================
 # 2. 프롬프트 기획 (Gemini)
 # ==========================================
-def plan_photos(persona_data):
-    # 이미 생성된 프롬프트가 있는지 확인
-    prompts_file = os.path.join(SAVE_DIR, "prompts.json")
-    if os.path.exists(prompts_file):
-        print(f"📂 기존 프롬프트 파일 발견: {prompts_file}")
-        try:
-            with open(prompts_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"⚠️ 기존 파일 읽기 실패, 새로 기획합니다: {e}")
+PERSONA_ID_RE = re.compile(r"\bid:\s*['\"](P\d+)['\"]")
+
 
-    print(f"🚀 1단계: {MODEL_BRAIN}이(가) 페르소나별 사진 컨셉을 기획합니다...")
+def split_persona_blocks(persona_data):
+    """PERSONAS_V3 배열을 페르소나별 블록으로 나누고 내용 해시를 붙인다.
+
+    문자열/주석을 건너뛰며 중괄호 깊이를 세어 배열의 최상위 객체를 찾는다.
+    반환: [{'id', 'source', 'hash'}, ...] (파일 순서)
+    """
+    start = persona_data.find("export const PERSONAS_V3")
+    if start < 0:
+        return []
+    start = persona_data.find("= [", start)
+    if start < 0:
+        return []
+
+    blocks = []
+    depth = 0
+    obj_start = None
+    i = start + 3
+    n = len(persona_data)
+    while i < n:
+        ch = persona_data[i]
+        if ch in "'\"`":
+            # 문자열 리터럴 건너뛰기
+            i += 1
+            while i < n and persona_data[i] != ch:
+                i += 2 if persona_data[i] == "\\" else 1
+        elif persona_data.startswith("//", i):
+            i = persona_data.find("\n", i)
+            if i < 0:
+                break
+        elif persona_data.startswith("/*", i):
+            i = persona_data.find("*/", i) + 1
+            if i <= 0:
+                break
+        elif ch == "{":
+            if depth == 0:
+                obj_start = i
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0 and obj_start is not None:
+                source = persona_data[obj_start:i + 1]
+                match = PERSONA_ID_RE.search(source)
+                if match:
+                    blocks.append({
+                        'id': match.group(1),
+                        'source': source,
+                        'hash': hashlib.sha256(source.encode('utf-8')).hexdigest()[:16],
+                    })
+                obj_start = None
+        elif ch == "]" and depth == 0:
+            break
+        i += 1
+    return blocks
 
-    prompt = f"""
+
+# MODEL_BRAIN 기획 프롬프트 (prompt_templates로 한 번만 컴파일)
+PLAN_PROMPT = register_template("plan_photos", """
     You are an expert photographer and creative director.
-    Based on the following TypeScript code containing persona data, create a specific image generation prompt for EACH persona (P001 to P030).
+    Based on the following TypeScript code containing persona data, create a specific image generation prompt for EACH persona ({ids}).
 
     Context (Personas Data):
     {persona_data}
@@ -76,112 +172,447 @@ def plan_photos(persona_data):
         }},
         ...
     ]
+    """)
+
+
+def build_plan_prompt(blocks):
+    return PLAN_PROMPT.render({
+        'ids': ", ".join(b['id'] for b in blocks),
+        'persona_data': "".join(b['source'] for b in blocks),
+    })
+
+
+async def plan_chunk(blocks, semaphore, tracer, on_plan=None):
+    """페르소나 묶음 하나를 스트리밍으로 기획. 실패해도 다른 묶음에는 영향 없음.
+
+    응답 JSON 배열에서 페르소나 객체가 하나 완성될 때마다 on_plan(plan)을 바로 호출하므로
+    (촬영 대기열에 넣기) 나머지 기획을 기다리지 않고 촬영이 시작된다.
+    응답이 중간에 잘리거나 깨져도 그 전까지 완성된 기획은 유지된다.
     """
+    ids = [b['id'] for b in blocks]
+    label = f"{ids[0]}~{ids[-1]}" if len(ids) > 1 else ids[0]
+    span = tracer.span(label, kind='plan')
+    hashes = {b['id']: b['hash'] for b in blocks}
+    planned = {}
+    parser = None
 
-    max_retries = 3
-    for attempt in range(max_retries):
+    def on_retry(attempt, e, delay):
+        span.add('backoff', delay)
+        print(f"⚠️ 기획 단계 에러 [{label}] (시도 {attempt}/{PLAN_RETRY.max_attempts}): {e}")
+        print(f"   -> ⏳ {delay:.0f}초 대기 후 재시도합니다...")
+
+    async def accept(plan):
+        # 요청하지 않은 ID와 이미 받은 ID는 버리고, 소스 해시를 기록
+        if not isinstance(plan, dict) or plan.get('id') not in hashes or plan['id'] in planned:
+            return
+        plan['source_hash'] = hashes[plan['id']]
+        planned[plan['id']] = plan
+        if on_plan is not None:
+            queued = time.perf_counter()
+            await on_plan(plan)
+            span.add('queue', time.perf_counter() - queued)
+
+    async def attempt():
+        nonlocal parser
+        from google.genai import types
+        # 재시도 때는 아직 받지 못한 페르소나만 다시 요청
+        remaining = [b for b in blocks if b['id'] not in planned]
+        with span.phase('prompt'):
+            contents = build_plan_prompt(remaining)
+        parser = ArrayItemParser()
+        started = time.perf_counter()
+        local = span.phases.get('decode', 0.0) + span.phases.get('queue', 0.0)
         try:
-            response = client.models.generate_content(
+            stream = await get_client().aio.models.generate_content_stream(
                 model=MODEL_BRAIN,
-                contents=prompt,
+                contents=contents,
                 config=types.GenerateContentConfig(
                     response_mime_type="application/json"
                 )
             )
-            
-            # 응답 텍스트에서 JSON 부분만 추출
-            text = response.text.strip()
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-                
-            personas_plan = json.loads(text)
-            print(f"✅ 총 {len(personas_plan)}명의 촬영 계획이 수립되었습니다.")
-            
-            # 프롬프트 저장
-            if not os.path.exists(SAVE_DIR):
-                os.makedirs(SAVE_DIR)
-            with open(prompts_file, "w", encoding="utf-8") as f:
-                json.dump(personas_plan, f, indent=2, ensure_ascii=False)
-                
-            return personas_plan
-
+            async for chunk in stream:
+                text = chunk.text or ""
+                span.bytes += len(text.encode('utf-8'))
+                with span.phase('decode'):
+                    plans = parser.feed(text)
+                for plan in plans:
+                    await accept(plan)
         except Exception as e:
-            print(f"⚠️ 기획 단계 에러 (시도 {attempt+1}/{max_retries}): {e}")
-            if "429" in str(e):
-                wait_time = (attempt + 1) * 10
-                print(f"   -> ⏳ 쿼터 초과. {wait_time}초 대기 후 재시도합니다...")
-                time.sleep(wait_time)
-            else:
-                break
-    
-    print("❌ 최종 실패: 기획 단계를 완료하지 못했습니다.")
-    return []
+            span.attempt(e)
+            raise
+        finally:
+            # 네트워크 시간 = 전체 - 파싱 - 촬영 대기열 대기
+            local = span.phases.get('decode', 0.0) + span.phases.get('queue', 0.0) - local
+            span.add('http', time.perf_counter() - started - local)
+        span.attempt()
+
+    try:
+        queued = time.perf_counter()
+        async with semaphore:
+            span.add('queue', time.perf_counter() - queued)
+            await PLAN_RETRY.call_async(attempt, on_retry=on_retry)
+    except Exception as e:
+        span.finish('failed', str(e))
+        print(f"⚠️ 기획 단계 에러 [{label}]: {e}" +
+              (f" ({len(planned)}명은 기획 유지)" if planned else ""))
+        return list(planned.values())
+
+    if parser.errors or parser.pending or not parser.closed:
+        print(f"   ⚠️ [{label}] 응답 일부가 잘리거나 깨짐 - 완성된 {len(planned)}명만 사용")
+    span.finish('ok' if len(planned) == len(blocks) else 'failed',
+                None if len(planned) == len(blocks) else f"{len(blocks) - len(planned)} personas missing")
+    print(f"   ✅ [{label}] {len(planned)}/{len(blocks)}명 기획 완료")
+    return list(planned.values())
+
+
+async def plan_stale_personas(stale, tracer, on_plan=None):
+    semaphore = asyncio.Semaphore(PLAN_MAX_IN_FLIGHT)
+    chunks = [stale[i:i + PLAN_CHUNK_SIZE] for i in range(0, len(stale), PLAN_CHUNK_SIZE)]
+    results = await asyncio.gather(*(plan_chunk(chunk, semaphore, tracer, on_plan) for chunk in chunks))
+    return [plan for chunk_plans in results for plan in chunk_plans]
+
+
+def load_existing_plans(prompts_file):
+    if not os.path.exists(prompts_file):
+        return {}
+    print(f"📂 기존 프롬프트 파일 발견: {prompts_file}")
+    try:
+        with open(prompts_file, "r", encoding="utf-8") as f:
+            return {p['id']: p for p in json.load(f) if isinstance(p, dict) and 'id' in p}
+    except Exception as e:
+        print(f"⚠️ 기존 파일 읽기 실패, 새로 기획합니다: {e}")
+        return {}
+
+
+def save_plans(prompts_file, plans):
+    if not os.path.exists(SAVE_DIR):
+        os.makedirs(SAVE_DIR)
+    tmp_file = prompts_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(plans, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, prompts_file)
+
+
+def find_stale_blocks(blocks, existing):
+    """새로 추가되었거나 내용이 바뀐(다시 기획할) 페르소나 블록"""
+    # 소스 해시가 없는 예전 prompts.json 항목은 현재 소스 기준으로 채택
+    for b in blocks:
+        plan = existing.get(b['id'])
+        if plan is not None and 'source_hash' not in plan:
+            plan['source_hash'] = b['hash']
+    return [b for b in blocks if existing.get(b['id'], {}).get('source_hash') != b['hash']]
+
+
+def merge_plans(blocks, existing):
+    """personas.ts 순서대로 병합 (삭제된 페르소나는 제외)"""
+    personas_plan = [existing[b['id']] for b in blocks if b['id'] in existing]
+    missing = len(blocks) - len(personas_plan)
+    print(f"✅ 총 {len(personas_plan)}명의 촬영 계획이 수립되었습니다." +
+          (f" (⚠️ {missing}명 기획 실패)" if missing else ""))
+    return personas_plan
+
 
 # ==========================================
 # 3. 사진 촬영 (Imagen 4)
 # ==========================================
-def shoot_photos(personas_plan):
+# 촬영 설정 (매니페스트의 프롬프트 해시에 포함)
+SHOOT_CONFIG = {"number_of_images": 1, "aspect_ratio": "3:4", "person_generation": "allow_adult"}
+
+
+def shot_hash(p):
+    return prompt_hash(p.get('image_prompt') or "", SHOOT_CONFIG)
+
+
+async def shoot_one(p, progress, concurrency, limiter, budget, manifest, genai_client, variants, tracer):
+    pid = p.get('id')
+    name = p.get('name')
+    prompt = p.get('image_prompt')
+    
+    filename = f"{pid}.png"
+    filepath = os.path.join(SAVE_DIR, filename)
+    span = tracer.span(pid)
+
+    async def attempt():
+        from google.genai import types
+        # 동시 촬영 수 제한 + 분당 요청 수 페이싱 (고정 쿨타임 대신)
+        queued = time.perf_counter()
+        async with concurrency:
+            await limiter.acquire()
+            span.add('queue', time.perf_counter() - queued)
+            print(f"   📸 촬영 시도: {pid} {name}...")
+            try:
+                with span.phase('http'):
+                    response = await genai_client.aio.models.generate_images(
+                        model=MODEL_PAINTER,
+                        prompt=prompt,
+                        config=types.GenerateImagesConfig(**SHOOT_CONFIG)
+                    )
+            except Exception as e:
+                span.attempt(e)
+                if is_throttled(e):
+                    concurrency.on_throttle()
+                raise
+            span.attempt()
+            return response
+
+    def on_retry(attempt_no, e, delay):
+        span.add('backoff', delay)
+        print(f"   -> ⏳ {pid} 재시도 {attempt_no}/{SHOOT_RETRY.max_attempts - 1} ({delay:.0f}초 후): {e}")
+
+    try:
+        # 1. Imagen 시도
+        image_response = await SHOOT_RETRY.call_async(attempt, budget=budget, on_retry=on_retry)
+        concurrency.on_success()
+
+        # 완료되는 즉시 저장
+        for img in image_response.generated_images:
+            span.bytes += len(img.image.image_bytes)
+            with span.phase('write'):
+                await asyncio.to_thread(write_image, filepath, img.image.image_bytes)
+            manifest.record(filename, shot_hash(p), MODEL_PAINTER)
+        span.finish('ok')
+        if variants is not None:
+            variants.submit(filepath)
+        progress['done'] += 1
+        print(f"[{progress['done']}/{progress['total']}] ✨ 생성 성공 (High Quality): {pid} {name} -> {filepath}")
+
+    except Exception as e:
+        # 2. 실패 시 Fallback (Pravatar)
+        # print(f"   -> ⚠️ 생성 실패 (과금/권한 문제): {e}")
+        span.finish('failed', str(e))
+        progress['done'] += 1
+        print(f"[{progress['done']}/{progress['total']}] 🔄 {pid} {name}: 대체 이미지 다운로드 중 (Pravatar)...")
+        # 대체 이미지는 다음 실행 때 다시 촬영하도록 매니페스트에서 제외
+        manifest.discard(filename)
+        try:
+            # 성별에 따라 다른 이미지 소스 사용 가능하지만, pravatar는 랜덤
+            # u={pid}를 사용하여 고정된 랜덤 이미지 확보
+            url = f"https://i.pravatar.cc/500?u={pid}"
+            # 대체 이미지는 웹용 변환을 만들지 않음 (카드 사진이 랜덤 얼굴로 바뀌지 않도록)
+            await asyncio.to_thread(urllib.request.urlretrieve, url, filepath)
+            print(f"   -> 💾 대체 이미지 저장 완료: {filepath}")
+        except Exception as e2:
+            print(f"   -> ❌ {pid} 다운로드 실패: {e2}")
+
+
+def write_image(filepath, image_bytes):
+    with open(filepath, "wb") as f:
+        f.write(image_bytes)
+
+
+async def shoot_from_queue(queue, progress, manifest, max_in_flight, genai_client, variants, tracer):
+    """대기열에서 기획을 하나씩 꺼내 촬영. 작업자마다 None을 하나씩 받으면 종료."""
+    # 429 발생 시 동시 촬영 수를 줄이고, 성공하면 다시 늘림 (AIMD)
+    concurrency = AdaptiveConcurrency(initial=max_in_flight, maximum=max_in_flight)
+    limiter = RateLimiter(SHOOT_RPM)
+    # 배치 전체 재시도 횟수 상한 (기획이 도착할수록 늘어남)
+    budget = RetryBudget.for_requests(progress['total'])
+
+    async def worker():
+        while (p := await queue.get()) is not None:
+            budget.scale_to(progress['total'])
+            await shoot_one(p, progress, concurrency, limiter, budget, manifest, genai_client, variants, tracer)
+
+    await asyncio.gather(*(worker() for _ in range(max_in_flight)))
+
+
+async def shoot_photos_async(personas_plan, manifest, max_in_flight, genai_client, variants=None, tracer=None):
+    queue = asyncio.Queue()
+    for p in [*personas_plan, *[None] * max_in_flight]:
+        queue.put_nowait(p)
+    progress = {'done': 0, 'total': len(personas_plan)}
+    await shoot_from_queue(queue, progress, manifest, max_in_flight, genai_client, variants,
+                           tracer or Tracer("profilecard_shoot"))
+
+
+def shoot_photos(personas_plan, max_in_flight=SHOOT_MAX_IN_FLIGHT, genai_client=None, web_variants=WEB_VARIANTS):
+    """
+    genai_client: client.aio.models.generate_images를 가진 객체 (기본: get_client(), 벤치마크용 주입 가능)
+    web_variants: 촬영 직후 만들 웹용 변환 이름들 (빈 값이면 변환 안 함)
+    """
     print(f"🚀 2단계: {MODEL_PAINTER} (Imagen 4)가 고화질 촬영을 시작합니다...")
+    print(f"   ⚡ 동시 촬영 최대 {max_in_flight}장, 분당 {SHOOT_RPM}회")
 
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
 
-    for i, p in enumerate(personas_plan):
-        pid = p.get('id')
-        name = p.get('name')
-        prompt = p.get('image_prompt')
-        
-        filename = f"{pid}.png"
-        filepath = os.path.join(SAVE_DIR, filename)
+    # 같은 프롬프트·모델로 이미 촬영된 사진은 네트워크 호출 없이 건너뜀
+    manifest = OutputManifest(SAVE_DIR)
+    pending = [p for p in personas_plan
+               if not manifest.is_fresh(f"{p.get('id')}.png", shot_hash(p), MODEL_PAINTER)]
+    if len(pending) < len(personas_plan):
+        print(f"   ⏭️ {len(personas_plan) - len(pending)}장 최신 상태 - 건너뜀")
 
-        print(f"[{i+1}/{len(personas_plan)}] 📸 촬영 시도: {pid} {name}...")
+    variants = VariantPool(WEB_VARIANTS_DIR, web_variants) if web_variants else None
+    tracer = Tracer("profilecard_shoot", METRICS_DIR)
+    try:
+        if variants is not None:
+            # 최신 상태인 사진도 웹용 변환이 없거나 오래되었으면 다시 만듦
+            for p in personas_plan:
+                filepath = os.path.join(SAVE_DIR, f"{p.get('id')}.png")
+                if p not in pending and os.path.exists(filepath):
+                    variants.submit(filepath)
+        if pending:
+            asyncio.run(shoot_photos_async(pending, manifest, max_in_flight, genai_client or get_client(),
+                                           variants, tracer))
+    finally:
+        manifest.save()
+        tracer.close()
+        report = tracer.report()
+        if report:
+            print(report)
+        if variants is not None:
+            variants.close()
+            print(f"   {variants.summary()}")
 
-        try:
-            # 1. Imagen 시도
-            image_response = client.models.generate_images(
-                model=MODEL_PAINTER,
-                prompt=prompt,
-                config=types.GenerateImagesConfig(
-                    number_of_images=1,
-                    aspect_ratio="3:4",
-                    person_generation="allow_adult",
-                )
-            )
 
-            for img in image_response.generated_images:
-                with open(filepath, "wb") as f:
-                    f.write(img.image.image_bytes)
-                print(f"   -> ✨ 생성 성공 (High Quality): {filepath}")
+# ==========================================
+# 4. 기획 → 촬영 파이프라인
+# ==========================================
+def plan_and_shoot(persona_data, max_in_flight=SHOOT_MAX_IN_FLIGHT, genai_client=None, web_variants=WEB_VARIANTS):
+    """기획과 촬영을 겹쳐서 실행.
 
-        except Exception as e:
-            # 2. 실패 시 Fallback (Pravatar)
-            # print(f"   -> ⚠️ 생성 실패 (과금/권한 문제): {e}")
-            print(f"   -> 🔄 대체 이미지 다운로드 중 (Pravatar)...")
+    기획 응답을 스트리밍으로 받아 페르소나 하나의 기획이 완성되는 즉시 촬영 대기열(SHOOT_QUEUE_SIZE)에 넣는다.
+    이미 최신 기획이 있는 페르소나는 기획을 기다리지 않고 바로 촬영한다.
+    반환: personas.ts 순서의 촬영 계획 (prompts.json에도 저장)
+    """
+    prompts_file = os.path.join(SAVE_DIR, "prompts.json")
+    existing = load_existing_plans(prompts_file)
+    blocks = split_persona_blocks(persona_data)
+    if not blocks:
+        print("❌ personas.ts에서 페르소나 블록을 찾지 못했습니다.")
+        return list(existing.values())
+    stale = find_stale_blocks(blocks, existing)
+    stale_ids = {b['id'] for b in stale}
+    ready = [existing[b['id']] for b in blocks if b['id'] in existing and b['id'] not in stale_ids]
+
+    if not os.path.exists(SAVE_DIR):
+        os.makedirs(SAVE_DIR)
+    manifest = OutputManifest(SAVE_DIR)
+    variants = VariantPool(WEB_VARIANTS_DIR, web_variants) if web_variants else None
+    plan_tracer = Tracer("profilecard_plan", METRICS_DIR)
+    shoot_tracer = Tracer("profilecard_shoot", METRICS_DIR)
+    progress = {'done': 0, 'total': 0, 'fresh': 0}
+
+    async def run():
+        queue = asyncio.Queue(SHOOT_QUEUE_SIZE)
+
+        async def enqueue(p):
+            # 같은 프롬프트·모델로 이미 촬영된 사진은 건너뜀 (웹용 변환만 확인)
+            filepath = os.path.join(SAVE_DIR, f"{p.get('id')}.png")
+            if manifest.is_fresh(f"{p.get('id')}.png", shot_hash(p), MODEL_PAINTER):
+                progress['fresh'] += 1
+                if variants is not None and os.path.exists(filepath):
+                    variants.submit(filepath)
+                return
+            progress['total'] += 1
+            await queue.put(p)
+
+        async def on_plan(plan):
+            existing[plan['id']] = plan
+            await enqueue(plan)
+
+        async def enqueue_ready():
+            for p in ready:
+                await enqueue(p)
+
+        async def produce():
+            # 최신 기획 촬영과 변경분 기획을 동시에 진행, 둘 다 끝난 뒤에 종료 신호
             try:
-                # 성별에 따라 다른 이미지 소스 사용 가능하지만, pravatar는 랜덤
-                # u={pid}를 사용하여 고정된 랜덤 이미지 확보
-                url = f"https://i.pravatar.cc/500?u={pid}"
-                urllib.request.urlretrieve(url, filepath)
-                print(f"   -> 💾 대체 이미지 저장 완료: {filepath}")
-            except Exception as e2:
-                print(f"   -> ❌ 다운로드 실패: {e2}")
+                results = await asyncio.gather(
+                    enqueue_ready(),
+                    *([plan_stale_personas(stale, plan_tracer, on_plan)] if stale else []),
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+            finally:
+                for _ in range(max_in_flight):
+                    await queue.put(None)
+
+        if stale:
+            print(f"🚀 1단계: {MODEL_BRAIN}이(가) 변경된 {len(stale)}/{len(blocks)}명의 사진 컨셉을 기획합니다...")
+        else:
+            print(f"✅ {len(blocks)}명 모두 최신 기획 상태입니다.")
+        print(f"🚀 2단계: {MODEL_PAINTER} (Imagen 4)가 기획이 끝나는 대로 촬영합니다...")
+        print(f"   ⚡ 동시 촬영 최대 {max_in_flight}장, 분당 {SHOOT_RPM}회, 대기열 {SHOOT_QUEUE_SIZE}명")
+        await asyncio.gather(
+            produce(),
+            shoot_from_queue(queue, progress, manifest, max_in_flight, genai_client or get_client(),
+                             variants, shoot_tracer)
+        )
+
+    try:
+        asyncio.run(run())
+    finally:
+        # 중간에 실패해도 그때까지 완성된 기획과 촬영 기록은 저장
+        personas_plan = merge_plans(blocks, existing)
+        save_plans(prompts_file, personas_plan)
+        manifest.save()
+        for tracer, kind in ((plan_tracer, 'plan'), (shoot_tracer, 'image')):
+            tracer.close()
+            report = tracer.report(kind)
+            if report:
+                print(report)
+        if progress['fresh']:
+            print(f"   ⏭️ {progress['fresh']}장 최신 상태 - 건너뜀")
+        if variants is not None:
+            variants.close()
+            print(f"   {variants.summary()}")
+    return personas_plan
+
 
-        # API 쿨타임
-        time.sleep(1)
+# ==========================================
+# 5. 카드 사진 반영
+# ==========================================
+def publish_cards(personas_plan):
+    """실제로 촬영된(매니페스트상 최신) 사진의 카드 변환만 앱이 로드하는 <id>.jpg로 복사.
+
+    대체(Pravatar) 이미지는 매니페스트에서 빠져 있으므로 반영되지 않는다.
+    반환: 새로 반영한 페르소나 id 목록
+    """
+    manifest = OutputManifest(SAVE_DIR)
+    published = []
+    for p in personas_plan:
+        pid = p.get('id')
+        card = os.path.join(WEB_VARIANTS_DIR, f"{pid}.jpg")
+        if not manifest.is_fresh(f"{pid}.png", shot_hash(p), MODEL_PAINTER) or not os.path.exists(card):
+            continue
+        target = os.path.join(SAVE_DIR, f"{pid}.jpg")
+        with open(card, 'rb') as f:
+            data = f.read()
+        if os.path.exists(target):
+            with open(target, 'rb') as f:
+                if f.read() == data:
+                    continue
+        shutil.copyfile(card, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+        published.append(pid)
+    skipped = len(personas_plan) - len(published)
+    print(f"📤 카드 사진 {len(published)}장 반영 ({skipped}장은 변경 없음/미촬영/대체 이미지)")
+    return published
 
 
 # ==========================================
 # 메인 실행
 # ==========================================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan and shoot persona photos with Gemini")
+    parser.add_argument("--publish", action="store_true",
+                        help="Copy card variants of successfully generated photos to public/images/personas/<id>.jpg")
+    args = parser.parse_args()
+
     # 1. 파일 읽기
     data = read_personas_file()
     if data:
-        # 2. 기획
-        plan = plan_photos(data)
+        # 2. 기획 + 3. 촬영 (기획이 완성되는 페르소나부터 바로 촬영)
+        plan = plan_and_shoot(data)
+        if plan and args.publish:
+            # 5. 실제 촬영된 카드 사진만 반영하고, 반영된 사진이 있을 때만 아틀라스 갱신
+            #    (대체 이미지는 반영되지 않으므로 아틀라스 소스가 되지 않음)
+            if publish_cards(plan):
+                from build_persona_atlas import build_atlas
+                build_atlas(SAVE_DIR)
         if plan:
-            # 3. 촬영
-            shoot_photos(plan)
             print("\n🎉 모든 작업이 완료되었습니다! public/images/personas 폴더를 확인하세요.")
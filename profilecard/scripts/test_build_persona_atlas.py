@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+import build_persona_atlas
+from build_persona_atlas import SLOT_SIZE, build_atlas, check_atlas, cover_boxes, layout, sheet_grid
+
+# scale 5 → 800x1040 칸, 2048px 안에 2x1 격자: 사진 5장이면 아틀라스 3장
+SCALE = 5
+
+
+def test_sheet_grid_fits_max_side():
+    cell = (SLOT_SIZE[0] * 3, SLOT_SIZE[1] * 3)
+    assert sheet_grid(30, cell) == (4, 3)
+    # 사진이 적으면 빈 열 없이
+    assert sheet_grid(1, cell) == (1, 1)
+    assert sheet_grid(5, cell) == (3, 2)
+    # 칸이 한도보다 커도 최소 1x1
+    assert sheet_grid(3, (4000, 5000)) == (1, 1)
+    cols, rows = sheet_grid(100, (160, 208), max_side=2048)
+    assert cols * 160 <= 2048 and rows * 208 <= 2048
+
+
+def test_layout_is_row_major_across_sheets():
+    sheet, xs, ys = layout(5, 2, 2, (10, 20))
+    assert sheet.tolist() == [0, 0, 0, 0, 1]
+    assert xs.tolist() == [0, 10, 0, 10, 0]
+    assert ys.tolist() == [0, 0, 20, 20, 0]
+
+
+def test_cover_boxes_crop_the_center():
+    boxes = cover_boxes([(1000, 1300), (2000, 1300), (800, 2000)], (100, 130))
+    assert np.allclose(boxes[0], [0, 0, 1000, 1300])
+    assert np.allclose(boxes[1], [500, 0, 1500, 1300])
+    assert np.allclose(boxes[2], [0, 480, 800, 1520])
+
+
+def write_photo(source_dir, pid, color):
+    Image.new("RGB", (200, 260), color).save(os.path.join(source_dir, f"{pid}.jpg"))
+
+
+def atlas_files(source_dir):
+    return sorted(name for name in os.listdir(source_dir) if name.startswith("atlas-"))
+
+
+def test_only_changed_sheet_is_rebuilt(tmp_path):
+    source_dir = str(tmp_path)
+    manifest_path = str(tmp_path / "personaAtlas.json")
+    for n in range(1, 6):
+        write_photo(source_dir, f"P00{n}", (n * 40, 0, 0))
+    manifest = build_atlas(source_dir, manifest_path, scale=SCALE)
+    before = [sheet["file"] for sheet in manifest["sheets"]]
+    assert [sheet["ids"] for sheet in manifest["sheets"]] == [["P001", "P002"], ["P003", "P004"], ["P005"]]
+    assert atlas_files(source_dir) == sorted(before)
+    sprite = manifest["sprites"]["P004"]
+    assert (sprite["sheet"], sprite["x"], sprite["y"]) == (1, 800, 0)
+    assert check_atlas(source_dir, manifest_path) == []
+
+    # 사진 하나가 바뀌면 그 사진이 든 아틀라스만 새 파일로, 이전 파일은 삭제
+    write_photo(source_dir, "P003", (0, 0, 255))
+    assert check_atlas(source_dir, manifest_path) == ["P003: 사진이 바뀜"]
+    mtimes = {name: os.stat(os.path.join(source_dir, name)).st_mtime_ns for name in before}
+    after = [sheet["file"] for sheet in build_atlas(source_dir, manifest_path, scale=SCALE)["sheets"]]
+    assert after[0] == before[0] and after[2] == before[2]
+    assert after[1] != before[1]
+    assert atlas_files(source_dir) == sorted(after)
+    assert all(os.stat(os.path.join(source_dir, after[n])).st_mtime_ns == mtimes[before[n]] for n in (0, 2))
+    assert check_atlas(source_dir, manifest_path) == []
+
+    # 사진이 빠져 더 이상 쓰이지 않는 아틀라스는 정리
+    os.remove(os.path.join(source_dir, "P005.jpg"))
+    assert check_atlas(source_dir, manifest_path) == ["P005: 사진이 삭제됨"]
+    manifest = build_atlas(source_dir, manifest_path, scale=SCALE)
+    assert [sheet["file"] for sheet in manifest["sheets"]] == after[:2]
+    assert atlas_files(source_dir) == sorted(after[:2])
+
+
+def test_committed_atlas_matches_photos():
+    # 커밋된 아틀라스/매니페스트가 카드 사진과 어긋나면 npm run atlas 로 다시 생성
+    assert check_atlas(build_persona_atlas.SOURCE_DIR, build_persona_atlas.MANIFEST_PATH) == []
@@ -0,0 +1,86 @@
+import os
+
+import generate_persona_photos
+from generate_persona_photos import find_stale_blocks, merge_plans, split_persona_blocks
+
+PERSONAS_TS = """
+import type { Persona } from './types';
+
+// 예전 배열: { id: 'P999' } 는 무시되어야 함
+export const PERSONAS_V3: Persona[] = [
+  {
+    id: 'P001',
+    name: "김 {중괄호}",
+    bio: `템플릿 } 문자열 ${'{'}`,
+    quote: 'It\\'s } fine',
+    // 주석 속 } 닫는 괄호
+    traits: { calm: true, nested: { deep: [1, 2] } },
+  },
+  /* 블록 주석 { 안의 } 괄호 */
+  {
+    id: "P002",
+    name: '이 ]배열[',
+  },
+  { name: 'id 없음' },
+];
+
+export const OTHER = [{ id: 'P003' }];
+"""
+
+
+def test_split_skips_braces_in_strings_and_comments():
+    blocks = split_persona_blocks(PERSONAS_TS)
+    assert [b['id'] for b in blocks] == ['P001', 'P002']
+    first = blocks[0]['source']
+    assert first.startswith("{\n    id: 'P001'")
+    assert first.endswith("deep: [1, 2] } },\n  }")
+    assert blocks[1]['source'] == "{\n    id: \"P002\",\n    name: '이 ]배열[',\n  }"
+    assert all(len(b['hash']) == 16 for b in blocks)
+
+
+def test_split_without_personas_array():
+    assert split_persona_blocks("export const OTHER = [{ id: 'P001' }];") == []
+
+
+def edited(source, old, new):
+    assert old in source
+    return source.replace(old, new)
+
+
+def test_only_edited_block_is_replanned():
+    blocks = split_persona_blocks(PERSONAS_TS)
+    existing = {b['id']: {'id': b['id'], 'image_prompt': b['id'], 'source_hash': b['hash']} for b in blocks}
+    assert find_stale_blocks(blocks, existing) == []
+
+    changed = split_persona_blocks(edited(PERSONAS_TS, "calm: true", "calm: false"))
+    assert changed[1]['hash'] == blocks[1]['hash']
+    assert [b['id'] for b in find_stale_blocks(changed, existing)] == ['P001']
+
+    # 새로 추가된 페르소나도 기획 대상
+    assert [b['id'] for b in find_stale_blocks(blocks, {'P001': existing['P001']})] == ['P002']
+
+
+def test_legacy_plans_are_adopted_for_current_source():
+    blocks = split_persona_blocks(PERSONAS_TS)
+    existing = {'P001': {'id': 'P001'}, 'P002': {'id': 'P002'}}
+    assert find_stale_blocks(blocks, existing) == []
+    assert existing['P001']['source_hash'] == blocks[0]['hash']
+
+
+def test_merge_keeps_file_order_and_reuses_untouched_plans():
+    blocks = split_persona_blocks(PERSONAS_TS)
+    untouched = {'id': 'P002', 'image_prompt': 'kept'}
+    existing = {'P002': untouched, 'P001': {'id': 'P001'}, 'P404': {'id': 'P404'}}
+    plans = merge_plans(blocks, existing)
+    # personas.ts 순서, 삭제된 페르소나(P404)는 제외, 기존 기획 객체를 그대로 재사용
+    assert [p['id'] for p in plans] == ['P001', 'P002']
+    assert plans[1] is untouched
+    assert [p['id'] for p in merge_plans(blocks, {'P002': untouched})] == ['P002']
+
+
+def test_output_paths_do_not_depend_on_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scripts = os.path.dirname(os.path.abspath(generate_persona_photos.__file__))
+    assert generate_persona_photos.METRICS_DIR == os.path.join(scripts, "metrics")
+    assert os.path.isfile(generate_persona_photos.PERSONAS_FILE_PATH)
+    assert generate_persona_photos.SAVE_DIR == os.path.normpath(os.path.join(scripts, "..", "public", "images", "personas"))
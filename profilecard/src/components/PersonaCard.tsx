@@ -1,5 +1,6 @@
 import React from 'react';
 import type { Persona } from '../data/personas';
+import { getPhotoSpriteStyle } from '../data/personaAtlas';
 
 interface PersonaCardProps {
     persona: Persona;
@@ -33,6 +34,9 @@ const PersonaCard: React.FC<PersonaCardProps> = ({ persona }) => {
     };
 
     const categoryStyle = getCategoryColor(persona.category);
+    // Photo from the shared sprite atlas (one download for every card), if it has this persona
+    const photoSprite = getPhotoSpriteStyle(persona.id);
+    const photoClassName = "w-full h-full object-cover rounded-2xl shadow-[0_8px_30px_rgb(0,0,0,0.12)] ring-1 ring-black/5 relative z-10 transition-all duration-500 ease-out group-hover:scale-[1.02] group-hover:shadow-[0_20px_40px_rgb(0,0,0,0.12)]";
 
     return (
         <div className="w-[210mm] h-[297mm] mx-auto p-6 relative overflow-hidden text-sm leading-normal print:break-after-page shadow-2xl mb-8 print:shadow-none print:mb-0 bg-gradient-to-br from-slate-50 to-gray-100">
@@ -47,15 +51,19 @@ const PersonaCard: React.FC<PersonaCardProps> = ({ persona }) => {
                         {/* Soft diffused shadow for depth */}
                         <div className="absolute inset-4 bg-gray-900/20 blur-xl rounded-2xl opacity-0 group-hover:opacity-30 transition-opacity duration-700"></div>
 
-                        <img
-                            src={`/images/personas/${persona.id}.jpg`}
-                            alt={persona.name}
-                            className="w-full h-full object-cover rounded-2xl shadow-[0_8px_30px_rgb(0,0,0,0.12)] ring-1 ring-black/5 relative z-10 transition-all duration-500 ease-out group-hover:scale-[1.02] group-hover:shadow-[0_20px_40px_rgb(0,0,0,0.12)]"
-                            onError={(e) => {
-                                // Fallback if image fails to load
-                                (e.target as HTMLImageElement).src = `https://i.pravatar.cc/400?u=${persona.id}`;
-                            }}
-                        />
+                        {photoSprite ? (
+                            <div role="img" aria-label={persona.name} className={photoClassName} style={photoSprite} />
+                        ) : (
+                            <img
+                                src={`/images/personas/${persona.id}.jpg`}
+                                alt={persona.name}
+                                className={photoClassName}
+                                onError={(e) => {
+                                    // Fallback if image fails to load
+                                    (e.target as HTMLImageElement).src = `https://i.pravatar.cc/400?u=${persona.id}`;
+                                }}
+                            />
+                        )}
                     </div>
 
                     {/* Basic Info Area */}
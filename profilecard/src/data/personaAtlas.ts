@@ -0,0 +1,38 @@
+/**
+ * 페르소나 사진 스프라이트 아틀라스
+ * - scripts/build_persona_atlas.py 가 생성한 personaAtlas.json 을 읽어
+ *   카드 사진 칸을 아틀라스 배경으로 그리는 스타일 계산
+ * - 아틀라스에 없는 페르소나는 null (개별 사진으로 대체)
+ */
+
+import type { CSSProperties } from 'react';
+import atlas from './personaAtlas.json';
+
+interface AtlasSprite {
+  sheet: number;
+  x: number;
+  y: number;
+}
+
+const SPRITES: Record<string, AtlasSprite | undefined> = atlas.sprites;
+
+// 칸 위치를 백분율로: 사진 칸 크기가 바뀌어도 같은 영역을 가리킴
+const percent = (offset: number, sheetSize: number, cellSize: number) =>
+  sheetSize === cellSize ? '0%' : `${(offset / (sheetSize - cellSize)) * 100}%`;
+
+export function getPhotoSpriteStyle(id: string): CSSProperties | null {
+  const sprite = SPRITES[id];
+  const sheet = sprite && atlas.sheets[sprite.sheet];
+  if (!sprite || !sheet) return null;
+
+  const { width, height } = atlas.cell;
+  return {
+    backgroundImage: `url(/images/personas/${sheet.file})`,
+    backgroundSize: `${(sheet.width / width) * 100}% ${(sheet.height / height) * 100}%`,
+    backgroundPosition: `${percent(sprite.x, sheet.width, width)} ${percent(sprite.y, sheet.height, height)}`,
+    backgroundRepeat: 'no-repeat',
+    // PDF 저장(인쇄) 시에도 배경 이미지 출력
+    printColorAdjust: 'exact',
+    WebkitPrintColorAdjust: 'exact',
+  };
+}
@@ -0,0 +1,224 @@
+"""
+Table-driven appearance inference for TS personas
+
+The rules behind GeminiPhotoGenerator.infer_appearance_from_ts as
+declarative threshold tables, evaluated with NumPy over a columnar view of
+many personas at once. Every rule resolves to an index into a small table of
+precomputed strings, so per-persona work is limited to extracting columns.
+infer_appearance() evaluates the same tables for a single persona without
+NumPy overhead.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Name endings treated as female (single characters)
+FEMALE_NAME_ENDINGS = frozenset({'진', '영', '희', '미', '선', '아', '연'})
+
+GENDERS = ('man', 'woman')
+
+# (max age inclusive, hair) per gender; the last entry has no upper bound
+HAIR_RULES = {
+    'man': (
+        (35, "short, modern professional style with slight texture"),
+        (40, "short, neatly styled with conservative professionalism"),
+        (None, "short, refined style with distinguished gray streaks"),
+    ),
+    'woman': (
+        (35, "shoulder-length modern professional styling"),
+        (40, "neat, sophisticated styling at shoulder length"),
+        (None, "elegant, mature styling reflecting leadership presence"),
+    ),
+}
+
+# Glasses score: base plus bonuses, glasses when the score exceeds the threshold
+GLASSES_BASE = 0.5
+GLASSES_THRESHOLD = 0.6
+GLASSES_IT_BONUS = 0.2
+GLASSES_TECH_BONUS = ((9, 0.3), (7, 0.2))  # (min techSavvy, bonus), first match wins
+GLASSES_AGE_BONUS = (40, 0.2)              # (min age, bonus)
+GLASSES = ("", "behind modern thin-framed glasses")
+
+ATTIRE = (
+    "Business professional attire with blazer",
+    "Navy blue or charcoal gray collared shirt, smart casual professional style",
+)
+
+# (min score, suffix) tiers, first match wins; None is the fallback
+EXPRESSION_BASE = "Professional"
+EXPRESSION_RULES = (
+    ('confidence', ((8, " and confident"), (6, " with balanced authority"), (None, " with humble approachability"))),
+    ('stress', ((8, ", showing determination under pressure"), (6, ", composed despite challenges"), (None, ""))),
+    ('patience', ((8, ", warm and approachable smile"), (6, ", pleasant professional demeanor"), (None, ""))),
+)
+
+PERSONALITY_DEFAULT = 5
+AGE_DEFAULT = 35
+
+
+@dataclass
+class PersonaColumns:
+    """Struct-of-arrays view of the persona fields the rules read"""
+
+    age: np.ndarray
+    tech_savvy: np.ndarray
+    stress: np.ndarray
+    confidence: np.ndarray
+    patience: np.ndarray
+    is_female: np.ndarray
+    is_it: np.ndarray       # category == 'IT' or 'IT' in department
+    is_dev: np.ndarray      # is_it or '개발' in department
+
+    @classmethod
+    def from_personas(cls, personas: Sequence[Dict]) -> 'PersonaColumns':
+        ages, tech, stress, confidence, patience = [], [], [], [], []
+        female, it, dev = [], [], []
+        for persona in personas:
+            personality = persona.get('personality', {})
+            department = persona.get('department', '')
+            is_it = persona.get('category', '') == 'IT' or 'IT' in department
+            ages.append(persona.get('age', AGE_DEFAULT))
+            tech.append(personality.get('techSavvy', PERSONALITY_DEFAULT))
+            stress.append(personality.get('stressLevel', PERSONALITY_DEFAULT))
+            confidence.append(personality.get('confidenceLevel', PERSONALITY_DEFAULT))
+            patience.append(personality.get('patience', PERSONALITY_DEFAULT))
+            female.append(persona.get('name', '')[-1:] in FEMALE_NAME_ENDINGS)
+            it.append(is_it)
+            dev.append(is_it or '개발' in department)
+        return cls(
+            age=np.asarray(ages, dtype=np.float64),
+            tech_savvy=np.asarray(tech, dtype=np.float64),
+            stress=np.asarray(stress, dtype=np.float64),
+            confidence=np.asarray(confidence, dtype=np.float64),
+            patience=np.asarray(patience, dtype=np.float64),
+            is_female=np.asarray(female, dtype=bool),
+            is_it=np.asarray(it, dtype=bool),
+            is_dev=np.asarray(dev, dtype=bool),
+        )
+
+
+def _tier_index(values: np.ndarray, tiers: Tuple, descending: bool) -> np.ndarray:
+    """Index of the first matching (bound, value) tier for each element"""
+    conditions = [values >= bound if descending else values <= bound
+                  for bound, _ in tiers if bound is not None]
+    return np.select(conditions, np.arange(len(conditions)), default=len(tiers) - 1)
+
+
+def _build_expressions() -> Tuple[str, ...]:
+    """Every combination of expression tiers, flattened in row-major order"""
+    combos = [EXPRESSION_BASE]
+    for _, tiers in EXPRESSION_RULES:
+        combos = [prefix + suffix for prefix in combos for _, suffix in tiers]
+    return tuple(combos)
+
+
+_EXPRESSIONS = np.array(_build_expressions(), dtype=object)
+_HAIR = np.array([hair for gender in GENDERS for _, hair in HAIR_RULES[gender]], dtype=object)
+_GENDERS = np.array(GENDERS, dtype=object)
+_GLASSES = np.array(GLASSES, dtype=object)
+_ATTIRE = np.array(ATTIRE, dtype=object)
+
+
+def infer_appearance_columns(columns: PersonaColumns) -> Dict[str, np.ndarray]:
+    """
+    Evaluate all appearance rules in bulk
+
+    Args:
+        columns: Columnar persona view
+
+    Returns:
+        Dict of object arrays keyed like infer_appearance_from_ts' result
+    """
+    gender_idx = columns.is_female.astype(np.intp)
+
+    # Hair: same age tiers for both genders, offset into the flattened table
+    tiers_per_gender = len(HAIR_RULES['man'])
+    hair_idx = gender_idx * tiers_per_gender + _tier_index(columns.age, HAIR_RULES['man'], descending=False)
+
+    # Glasses: bonuses are added in the same order as the original rules
+    score = np.full(columns.age.shape, GLASSES_BASE)
+    score += np.where(columns.is_it, GLASSES_IT_BONUS, 0.0)
+    tech_conditions = [columns.tech_savvy >= bound for bound, _ in GLASSES_TECH_BONUS]
+    score += np.select(tech_conditions, [bonus for _, bonus in GLASSES_TECH_BONUS], default=0.0)
+    score += np.where(columns.age >= GLASSES_AGE_BONUS[0], GLASSES_AGE_BONUS[1], 0.0)
+    glasses_idx = (score > GLASSES_THRESHOLD).astype(np.intp)
+
+    # Expression: mixed-radix index into every tier combination
+    expression_idx = np.zeros(columns.age.shape, dtype=np.intp)
+    for field, tiers in EXPRESSION_RULES:
+        expression_idx = expression_idx * len(tiers) + _tier_index(getattr(columns, field), tiers, descending=True)
+
+    return {
+        'gender': _GENDERS[gender_idx],
+        'hair': _HAIR[hair_idx],
+        'glasses': _GLASSES[glasses_idx],
+        'attire': _ATTIRE[columns.is_dev.astype(np.intp)],
+        'expression': _EXPRESSIONS[expression_idx],
+    }
+
+
+def _first_tier(value: float, tiers: Tuple, descending: bool) -> int:
+    for i, (bound, _) in enumerate(tiers):
+        if bound is None or (value >= bound if descending else value <= bound):
+            return i
+    return len(tiers) - 1
+
+
+def infer_appearance(persona: Dict) -> Dict:
+    """
+    Appearance dict for one persona, evaluating the same tables without NumPy
+
+    Args:
+        persona: TS persona dictionary
+
+    Returns:
+        Dict with gender, hair, glasses, attire, expression
+    """
+    personality = persona.get('personality', {})
+    department = persona.get('department', '')
+    age = persona.get('age', AGE_DEFAULT)
+    tech_savvy = personality.get('techSavvy', PERSONALITY_DEFAULT)
+    is_it = persona.get('category', '') == 'IT' or 'IT' in department
+    gender = GENDERS[persona.get('name', '')[-1:] in FEMALE_NAME_ENDINGS]
+
+    score = GLASSES_BASE
+    score += GLASSES_IT_BONUS if is_it else 0.0
+    score += next((bonus for bound, bonus in GLASSES_TECH_BONUS if tech_savvy >= bound), 0.0)
+    score += GLASSES_AGE_BONUS[1] if age >= GLASSES_AGE_BONUS[0] else 0.0
+
+    expression_idx = 0
+    values = {
+        'confidence': personality.get('confidenceLevel', PERSONALITY_DEFAULT),
+        'stress': personality.get('stressLevel', PERSONALITY_DEFAULT),
+        'patience': personality.get('patience', PERSONALITY_DEFAULT),
+    }
+    for field, tiers in EXPRESSION_RULES:
+        expression_idx = expression_idx * len(tiers) + _first_tier(values[field], tiers, descending=True)
+
+    hair_rules = HAIR_RULES[gender]
+    return {
+        'gender': gender,
+        'hair': hair_rules[_first_tier(age, hair_rules, descending=False)][1],
+        'glasses': GLASSES[score > GLASSES_THRESHOLD],
+        'attire': ATTIRE[is_it or '개발' in department],
+        'expression': _EXPRESSIONS[expression_idx],
+    }
+
+
+def infer_appearance_bulk(personas: Sequence[Dict]) -> List[Dict]:
+    """
+    Per-persona appearance dicts for many personas at once
+
+    Args:
+        personas: TS persona dictionaries
+
+    Returns:
+        One dict per persona (gender, hair, glasses, attire, expression)
+    """
+    if not personas:
+        return []
+    result = infer_appearance_columns(PersonaColumns.from_personas(personas))
+    keys = list(result)
+    return [dict(zip(keys, row)) for row in zip(*(result[key].tolist() for key in keys))]
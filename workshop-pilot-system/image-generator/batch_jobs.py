@@ -0,0 +1,229 @@
+"""
+Gemini Batch API jobs
+
+For non-interactive runs, every prompt can go to the Batch API as one job
+instead of one generateContent request each. The requests are written to a
+JSONL file, uploaded through the Files API, submitted with
+:batchGenerateContent and polled with backoff; results stream back line by
+line from the job's responses file. Submit/poll/results form the
+BatchBackend interface, so a local fake can stand in for the API
+(mock_gemini_server.py serves the same REST endpoints).
+
+Used by gemini_api.py (--batch-mode).
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import requests
+
+from retry_policy import RequestFailed, RetryPolicy, parse_retry_after
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com"
+
+SUCCEEDED = 'SUCCEEDED'
+TERMINAL_STATES = frozenset({SUCCEEDED, 'FAILED', 'CANCELLED', 'EXPIRED'})
+
+_ENDPOINT = re.compile(r'^(https?://[^/]+)/[^/]+/models/([^:/]+):')
+
+# (key, GenerateContentResponse dict or None, error message or None)
+BatchResult = Tuple[str, Optional[Dict], Optional[str]]
+
+
+@dataclass
+class BatchStatus:
+    """State of a batch job as reported by one poll"""
+
+    state: str                                  # PENDING, RUNNING or a TERMINAL_STATES value
+    stats: Dict = field(default_factory=dict)   # request counts reported by the service
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+    @property
+    def succeeded(self) -> bool:
+        return self.state == SUCCEEDED
+
+
+def normalize_state(state: Optional[str]) -> str:
+    """'BATCH_STATE_RUNNING' / 'JOB_STATE_RUNNING' -> 'RUNNING'"""
+    state = state or 'PENDING'
+    for prefix in ('BATCH_STATE_', 'JOB_STATE_'):
+        if state.startswith(prefix):
+            return state[len(prefix):]
+    return state
+
+
+def error_message(error: Dict) -> str:
+    """Readable message from a google.rpc.Status dict"""
+    return f"{error.get('code', 'error')}: {error.get('message', 'batch request failed')}"
+
+
+class BatchBackend(ABC):
+    """Submit/poll protocol of a batch image job"""
+
+    @abstractmethod
+    def submit(self, requests_file: Path, display_name: str) -> str:
+        """
+        Submit a JSONL file of {"key", "request"} lines as one job
+
+        Returns:
+            Job name to poll
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def poll(self, job: str) -> BatchStatus:
+        """Current state of `job`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def results(self, job: str) -> Iterator[BatchResult]:
+        """Per-request results of a finished job, in any order"""
+        raise NotImplementedError
+
+
+class GeminiBatchBackend(BatchBackend):
+    """BatchBackend over the Gemini REST API (Files API upload + batches)"""
+
+    def __init__(self, api_key: str, model: str, base_url: str = DEFAULT_BASE_URL,
+                 session: Optional[requests.Session] = None, timeout: float = 120,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """
+        Initialize backend
+
+        Args:
+            api_key: Gemini API key
+            model: Model id, e.g. 'gemini-3-pro-image-preview'
+            base_url: Scheme and host of the API (or of a local fake)
+            session: Session to reuse (default: a new one)
+            timeout: Seconds per HTTP call
+            retry_policy: Retries for 429/5xx on uploads, submits, polls and downloads
+        """
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._operations: Dict[str, Dict] = {}
+
+    @classmethod
+    def from_endpoint(cls, api_key: str, endpoint: str, **kwargs) -> 'GeminiBatchBackend':
+        """Backend for the model and host of a ...models/<model>:generateContent URL"""
+        match = _ENDPOINT.match(endpoint)
+        if match is None:
+            raise ValueError(f"Cannot derive batch API host and model from endpoint {endpoint}")
+        return cls(api_key, match.group(2), base_url=match.group(1), **kwargs)
+
+    def _check(self, response: requests.Response) -> requests.Response:
+        if response.status_code != 200:
+            raise RequestFailed(
+                f"Batch API error {response.status_code}: {response.text[:200]}",
+                status=response.status_code,
+                retry_after=parse_retry_after(response.headers.get('Retry-After'))
+            )
+        return response
+
+    def _call(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        headers = {'x-goog-api-key': self.api_key, **kwargs.pop('headers', {})}
+        return self.retry_policy.call(
+            lambda: self._check(self.session.request(method, url, headers=headers, **kwargs))
+        )
+
+    def upload(self, path: Path, display_name: str) -> str:
+        """Upload a JSONL file with the resumable Files API protocol; returns 'files/...'"""
+        size = path.stat().st_size
+        start = self._call('POST', f"{self.base_url}/upload/v1beta/files", headers={
+            'X-Goog-Upload-Protocol': 'resumable',
+            'X-Goog-Upload-Command': 'start',
+            'X-Goog-Upload-Header-Content-Length': str(size),
+            'X-Goog-Upload-Header-Content-Type': 'application/jsonl',
+        }, json={'file': {'display_name': display_name}})
+        upload_url = start.headers['X-Goog-Upload-URL']
+
+        # The body is streamed from disk; a retried upload reopens the file
+        def send() -> requests.Response:
+            with open(path, 'rb') as f:
+                return self._check(self.session.post(upload_url, data=f, timeout=self.timeout, headers={
+                    'Content-Length': str(size),
+                    'X-Goog-Upload-Offset': '0',
+                    'X-Goog-Upload-Command': 'upload, finalize',
+                }))
+        return self.retry_policy.call(send).json()['file']['name']
+
+    def submit(self, requests_file: Path, display_name: str) -> str:
+        file_name = self.upload(Path(requests_file), display_name)
+        # Retried like every other call; a response lost after the job was created
+        # can leave a duplicate job behind, which only costs quota
+        response = self._call(
+            'POST', f"{self.base_url}/v1beta/models/{self.model}:batchGenerateContent",
+            json={'batch': {'display_name': display_name, 'input_config': {'file_name': file_name}}}
+        )
+        return response.json()['name']
+
+    def poll(self, job: str) -> BatchStatus:
+        operation = self._call('GET', f"{self.base_url}/v1beta/{job}").json()
+        self._operations[job] = operation
+        metadata = operation.get('metadata', {})
+        state = normalize_state(metadata.get('state') or operation.get('state'))
+        if operation.get('done') and state not in TERMINAL_STATES:
+            state = 'FAILED' if operation.get('error') else SUCCEEDED
+        error = operation.get('error')
+        return BatchStatus(state=state, stats=metadata.get('batchStats', {}),
+                           error=error_message(error) if error else None)
+
+    def results(self, job: str) -> Iterator[BatchResult]:
+        operation = self._operations.get(job)
+        if operation is None or not operation.get('done'):
+            self.poll(job)
+            operation = self._operations[job]
+        output = operation.get('response', {})
+
+        inlined = output.get('inlinedResponses')
+        if inlined is not None:
+            if isinstance(inlined, dict):
+                inlined = inlined.get('inlinedResponses', [])
+            for item in inlined:
+                yield self._result(item)
+            return
+
+        responses_file = output.get('responsesFile')
+        if not responses_file:
+            raise RequestFailed(f"Batch job {job} finished without results")
+        # One response per line; images are decoded line by line, never the whole file
+        response = self._call('GET', f"{self.base_url}/download/v1beta/{responses_file}:download",
+                              params={'alt': 'media'}, stream=True)
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    yield self._result(json.loads(line))
+
+    @staticmethod
+    def _result(item: Dict) -> BatchResult:
+        key = item.get('key') or item.get('metadata', {}).get('key')
+        if item.get('error'):
+            return key, None, error_message(item['error'])
+        return key, item.get('response'), None
+
+
+def write_requests_file(path: Union[str, Path], entries: Iterator[Tuple[str, Dict]]) -> int:
+    """
+    Write (key, GenerateContentRequest) pairs as a batch input JSONL file
+
+    Returns:
+        Number of requests written
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for key, request in entries:
+            f.write(json.dumps({'key': key, 'request': request}, ensure_ascii=False) + '\n')
+            count += 1
+    return count
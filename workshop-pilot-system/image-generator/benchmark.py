@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the persona image pipelines
+
+Runs GeminiPhotoGenerator.generate_batch (and profilecard's shoot_photos,
+through an injected client) against mock_gemini_server.py and reports
+images/sec, p50/p95 request latency, peak RSS and retry counts. Each engine
+runs in a fresh child process so peak RSS is not polluted by the server or
+by the other engine.
+
+Usage:
+    python benchmark.py --images 30 --image-size 4K --latency-median 2 --error-429 0.1
+    python benchmark.py --engine both --rpm 120 --workers 8 --json bench.json
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+
+import aiohttp
+
+from mock_gemini_server import MockGeminiServer
+from retry_policy import RequestFailed, RetryPolicy, parse_retry_after
+
+PROFILECARD_SCRIPTS = Path(__file__).resolve().parents[2] / "profilecard" / "scripts"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[int(pct) - 1]
+
+
+def synthetic_personas(count: int) -> List[Dict]:
+    return [{'name': f"bench_{i:05d}", 'age': 30 + i % 20, 'gender': 'person'} for i in range(count)]
+
+
+def fast_retry_policy(args) -> RetryPolicy:
+    """Retry policy scaled to the mock latency so runs stay short"""
+    base = max(0.05, args.latency_median / 4)
+    return RetryPolicy(max_attempts=args.max_attempts, base_delay=base, max_delay=base * 8,
+                       max_retry_after=args.retry_after)
+
+
+def run_batch(args, endpoint: str) -> Dict:
+    """Drive GeminiPhotoGenerator.generate_batch against the mock server"""
+    from gemini_api import GeminiPhotoGenerator
+
+    latencies = []
+
+    class TimedGenerator(GeminiPhotoGenerator):
+        async def _post_image_async(self, *args, **kwargs):
+            start = time.perf_counter()
+            written = await super()._post_image_async(*args, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            return written
+
+    with tempfile.TemporaryDirectory(prefix="bench_batch_") as output_dir:
+        generator = TimedGenerator(
+            api_key="bench", output_dir=output_dir,
+            requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+            retry_policy=fast_retry_policy(args)
+        )
+        generator.endpoint = endpoint
+        generator.image_size = args.image_size
+        start = time.perf_counter()
+        with generator:
+            results = generator.generate_batch(synthetic_personas(args.images), max_workers=args.workers)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'ok': sum(1 for r in results.values() if r['success']),
+        'elapsed': elapsed,
+        'latencies': latencies,
+    }
+
+
+class MockImagenClient:
+    """Stand-in for genai.Client exposing aio.models.generate_images over the mock server"""
+
+    def __init__(self, endpoint: str, image_size: str, latencies: List[float]):
+        self.endpoint = endpoint
+        self.image_size = image_size
+        self.latencies = latencies
+        self.aio = SimpleNamespace(models=self)
+        self._session = None
+
+    async def generate_images(self, model, prompt, config):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(headers={"x-goog-api-key": "bench"})
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"imageConfig": {"aspectRatio": "3:4", "imageSize": self.image_size}},
+        }
+        start = time.perf_counter()
+        async with self._session.post(self.endpoint, json=payload) as response:
+            if response.status != 200:
+                raise RequestFailed(f"{response.status} {await response.text()}", status=response.status,
+                                    retry_after=parse_retry_after(response.headers.get('Retry-After')))
+            # google-genai buffers and decodes the whole response the same way
+            data = await response.json()
+        self.latencies.append(time.perf_counter() - start)
+        image_bytes = base64.b64decode(data['candidates'][0]['content']['parts'][0]['inlineData']['data'])
+        return SimpleNamespace(generated_images=[SimpleNamespace(image=SimpleNamespace(image_bytes=image_bytes))])
+
+
+def run_shoot(args, endpoint: str) -> Dict:
+    """Drive profilecard's shoot_photos with an injected mock client"""
+    sys.path.insert(0, str(PROFILECARD_SCRIPTS))
+    import generate_persona_photos as photos
+
+    latencies = []
+    client = MockImagenClient(endpoint, args.image_size, latencies)
+    plan = [{'id': f"B{i:05d}", 'name': p['name'], 'image_prompt': f"portrait {i}"}
+            for i, p in enumerate(synthetic_personas(args.images))]
+
+    with tempfile.TemporaryDirectory(prefix="bench_shoot_") as save_dir:
+        photos.SAVE_DIR = save_dir
+        photos.METRICS_DIR = None
+        photos.SHOOT_RPM = args.rpm
+        photos.SHOOT_RETRY = fast_retry_policy(args)
+        start = time.perf_counter()
+        # Mock payloads are random bytes, not decodable images
+        photos.shoot_photos(plan, max_in_flight=args.workers or photos.SHOOT_MAX_IN_FLIGHT, genai_client=client,
+                            web_variants=())
+        elapsed = time.perf_counter() - start
+        ok = len(photos.OutputManifest(save_dir).entries)
+
+    if client._session is not None:
+        asyncio.run(client._session.close())
+    return {'ok': ok, 'elapsed': elapsed, 'latencies': latencies}
+
+
+ENGINES = {
+    'batch': run_batch,
+    'shoot': run_shoot,
+}
+
+
+def _child(engine: str, args, endpoint: str, queue):
+    """Child process entry: run one engine and report its measurements"""
+    try:
+        out = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else out):
+            measured = ENGINES[engine](args, endpoint)
+        measured['peak_rss_mb'] = peak_rss_mb()
+        queue.put(measured)
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_engine(engine: str, args, server: MockGeminiServer) -> Dict:
+    for key in server.stats:
+        server.stats[key] = 0
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(engine, args, server.url, queue))
+    process.start()
+    measured = queue.get()
+    process.join()
+
+    if 'error' in measured:
+        return {'engine': engine, 'error': measured['error']}
+
+    latencies = measured['latencies']
+    return {
+        'engine': engine,
+        'images': args.images,
+        'ok': measured['ok'],
+        'elapsed_s': round(measured['elapsed'], 3),
+        'images_per_s': round(measured['ok'] / measured['elapsed'], 3) if measured['elapsed'] else 0.0,
+        'p50_s': round(percentile(latencies, 50), 3),
+        'p95_s': round(percentile(latencies, 95), 3),
+        'peak_rss_mb': round(measured['peak_rss_mb'], 1),
+        'requests': server.stats['requests'],
+        'retries': server.stats['429'] + server.stats['5xx'],
+        'throttled': server.stats['429'],
+    }
+
+
+def print_report(rows: List[Dict]):
+    header = f"{'engine':<8}{'ok':>8}{'wall s':>9}{'img/s':>8}{'p50 s':>8}{'p95 s':>8}{'RSS MB':>9}{'retries':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if 'error' in row:
+            print(f"{row['engine']:<8}  ✗ {row['error']}")
+            continue
+        print(f"{row['engine']:<8}{row['ok']:>4}/{row['images']:<3}{row['elapsed_s']:>9.2f}"
+              f"{row['images_per_s']:>8.2f}{row['p50_s']:>8.2f}{row['p95_s']:>8.2f}"
+              f"{row['peak_rss_mb']:>9.1f}{row['retries']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image pipelines against a mock Gemini server")
+    parser.add_argument('--engine', choices=['batch', 'shoot', 'both'], default='batch')
+    parser.add_argument('--images', type=int, default=30, help="Images per run (default: 30)")
+    parser.add_argument('--image-size', choices=['1K', '2K', '4K'], default='1K', help="Payload size class")
+    parser.add_argument('--latency-median', type=float, default=0.5, help="Mock median latency in seconds")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="Mock log-normal latency sigma")
+    parser.add_argument('--error-429', type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument('--error-5xx', type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument('--retry-after', type=float, default=0.5, help="Retry-After seconds on 429")
+    parser.add_argument('--rpm', type=float, default=600, help="Client requests-per-minute limit")
+    parser.add_argument('--tpm', type=float, help="Client tokens-per-minute limit")
+    parser.add_argument('--workers', type=int, help="Client in-flight cap")
+    parser.add_argument('--max-attempts', type=int, default=5, help="Attempts per image")
+    parser.add_argument('--seed', type=int, default=1234, help="Mock server random seed")
+    parser.add_argument('--json', help="Write results as JSON to this file")
+    parser.add_argument('--verbose', action='store_true', help="Show pipeline output")
+    args = parser.parse_args()
+
+    engines = ['batch', 'shoot'] if args.engine == 'both' else [args.engine]
+    server = MockGeminiServer(
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        error_429=args.error_429, error_5xx=args.error_5xx,
+        retry_after=args.retry_after, seed=args.seed
+    )
+
+    print(f"🧪 Benchmark: {args.images} images, {args.image_size} payload, "
+          f"median latency {args.latency_median:g}s, 429 {args.error_429:.0%}, 5xx {args.error_5xx:.0%}, "
+          f"{args.rpm:g} RPM\n")
+
+    with server:
+        rows = [run_engine(engine, args, server) for engine in engines]
+
+    print_report(rows)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': rows}, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
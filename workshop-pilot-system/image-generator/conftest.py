@@ -0,0 +1,78 @@
+"""
+Shared pytest fixtures for the image generator modules
+"""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+import key_pool
+import mock_gemini_server
+import rate_limiter
+from gemini_api import GeminiPhotoGenerator
+from mock_gemini_server import MockGeminiServer
+
+PERSONAS_FILE = Path(__file__).with_name('personas-test.json')
+
+
+class FakeClock:
+    """Deterministic stand-in for time.monotonic() and asyncio.sleep()"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self._yield = asyncio.sleep
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        delay = max(0.0, delay)
+        self.sleeps.append(delay)
+        self.now += delay
+        # Still hand control to other tasks, like a real sleep would
+        await self._yield(0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Virtual clock driving the rate limiters and the key pool"""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', fake)
+    monkeypatch.setattr(key_pool, 'time', fake)
+    monkeypatch.setattr(asyncio, 'sleep', fake.sleep)
+    return fake
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """Local Gemini stand-in answering instantly with small images"""
+    monkeypatch.setitem(mock_gemini_server.PAYLOAD_BYTES, '1K', 2048)
+    with MockGeminiServer(image_size='1K', latency_median=0.0, latency_sigma=0.0, batch_latency=0.0,
+                          seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def make_generator(tmp_path, mock_server):
+    """Factory for generators writing to tmp_path and calling the mock server"""
+    generators = []
+
+    def make(**kwargs) -> GeminiPhotoGenerator:
+        kwargs.setdefault('requests_per_minute', 60000)
+        generator = GeminiPhotoGenerator('test-key', output_dir=str(tmp_path / 'out'), **kwargs)
+        generator.endpoint = mock_server.url
+        generators.append(generator)
+        return generator
+
+    yield make
+    for generator in generators:
+        generator.close()
+
+
+@pytest.fixture
+def personas():
+    """The three TS personas of personas-test.json"""
+    return json.loads(PERSONAS_FILE.read_text(encoding='utf-8'))
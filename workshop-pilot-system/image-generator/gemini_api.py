@@ -9,14 +9,92 @@ Usage:
 """
 
 import os
-import json
-import base64
+import asyncio
 import requests
+import aiohttp
+from requests.adapters import HTTPAdapter
 import argparse
+import json
 import time
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+from appearance_rules import infer_appearance, infer_appearance_bulk
+from batch_jobs import BatchBackend, GeminiBatchBackend, write_requests_file
+from hedging import BACKUP, HedgePolicy, race
+from image_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ImageCache
+import job_journal
+from job_journal import JobJournal, file_sha256
+from key_pool import KEYS_ENV, ApiKey, KeyPool, is_rejection, load_keys
+from output_manifest import OutputManifest
+from persona_stream import chunked, iter_personas, select_personas
+from pipeline_metrics import Span, Tracer
+from prompt_templates import PromptTemplate, get_template, register_template
+from inline_stream import CHUNK_SIZE, stream_inline_image, stream_inline_image_async, write_inline_image
+from rate_limiter import AdaptiveConcurrency, RateLimiter, estimate_request_tokens
+from retry_policy import RequestFailed, RetryBudget, RetryPolicy, is_throttled, parse_retry_after
+
+if TYPE_CHECKING:
+    # Pillow is only needed for --variants
+    from image_variants import VariantPool
+
+# Portrait prompt styles, selectable with GeminiPhotoGenerator.ts_prompt_style / manual_prompt_style
+register_template('ts_leader', """Professional portrait photograph of a {age}-year-old Korean {gender},
+newly promoted {role} at {company} (promoted {years_in_role} years ago).
+
+Leadership background: Recently promoted from {previous_role}.
+Leadership approach: {leadership_style}
+
+Physical appearance:
+- Hair: {hair}, black hair styled professionally
+- Face: Mature yet approachable features showing {age} years of professional experience
+- Eyes: {expression|first_clause} gaze {glasses}
+- Skin: Fair to medium Korean skin tone appropriate for age {age}
+- Overall: Professional demeanor of a new team leader
+
+Attire: {attire}
+
+Expression: {expression}
+
+Context: New team leader workshop participant, ID card photo
+Demeanor: Balancing confidence (level {confidence}/10) with workplace demands (stress {stress}/10)
+
+Photography specs:
+- 3:4 portrait aspect ratio for workshop ID card
+- Professional corporate lighting with soft shadows
+- Shallow depth of field, f/2.8
+- Corporate headshot composition, shoulders visible
+- Sharp focus on eyes and facial expression
+- Neutral background (light gray gradient)
+- High resolution, photorealistic style
+- Natural skin texture showing authenticity, no AI smoothing
+- Professional workshop participant quality
+
+Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
+Style: Contemporary Korean corporate leadership portrait
+""")
+
+register_template('manual', """Professional portrait photograph of a {age}-year-old Korean {gender}, {occupation}.
+
+Physical appearance: {hair}, {face}, {eyes}, {skin}{features|comma_prefixed}.
+
+Attire: {clothing}.
+
+Expression: {expression}.
+
+Photography specs:
+- 3:4 portrait aspect ratio
+- Professional studio lighting with soft shadows
+- Shallow depth of field, f/2.8
+- Professional headshot composition
+- Sharp focus on eyes and face
+- {background}
+- High resolution, photorealistic style
+- Natural skin texture with visible pores, no AI smoothing
+- Professional ID photo quality
+
+Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
+Style: Modern corporate headshot photography, natural and authentic""")
 
 class GeminiPhotoGenerator:
     """Generate persona photos using Gemini 3 Pro Image Preview API"""
@@ -24,8 +102,46 @@ class GeminiPhotoGenerator:
     # API endpoints
     PRO_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/gemini-3-pro-image-preview:generateContent"
     FLASH_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-image:generateContent"
+    PRO_MODEL_NAME = "Nano Banana Pro"
+    FLASH_MODEL_NAME = "Nano Banana Flash"
+    
+    # Default quota (free tier) used to pace batch requests
+    DEFAULT_RPM = 10
+    DEFAULT_TPM = None
+    REQUEST_TIMEOUT = 60
     
-    def __init__(self, api_key: str, output_dir: str = "generated_photos", use_pro: bool = True):
+    # Keep-alive connection pool sizing
+    DEFAULT_POOL_SIZE = 10
+    KEEPALIVE_TIMEOUT = 30
+    DNS_CACHE_TTL = 300
+    
+    # Streaming batches: personas prefiltered per chunk, bounded submission queue
+    PREFILTER_CHUNK = 256
+    MIN_QUEUE_SIZE = 64
+    
+    # Batch API mode (--batch-mode): poll interval grows by BACKOFF up to MAX_INTERVAL
+    BATCH_POLL_INTERVAL = 30
+    BATCH_POLL_BACKOFF = 1.5
+    BATCH_POLL_MAX_INTERVAL = 300
+    BATCH_STATE_FILE = 'batch_job.json'
+    BATCH_REQUESTS_FILE = 'batch_requests.jsonl'
+    
+    # Registered prompt_templates used for each kind of persona
+    ts_prompt_style = 'ts_leader'
+    manual_prompt_style = 'manual'
+    
+    def __init__(self, api_key: str, output_dir: str = "generated_photos", use_pro: bool = True,
+                 requests_per_minute: float = DEFAULT_RPM,
+                 tokens_per_minute: Optional[float] = DEFAULT_TPM,
+                 pool_size: Optional[int] = None,
+                 cache: Optional[ImageCache] = None,
+                 refresh_cache: bool = False,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 variants: Optional['VariantPool'] = None,
+                 metrics_dir: Optional[str] = None,
+                 request_timeout: float = REQUEST_TIMEOUT,
+                 hedge: Optional[HedgePolicy] = None,
+                 api_keys: Optional[List[str]] = None):
         """
         Initialize generator
         
@@ -33,104 +149,168 @@ class GeminiPhotoGenerator:
             api_key: Gemini API key
             output_dir: Directory to save generated photos
             use_pro: Use Pro model (4K) vs Flash (1024px)
+            requests_per_minute: API request quota used to pace batches
+            tokens_per_minute: API token quota used to pace batches (None to ignore)
+            pool_size: Keep-alive connections to hold open (default: match max_workers)
+            cache: Result cache for byte-identical requests (None to disable)
+            refresh_cache: Regenerate everything, ignoring the cache and up-to-date outputs
+                           (new images are still stored)
+            retry_policy: Retry/backoff policy for failed requests
+            variants: Pool writing web-ready variants of each finished photo (None to disable)
+            metrics_dir: Directory for per-request spans (spans.jsonl) and a Prometheus
+                         snapshot (gemini_batch.prom) of each batch (None to only print them)
+            request_timeout: Seconds before one request is abandoned
+            hedge: Policy for hedging slow batch requests with a duplicate or a
+                   fallback-model request (None to disable)
+            api_keys: More keys (other projects) to shard batches across; each gets
+                      its own requests_per_minute / tokens_per_minute quota
         """
         self.api_key = api_key
+        self.api_keys = list(dict.fromkeys(k for k in (api_key, *(api_keys or [])) if k))
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.endpoint = self.PRO_ENDPOINT if use_pro else self.FLASH_ENDPOINT
-        self.model_name = "Nano Banana Pro" if use_pro else "Nano Banana Flash"
+        self.model_name = self.PRO_MODEL_NAME if use_pro else self.FLASH_MODEL_NAME
+        self.image_size = "4K"
+        # Where hedged requests go when hedge.fallback is set (Flash renders 1024px)
+        self.fallback_endpoint = self.FLASH_ENDPOINT
+        self.fallback_model_name = self.FLASH_MODEL_NAME
+        self.fallback_image_size = "1K"
+        self.request_timeout = request_timeout
+        self.hedge = hedge
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.pool_size = pool_size
+        self.cache = cache
+        self.variants = variants
+        self.metrics_dir = metrics_dir
+        self.refresh_cache = refresh_cache
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.manifest = OutputManifest(self.output_dir)
+        self.headers = {
+            "x-goog-api-key": self.api_key,
+            "Content-Type": "application/json"
+        }
+        self._session: Optional[requests.Session] = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @property
+    def session(self) -> requests.Session:
+        """Pooled keep-alive session for synchronous requests (created lazily)"""
+        if self._session is None:
+            pool_size = self.pool_size or self.DEFAULT_POOL_SIZE
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+    
+    def open_async_session(self, pool_size: Optional[int] = None) -> aiohttp.ClientSession:
+        """
+        Create a pooled keep-alive aiohttp session for one batch
+        
+        aiohttp sessions are bound to the running event loop, so each batch
+        opens its own and closes it when the batch ends.
+        
+        Args:
+            pool_size: Max open connections (default: configured pool size)
+        """
+        connector = aiohttp.TCPConnector(
+            limit=pool_size or self.pool_size or self.DEFAULT_POOL_SIZE,
+            keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=self.DNS_CACHE_TTL
+        )
+        return aiohttp.ClientSession(connector=connector, headers=self.headers)
+    
+    def close(self):
+        """Close pooled connections and post-processing workers held by the generator"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+        if self.variants is not None:
+            self.variants.close()
+            self.variants = None
         
     def infer_appearance_from_ts(self, persona: Dict) -> Dict:
         """
         Infer appearance details from TS persona data (for new team leaders)
         
+        Rules live in appearance_rules.py as threshold tables.
+        
         Args:
             persona: TS persona dictionary
             
         Returns:
             Dictionary with inferred appearance details
         """
-        age = persona.get('age', 35)
-        category = persona.get('category', '')
-        department = persona.get('department', '')
-        
-        # Get personality traits
-        personality = persona.get('personality', {})
-        tech_savvy = personality.get('techSavvy', 5)
-        stress = personality.get('stressLevel', 5)
-        confidence = personality.get('confidenceLevel', 5)
-        patience = personality.get('patience', 5)
-        
-        # Infer gender from name (simple heuristic - can be improved)
-        name = persona.get('name', '')
-        # Common endings: 남성 suffixes, 여성 suffixes
-        female_endings = ['진', '영', '희', '미', '선', '아', '연']
-        is_female = any(name.endswith(e) for e in female_endings)
-        gender = 'woman' if is_female else 'man'
-        
-        # Hair style based on age and gender
-        if gender == 'man':
-            if age <= 35:
-                hair = "short, modern professional style with slight texture"
-            elif age <= 40:
-                hair = "short, neatly styled with conservative professionalism"
-            else:
-                hair = "short, refined style with distinguished gray streaks"
-        else:
-            if age <= 35:
-                hair = "shoulder-length modern professional styling"
-            elif age <= 40:
-                hair = "neat, sophisticated styling at shoulder length"
-            else:
-                hair = "elegant, mature styling reflecting leadership presence"
-        
-        # Glasses determination
-        glasses_prob = 0.5
-        if category == 'IT' or 'IT' in department:
-            glasses_prob += 0.2
-        if tech_savvy >= 9:
-            glasses_prob += 0.3
-        elif tech_savvy >= 7:
-            glasses_prob += 0.2
-        if age >= 40:
-            glasses_prob += 0.2
-        
-        has_glasses = glasses_prob > 0.6
-        glasses_desc = "behind modern thin-framed glasses" if has_glasses else ""
-        
-        # Attire based on category/department
-        if category == 'IT' or 'IT' in department or '개발' in department:
-            attire = "Navy blue or charcoal gray collared shirt, smart casual professional style"
-        else:
-            attire = "Business professional attire with blazer"
-        
-        # Expression based on personality
-        expression = "Professional"
-        if confidence >= 8:
-            expression += " and confident"
-        elif confidence >= 6:
-            expression += " with balanced authority"
-        else:
-            expression += " with humble approachability"
+        return infer_appearance(persona)
+    
+    def infer_appearance_batch(self, personas: List[Dict]) -> List[Dict]:
+        """
+        Infer appearance details for many TS personas in one vectorized pass
         
-        if stress >= 8:
-            expression += ", showing determination under pressure"
-        elif stress >= 6:
-            expression += ", composed despite challenges"
+        Args:
+            personas: TS persona dictionaries
+            
+        Returns:
+            One appearance dictionary per persona, same as infer_appearance_from_ts
+        """
+        return infer_appearance_bulk(personas)
+    
+    def portrait_context(self, persona: Dict, appearance: Optional[Dict] = None) -> Dict:
+        """
+        Template fields for a persona's portrait prompt
         
-        if patience >= 8:
-            expression += ", warm and approachable smile"
-        elif patience >= 6:
-            expression += ", pleasant professional demeanor"
+        Args:
+            persona: Dictionary with persona details
+            appearance: Precomputed infer_appearance_from_ts result (TS personas only)
+            
+        Returns:
+            Context dictionary for the TS or manual portrait template
+        """
+        if 'leaderProfile' in persona:
+            # Auto-infer appearance for new team leaders, plus leadership/personality context
+            leader_profile = persona['leaderProfile']
+            personality = persona.get('personality', {})
+            return {
+                **(appearance or self.infer_appearance_from_ts(persona)),
+                'age': persona.get('age', 30),
+                'role': persona.get('role', ''),
+                'company': persona.get('company', ''),
+                'years_in_role': leader_profile.get('yearsInRole', 1.0),
+                'previous_role': leader_profile.get('previousRole', 'senior professional'),
+                'leadership_style': leader_profile.get('leadershipStyle', 'balanced leadership'),
+                'stress': personality.get('stressLevel', 5),
+                'confidence': personality.get('confidenceLevel', 5),
+            }
         
+        # Manually specified personas
+        details = persona.get('appearance', {})
         return {
-            'gender': gender,
-            'hair': hair,
-            'glasses': glasses_desc,
-            'attire': attire,
-            'expression': expression
+            'age': persona.get('age', 30),
+            'gender': persona.get('gender', 'person'),
+            'occupation': persona.get('occupation', 'professional'),
+            'hair': details.get('hair', 'neat hairstyle'),
+            'face': details.get('face', 'friendly features'),
+            'eyes': details.get('eyes', 'expressive eyes'),
+            'skin': details.get('skin', 'healthy skin tone'),
+            'features': details.get('features', ''),
+            'clothing': persona.get('clothing', 'professional attire'),
+            'expression': persona.get('expression', 'confident professional smile'),
+            'background': persona.get('background', 'neutral gray background'),
         }
     
+    def portrait_template(self, persona: Dict) -> PromptTemplate:
+        """Template for a persona: TS personas (with leaderProfile) or manual ones"""
+        return get_template(self.ts_prompt_style if 'leaderProfile' in persona else self.manual_prompt_style)
+    
     def create_portrait_prompt(self, persona: Dict) -> str:
         """
         Create professional portrait prompt from persona data
@@ -141,113 +321,278 @@ class GeminiPhotoGenerator:
         Returns:
             Formatted prompt string
         """
-        # Extract persona details
-        age = persona.get('age', 30)
-        name = persona.get('name', '')
-        role = persona.get('role', '')
-        company = persona.get('company', '')
-        department = persona.get('department', '')
-        
-        # Check if this is a TS persona (has leaderProfile)
-        is_ts_persona = 'leaderProfile' in persona
-        
-        if is_ts_persona:
-            # Auto-infer appearance for new team leaders
-            appearance_data = self.infer_appearance_from_ts(persona)
-            gender = appearance_data['gender']
-            hair = appearance_data['hair']
-            glasses = appearance_data['glasses']
-            attire = appearance_data['attire']
-            expression = appearance_data['expression']
+        return self.portrait_template(persona).render(self.portrait_context(persona))
+    
+    def create_portrait_prompts(self, personas: List[Dict]) -> List[str]:
+        """
+        Create portrait prompts for many personas at once
+        
+        Appearance inference for TS personas runs as one vectorized batch.
+        
+        Args:
+            personas: Persona dictionaries
             
-            # Get leadership context
-            leader_profile = persona.get('leaderProfile', {})
-            years_in_role = leader_profile.get('yearsInRole', 1.0)
-            previous_role = leader_profile.get('previousRole', 'senior professional')
-            leadership_style = leader_profile.get('leadershipStyle', 'balanced leadership')
+        Returns:
+            Prompts in the same order as `personas`
+        """
+        prompts: List[Optional[str]] = [None] * len(personas)
+        ts_index = [i for i, p in enumerate(personas) if 'leaderProfile' in p]
+        manual_index = [i for i, p in enumerate(personas) if 'leaderProfile' not in p]
+        
+        appearances = self.infer_appearance_batch([personas[i] for i in ts_index])
+        groups = (
+            (self.ts_prompt_style, ts_index, appearances),
+            (self.manual_prompt_style, manual_index, [None] * len(manual_index)),
+        )
+        for style, indices, group_appearances in groups:
+            contexts = [self.portrait_context(personas[i], a) for i, a in zip(indices, group_appearances)]
+            for i, prompt in zip(indices, get_template(style).render_many(contexts)):
+                prompts[i] = prompt
+        return prompts
+    
+    def build_payload(self, prompt: str, image_size: Optional[str] = None) -> Dict:
+        """
+        Build the generateContent request body for a prompt
+        
+        Args:
+            prompt: Portrait prompt text
+            image_size: imageConfig.imageSize (default: the generator's image_size)
             
-            # Get personality for additional context
-            personality = persona.get('personality', {})
-            stress = personality.get('stressLevel', 5)
-            confidence = personality.get('confidenceLevel', 5)
+        Returns:
+            JSON-serializable request payload
+        """
+        return {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "responseModalities": ["IMAGE"],
+                "imageConfig": {
+                    "aspectRatio": "3:4",
+                    "imageSize": image_size or self.image_size
+                }
+            },
+            "tools": [{"google_search": {}}]  # Enable real-world grounding
+        }
+    
+    def output_path(self, persona_name: str) -> Path:
+        """Path of the photo file for a persona"""
+        return self.output_dir / f"{persona_name.replace(' ', '_')}.png"
+    
+    def cache_key(self, payload: Dict, endpoint: Optional[str] = None) -> str:
+        """Cache key of a request payload built by build_payload(), sent to `endpoint` (default: self.endpoint)"""
+        prompt = payload['contents'][0]['parts'][0]['text']
+        return ImageCache.make_key(endpoint or self.endpoint, prompt, payload['generationConfig'])
+    
+    def _from_cache(self, payload: Dict, filepath: Path) -> bool:
+        """Serve a request from the cache, if enabled and present"""
+        if self.cache is None or self.refresh_cache:
+            return False
+        return self.cache.get(self.cache_key(payload), filepath)
+    
+    def _store_in_cache(self, payload: Dict, filepath: Path, endpoint: Optional[str] = None):
+        if self.cache is not None:
+            self.cache.put(self.cache_key(payload, endpoint), filepath)
+    
+    def is_fresh(self, persona: Dict, prompt: Optional[str] = None) -> bool:
+        """
+        Whether the persona's photo on disk was produced by its current prompt and model
+        
+        Args:
+            persona: Persona dictionary
+            prompt: Already rendered portrait prompt, if available
             
-            # Build comprehensive prompt for new team leader
-            prompt = f"""Professional portrait photograph of a {age}-year-old Korean {gender},
-newly promoted {role} at {company} (promoted {years_in_role} years ago).
-
-Leadership background: Recently promoted from {previous_role}.
-Leadership approach: {leadership_style}
-
-Physical appearance:
-- Hair: {hair}, black hair styled professionally
-- Face: Mature yet approachable features showing {age} years of professional experience
-- Eyes: {expression.split(',')[0] if ',' in expression else expression} gaze {glasses}
-- Skin: Fair to medium Korean skin tone appropriate for age {age}
-- Overall: Professional demeanor of a new team leader
-
-Attire: {attire}
-
-Expression: {expression}
-
-Context: New team leader workshop participant, ID card photo
-Demeanor: Balancing confidence (level {confidence}/10) with workplace demands (stress {stress}/10)
-
-Photography specs:
-- 3:4 portrait aspect ratio for workshop ID card
-- Professional corporate lighting with soft shadows
-- Shallow depth of field, f/2.8
-- Corporate headshot composition, shoulders visible
-- Sharp focus on eyes and facial expression
-- Neutral background (light gray gradient)
-- High resolution, photorealistic style
-- Natural skin texture showing authenticity, no AI smoothing
-- Professional workshop participant quality
-
-Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
-Style: Contemporary Korean corporate leadership portrait
-"""
+        Returns:
+            True if generation can be skipped
+        """
+        if self.refresh_cache:
+            return False
+        payload = self.build_payload(prompt if prompt is not None else self.create_portrait_prompt(persona))
+        filepath = self.output_path(persona.get('name', 'unknown'))
+        return self.manifest.is_fresh(filepath.name, self.cache_key(payload), self.model_name)
+    
+    def _record_output(self, payload: Dict, filepath: Path, endpoint: Optional[str] = None,
+                       model_name: Optional[str] = None):
+        self.manifest.record(filepath.name, self.cache_key(payload, endpoint), model_name or self.model_name)
+    
+    def _model_of(self, filename: Optional[str]) -> Optional[str]:
+        """Model recorded in the manifest for an output file"""
+        if filename is None:
+            return None
+        return self.manifest.entries.get(Path(filename).name, {}).get('model')
+    
+    def _prompt_hash_of(self, filename: Optional[str]) -> Optional[str]:
+        """Prompt hash recorded in the manifest for an output file"""
+        if filename is None:
+            return None
+        return self.manifest.entries.get(Path(filename).name, {}).get('prompt_hash')
+    
+    def _resumable(self, entry: Optional[Dict], prompt: str) -> bool:
+        """Whether a journaled done entry was produced by the persona's current prompt"""
+        return entry is not None and JobJournal.is_current(entry, self.cache_key(self.build_payload(prompt)))
+    
+    def _post_image(self, payload: Dict, filepath: Path):
+        """Send one request and stream the image to `filepath`; raises on failure"""
+        response = self.session.post(
+            self.endpoint,
+            json=payload,
+            timeout=self.request_timeout,
+            stream=True
+        )
+        
+        with response:
+            if response.status_code != 200:
+                raise RequestFailed(
+                    f"API error {response.status_code}: {response.text[:200]}",
+                    status=response.status_code,
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+            # Decode the base64 image straight to disk without buffering the body
+            stream_inline_image(response.iter_content(CHUNK_SIZE), filepath)
+    
+    async def _post_image_async(self, session: aiohttp.ClientSession, payload: Dict, filepath: Path,
+                                span: Optional[Span] = None, endpoint: Optional[str] = None,
+                                api_key: Optional[str] = None) -> int:
+        """
+        Async variant of _post_image; adds http/decode/write time and bytes to `span`
+        
+        `api_key` overrides the session's key for this request.
+        
+        Returns:
+            Image bytes written
+        """
+        timings = {'decode': 0.0, 'write': 0.0}
+        start = time.perf_counter()
+        try:
+            async with session.post(
+                endpoint or self.endpoint,
+                json=payload,
+                headers={"x-goog-api-key": api_key} if api_key else None,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    raise RequestFailed(
+                        f"API error {response.status}: {text[:200]}",
+                        status=response.status,
+                        retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                    )
+                written = await stream_inline_image_async(
+                    response.content.iter_chunked(CHUNK_SIZE), filepath, timings=timings
+                )
+        finally:
+            if span is not None:
+                # Network time is what remains after local decode/write work
+                span.add('http', time.perf_counter() - start - timings['decode'] - timings['write'])
+                span.add('decode', timings['decode'])
+                span.add('write', timings['write'])
+        if span is not None:
+            span.bytes = written
+        return written
+    
+    @staticmethod
+    async def _take_quota(limiter: Union[RateLimiter, KeyPool, None], tokens: int) -> Optional[ApiKey]:
+        """Wait for quota to start one request; with a KeyPool, returns the key to send it with"""
+        if isinstance(limiter, KeyPool):
+            return await limiter.acquire(tokens)
+        if limiter is not None:
+            await limiter.acquire(tokens)
+        return None
+    
+    async def _post_with_key(self, session: aiohttp.ClientSession, payload: Dict, filepath: Path,
+                             key: Optional[ApiKey], span: Optional[Span] = None,
+                             endpoint: Optional[str] = None) -> int:
+        """_post_image_async with a pool key (None: the session's key), reporting the outcome to the key"""
+        try:
+            written = await self._post_image_async(session, payload, filepath, span, endpoint,
+                                                   api_key=key.key if key is not None else None)
+        except Exception as e:
+            if key is not None:
+                key.report(e)
+            raise
+        if key is not None:
+            key.report()
+        return written
+    
+    async def _post_hedged(self, session: aiohttp.ClientSession, payload: Dict, prompt: str, filepath: Path,
+                           span: Span, limiter: Union[RateLimiter, KeyPool, None], tokens: int,
+                           key: Optional[ApiKey] = None) -> Tuple[Dict, str, str]:
+        """
+        Send one request, hedged after the policy's latency percentile
+        
+        The backup (a duplicate, or the prompt on the fallback model) writes to
+        a hidden sibling file, moved over `filepath` only if it wins.
+        
+        Returns:
+            (payload, endpoint, model name) of the request that produced the image
+        """
+        hedge = self.hedge
+        if hedge.fallback:
+            backup = (self.build_payload(prompt, self.fallback_image_size), self.fallback_endpoint,
+                      self.fallback_model_name, estimate_request_tokens(prompt, self.fallback_image_size))
         else:
-            # Original logic for manually specified personas
-            gender = persona.get('gender', 'person')
-            occupation = persona.get('occupation', 'professional')
-            
-            # Appearance details
-            appearance = persona.get('appearance', {})
-            hair = appearance.get('hair', 'neat hairstyle')
-            face = appearance.get('face', 'friendly features')
-            eyes = appearance.get('eyes', 'expressive eyes')
-            skin = appearance.get('skin', 'healthy skin tone')
-            features = appearance.get('features', '')
-            
-            # Style details
-            clothing = persona.get('clothing', 'professional attire')
-            expression = persona.get('expression', 'confident professional smile')
-            background = persona.get('background', 'neutral gray background')
+            backup = (payload, self.endpoint, self.model_name, tokens)
+        backup_path = filepath.with_name(f".{filepath.stem}.hedge{filepath.suffix}")
+        
+        backup_started = []
+        
+        async def send_backup():
+            # Hedges spend real quota (possibly another key's); only the primary holds a concurrency slot
+            backup_started.append(time.perf_counter())
+            backup_key = await self._take_quota(limiter, backup[3])
+            print(f"   ⚡ {filepath.stem}: slower than p{hedge.percentile * 100:g}, "
+                  f"hedging on {backup[2]}")
+            return await self._post_with_key(session, backup[0], backup_path, backup_key, endpoint=backup[1])
+        
+        try:
+            # The primary accounts 'http' up to its finish or cancellation; the backup's
+            # run time overlaps it, so it goes to its own 'hedge' phase
+            written, winner = await race(
+                self._post_with_key(session, payload, filepath, key, span), send_backup, hedge.delay(), hedge
+            )
+        finally:
+            if backup_started:
+                span.add('hedge', time.perf_counter() - backup_started[0])
+        if winner == BACKUP:
+            os.replace(backup_path, filepath)
+            span.bytes = written
+            return backup[:3]
+        backup_path.unlink(missing_ok=True)
+        return payload, self.endpoint, self.model_name
+    
+    def dry_run(self, personas: Iterable[Dict]) -> Dict:
+        """
+        Render every prompt and cache key without calling the API
+        
+        Args:
+            personas: Persona dictionaries; any iterable, rendered chunk by chunk
             
-            # Build prompt
-            prompt = f"""Professional portrait photograph of a {age}-year-old Korean {gender}, {occupation}.
-
-Physical appearance: {hair}, {face}, {eyes}, {skin}{', ' + features if features else ''}.
-
-Attire: {clothing}.
-
-Expression: {expression}.
-
-Photography specs:
-- 3:4 portrait aspect ratio
-- Professional studio lighting with soft shadows
-- Shallow depth of field, f/2.8
-- Professional headshot composition
-- Sharp focus on eyes and face
-- {background}
-- High resolution, photorealistic style
-- Natural skin texture with visible pores, no AI smoothing
-- Professional ID photo quality
-
-Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
-Style: Modern corporate headshot photography, natural and authentic"""
+        Returns:
+            Dictionary mapping persona name to {'cache_key', 'fresh', 'cached'}
+        """
+        start = time.perf_counter()
+        plan = {}
+        for chunk in chunked(personas, self.PREFILTER_CHUNK):
+            for persona, prompt in zip(chunk, self.create_portrait_prompts(chunk)):
+                key = self.cache_key(self.build_payload(prompt))
+                filepath = self.output_path(persona.get('name', 'unknown'))
+                plan[persona.get('name', 'unknown')] = {
+                    'cache_key': key,
+                    'fresh': not self.refresh_cache and self.manifest.is_fresh(filepath.name, key, self.model_name),
+                    'cached': self.cache is not None and self.cache.contains(key),
+                }
+        elapsed = time.perf_counter() - start
         
-        return prompt
+        fresh = sum(1 for entry in plan.values() if entry['fresh'])
+        cached = sum(1 for entry in plan.values() if entry['cached'] and not entry['fresh'])
+        print(f"\n🧪 Dry run: {len(plan)} prompts rendered in {elapsed:.2f}s")
+        print(f"   ⏭️  Up to date: {fresh}")
+        print(f"   💾 Served from cache: {cached}")
+        print(f"   🎨 Would call the API: {len(plan) - fresh - cached}")
+        return plan
+    
+    def _log_retry(self, persona_name: str, attempt: int, exc: Exception, delay: float):
+        print(f"   ↻ {persona_name}: {exc} - retry {attempt}/{self.retry_policy.max_attempts - 1} in {delay:.1f}s")
     
     def generate_image(self, persona: Dict) -> Tuple[Optional[str], bool, Optional[str]]:
         """
@@ -264,142 +609,487 @@ Style: Modern corporate headshot photography, natural and authentic"""
         try:
             # Create prompt
             prompt = self.create_portrait_prompt(persona)
+            payload = self.build_payload(prompt)
+            filepath = self.output_path(persona_name)
             
-            # Prepare request
-            headers = {
-                "x-goog-api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
+            if self.is_fresh(persona):
+                return str(filepath), True, None
             
-            payload = {
-                "contents": [{
-                    "parts": [{"text": prompt}]
-                }],
-                "generationConfig": {
-                    "responseModalities": ["IMAGE"],
-                    "imageConfig": {
-                        "aspectRatio": "3:4",
-                        "imageSize": "4K"
-                    }
-                },
-                "tools": [{"google_search": {}}]  # Enable real-world grounding
-            }
+            if not self._from_cache(payload, filepath):
+                # Make request, retrying throttling / server errors
+                self.retry_policy.call(
+                    self._post_image, payload, filepath,
+                    on_retry=lambda attempt, e, delay: self._log_retry(persona_name, attempt, e, delay)
+                )
+                self._store_in_cache(payload, filepath)
+            self._record_output(payload, filepath)
+            self.manifest.save()
+            return str(filepath), True, None
+                
+        except Exception as e:
+            return None, False, str(e)
+    
+    async def generate_image_async(self, session: aiohttp.ClientSession, persona: Dict,
+                                   limiter: Union[RateLimiter, KeyPool, None] = None,
+                                   concurrency: Optional[AdaptiveConcurrency] = None,
+                                   budget: Optional[RetryBudget] = None,
+                                   span: Optional[Span] = None) -> Tuple[Optional[str], bool, Optional[str]]:
+        """
+        Generate a single persona photo on the asyncio engine
+        
+        Args:
+            session: Pooled aiohttp session from open_async_session()
+            persona: Persona dictionary with 'name' and other details
+            limiter: Rate limiter to wait on before each attempt, or a KeyPool that
+                     also picks the API key of each attempt
+            concurrency: Adaptive in-flight limit, shrunk when throttled
+            budget: Batch-wide retry budget
+            span: Metrics span receiving phase timings, statuses and bytes
             
-            # Make request
-            response = requests.post(
-                self.endpoint,
-                headers=headers,
-                json=payload,
-                timeout=60
-            )
+        Returns:
+            Tuple of (filename, success, error_message)
+        """
+        persona_name = persona.get('name', 'unknown')
+        if span is None:
+            span = Tracer('gemini').span(persona_name)
+        
+        try:
+            with span.phase('prompt'):
+                prompt = self.create_portrait_prompt(persona)
+                payload = self.build_payload(prompt)
+                filepath = self.output_path(persona_name)
             
-            # Handle response
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract image
-                if 'candidates' in data and len(data['candidates']) > 0:
-                    parts = data['candidates'][0].get('content', {}).get('parts', [])
-                    
-                    for part in parts:
-                        if 'inlineData' in part:
-                            image_data = part['inlineData']['data']
-                            
-                            # Save image
-                            filename = f"{persona_name.replace(' ', '_')}.png"
-                            filepath = self.output_dir / filename
-                            
-                            with open(filepath, 'wb') as f:
-                                f.write(base64.b64decode(image_data))
-                            
-                            return str(filepath), True, None
-                
-                return None, False, "No image data in response"
+            # Cache hits skip the rate limiter entirely
+            with span.phase('cache'):
+                cached = self._from_cache(payload, filepath)
+            if cached:
+                self._record_output(payload, filepath)
+                span.finish('cache')
+                return str(filepath), True, None
             
-            else:
-                error_msg = f"API error {response.status_code}: {response.text[:200]}"
-                return None, False, error_msg
-                
+            tokens = estimate_request_tokens(prompt, self.image_size)
+            produced = (payload, self.endpoint, self.model_name)
+            
+            async def attempt():
+                nonlocal produced
+                queued = time.perf_counter()
+                if concurrency is not None:
+                    await concurrency.acquire()
+                try:
+                    while True:
+                        key = await self._take_quota(limiter, tokens)
+                        span.add('queue', time.perf_counter() - queued)
+                        try:
+                            if self.hedge is not None:
+                                produced = await self._post_hedged(session, payload, prompt, filepath, span,
+                                                                   limiter, tokens, key)
+                            else:
+                                await self._post_with_key(session, payload, filepath, key, span)
+                            break
+                        except Exception as e:
+                            # A key the API rejects hands the request to the rest of the pool
+                            # (KeyPool raises KeysExhausted once no key is left)
+                            if key is None or not is_rejection(e):
+                                raise
+                            span.attempt(e)
+                            queued = time.perf_counter()
+                    span.attempt()
+                except Exception as e:
+                    span.attempt(e)
+                    if concurrency is not None and is_throttled(e):
+                        concurrency.on_throttle()
+                    raise
+                finally:
+                    if concurrency is not None:
+                        await concurrency.release()
+            
+            def on_retry(attempt_no: int, e: Exception, delay: float):
+                span.add('backoff', delay)
+                self._log_retry(persona_name, attempt_no, e, delay)
+            
+            await self.retry_policy.call_async(attempt, budget=budget, on_retry=on_retry)
+            if concurrency is not None:
+                concurrency.on_success()
+            with span.phase('write'):
+                self._store_in_cache(produced[0], filepath, produced[1])
+                self._record_output(produced[0], filepath, produced[1], produced[2])
+            span.finish('ok')
+            return str(filepath), True, None
+        
+        except asyncio.TimeoutError:
+            error = f"Request timed out after {self.request_timeout:g}s"
+            span.finish('failed', error)
+            return None, False, error
         except Exception as e:
+            span.finish('failed', str(e))
             return None, False, str(e)
     
-    def generate_batch(self, personas: List[Dict], max_workers: int = 3) -> Dict:
+    def generate_batch(self, personas: Iterable[Dict], max_workers: Optional[int] = None,
+                       resume: bool = False, queue_size: Optional[int] = None,
+                       keep_results: bool = True) -> Dict:
         """
-        Generate photos for multiple personas in parallel
+        Generate photos for multiple personas concurrently
+        
+        Request starts are paced by the RPM/TPM rate limiter, so throughput
+        is bounded by the API quota rather than a thread count. Personas are
+        pulled from the iterable only as submission slots free up, so large
+        streamed cohorts run in constant memory.
         
         Args:
-            personas: List of persona dictionaries
-            max_workers: Max concurrent requests (default 3 for rate limiting)
+            personas: Persona dictionaries; any iterable, consumed lazily
+            max_workers: Optional cap on in-flight requests (default: limiter only)
+            resume: Skip personas the output_dir journal records as done
+            queue_size: Max personas submitted but not finished (default: 4x concurrency)
+            keep_results: Keep successful results in the returned dict (failures are always kept)
             
         Returns:
             Dictionary with results for each persona
         """
+        return asyncio.run(self.generate_batch_async(
+            personas, max_workers=max_workers, resume=resume,
+            queue_size=queue_size, keep_results=keep_results
+        ))
+    
+    async def generate_batch_async(self, personas: Iterable[Dict], max_workers: Optional[int] = None,
+                                   resume: bool = False, queue_size: Optional[int] = None,
+                                   keep_results: bool = True) -> Dict:
+        """Asyncio implementation of generate_batch"""
         results = {}
-        total = len(personas)
+        total = len(personas) if hasattr(personas, '__len__') else None
+        journal = JobJournal(self.output_dir)
+        done = journal.completed() if resume else {}
+        counts = {'done': 0, 'resumed': 0, 'fresh': 0, 'ok': 0, 'fallback': 0}
         
-        print(f"\n🎨 Generating {total} persona photos using {self.model_name}...")
-        print(f"⚡ Parallel workers: {max_workers}\n")
+        print(f"\n🎨 Generating {total if total is not None else 'streamed'} persona photos using {self.model_name}...")
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_persona = {
-                executor.submit(self.generate_image, persona): persona['name']
-                for persona in personas
-            }
-            
-            # Collect results
-            completed = 0
-            for future in as_completed(future_to_persona):
-                persona_name = future_to_persona[future]
-                completed += 1
-                
-                try:
-                    filename, success, error = future.result()
-                    
+        quota = f"{self.requests_per_minute:g} RPM"
+        if self.tokens_per_minute:
+            quota += f", {self.tokens_per_minute:g} TPM"
+        if len(self.api_keys) > 1:
+            quota += f" per key x {len(self.api_keys)} keys"
+        print(f"⚡ Rate limit: {quota}" + (f", max in-flight: {max_workers}" if max_workers else "") + "\n")
+        
+        # One limiter per key; a single key behaves like a plain RateLimiter
+        keys = KeyPool(self.api_keys, self.requests_per_minute, self.tokens_per_minute)
+        # max_workers is a ceiling; AIMD shrinks below it while the API throttles
+        concurrency = AdaptiveConcurrency(
+            initial=max_workers or self.pool_size or self.DEFAULT_POOL_SIZE,
+            maximum=max_workers
+        )
+        budget = RetryBudget.for_requests(0)
+        tracer = Tracer('gemini_batch', self.metrics_dir)
+        # Bounded submission queue: personas are pulled from the input only as slots free up
+        window = queue_size or max(self.MIN_QUEUE_SIZE, 4 * int(concurrency.limit))
+        
+        def progress() -> str:
+            return f"[{counts['done']}/{total}]" if total is not None else f"[{counts['done']}]"
+        
+        def skip(persona: Dict, filename: str, reason: str):
+            counts['done'] += 1
+            counts[reason] += 1
+            if self.variants is not None:
+                self.variants.submit(filename)
+            if keep_results:
+                results[persona['name']] = {'success': True, 'filename': filename, 'error': None,
+                                            'model': self._model_of(filename)}
+        
+        async def run(session: aiohttp.ClientSession, persona: Dict, span: Span):
+            journal.record(persona['name'], job_journal.IN_FLIGHT)
+            return persona['name'], await self.generate_image_async(
+                session, persona, keys, concurrency=concurrency, budget=budget, span=span
+            )
+        
+        async def collect(tasks: set) -> set:
+            """Wait for at least one task, record finished ones, return the rest"""
+            finished, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                persona_name, (filename, success, error) = task.result()
+                counts['done'] += 1
+                model = self._model_of(filename) if success else None
+                if keep_results or not success:
                     results[persona_name] = {
                         'success': success,
                         'filename': filename,
-                        'error': error
+                        'error': error,
+                        'model': model
                     }
+                
+                if success:
+                    counts['ok'] += 1
+                    if model != self.model_name:
+                        counts['fallback'] += 1
+                    if self.variants is not None:
+                        # Resize/encode in worker processes while the batch keeps generating
+                        self.variants.submit(filename)
+                    sha256 = await asyncio.to_thread(file_sha256, filename)
+                    journal.record(persona_name, job_journal.DONE, filename=filename, sha256=sha256,
+                                   prompt_hash=self._prompt_hash_of(filename))
+                    print(f"✓ {progress()} {persona_name}: {filename}")
+                else:
+                    journal.record(persona_name, job_journal.FAILED, error=error)
+                    print(f"✗ {progress()} {persona_name}: {error}")
+            return tasks
+        
+        tasks = set()
+        submitted = 0
+        try:
+            # One warm connection pool shared by the whole batch
+            async with self.open_async_session(self.pool_size or max_workers) as session:
+                for chunk in chunked(personas, self.PREFILTER_CHUNK):
+                    # Skip journaled and up-to-date photos before any network call;
+                    # a journaled photo whose prompt changed since is generated again
+                    pending = []
+                    for persona, prompt in zip(chunk, self.create_portrait_prompts(chunk)):
+                        entry = done.get(persona['name'])
+                        if self._resumable(entry, prompt):
+                            skip(persona, entry['filename'], 'resumed')
+                        elif self.is_fresh(persona, prompt):
+                            skip(persona, str(self.output_path(persona['name'])), 'fresh')
+                        else:
+                            pending.append(persona)
                     
-                    if success:
-                        print(f"✓ [{completed}/{total}] {persona_name}: {filename}")
-                    else:
-                        print(f"✗ [{completed}/{total}] {persona_name}: {error}")
-                        
-                except Exception as e:
-                    results[persona_name] = {
-                        'success': False,
-                        'filename': None,
-                        'error': str(e)
-                    }
-                    print(f"✗ [{completed}/{total}] {persona_name}: Exception - {e}")
+                    submitted += len(pending)
+                    budget.scale_to(submitted)
+                    for persona in pending:
+                        journal.record(persona['name'], job_journal.PENDING)
+                        # The span starts at submission, so time waiting for a slot counts as queue
+                        span = tracer.span(persona['name'])
+                        tasks.add(asyncio.ensure_future(run(session, persona, span)))
+                        if len(tasks) >= window:
+                            tasks = await collect(tasks)
                 
-                # Small delay to respect rate limits
-                time.sleep(0.5)
+                while tasks:
+                    tasks = await collect(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            journal.close()
+            self.manifest.save()
+            if self.cache is not None:
+                self.cache.save()
+            if self.variants is not None:
+                await asyncio.to_thread(self.variants.drain)
+            tracer.close()
         
         # Print summary
-        successful = sum(1 for r in results.values() if r['success'])
-        print(f"\n📊 Summary: {successful}/{total} photos generated successfully")
+        processed = counts['done']
+        successful = counts['ok'] + counts['resumed'] + counts['fresh']
+        if counts['resumed'] or counts['fresh']:
+            print(f"\n⏭️  {counts['resumed']} already done (journal), {counts['fresh']} up to date")
+        print(f"\n📊 Summary: {successful}/{processed} photos generated successfully")
+        if self.cache is not None and self.cache.hits:
+            print(f"♻️  {self.cache.hits} served from cache ({self.cache.cache_dir})")
+        if self.variants is not None:
+            print(self.variants.summary())
+        if self.hedge is not None and self.hedge.hedged:
+            print(self.hedge.summary())
+            if counts['fallback']:
+                print(f"   {counts['fallback']} photos came from {self.fallback_model_name}; "
+                      f"they are regenerated with {self.model_name} on the next run")
+        if len(keys) > 1:
+            print(keys.summary())
+        if budget.spent:
+            print(f"↻  {budget.spent} retries ({concurrency.throttle_events} throttled, "
+                  f"final concurrency {int(concurrency.limit)})")
         
-        if successful < total:
-            print(f"⚠️  {total - successful} failed - check error messages above")
+        report = tracer.report()
+        if report:
+            print(f"\n{report}")
+        if tracer.directory is not None:
+            print(f"📈 Metrics: {tracer.directory / 'spans.jsonl'}, {tracer.prometheus_path}")
+        
+        if successful < processed:
+            print(f"⚠️  {processed - successful} failed - check error messages above")
+        
+        return results
+
+    
+    def batch_backend(self) -> BatchBackend:
+        """Batch API backend for the configured endpoint (a local fake when --endpoint points at one)"""
+        return GeminiBatchBackend.from_endpoint(
+            self.api_key, self.endpoint, session=self.session, retry_policy=self.retry_policy
+        )
+    
+    def generate_batch_job(self, personas: Iterable[Dict], resume: bool = False,
+                           backend: Optional[BatchBackend] = None,
+                           poll_interval: Optional[float] = None,
+                           max_wait: Optional[float] = None,
+                           keep_results: bool = True) -> Dict:
+        """
+        Generate photos through one Batch API job instead of per-photo requests
+        
+        All prompts that still need the API are packed into one requests file,
+        submitted, and polled with backoff; finished images are written with
+        the same naming, manifest, cache and journal records as generate_batch.
+        The submitted job is remembered in output_dir, so a run stopped while
+        the job is pending picks it up again instead of resubmitting.
+        
+        Args:
+            personas: Persona dictionaries; any iterable, rendered chunk by chunk
+            resume: Skip personas the output_dir journal records as done
+            backend: Submit/poll implementation (default: batch_backend())
+            poll_interval: First poll delay in seconds (default: BATCH_POLL_INTERVAL)
+            max_wait: Stop polling after this many seconds, leaving the job to a later run
+            keep_results: Keep successful results in the returned dict (failures are always kept)
+            
+        Returns:
+            Dictionary with results for each persona (empty while the job is still running)
+        """
+        backend = backend or self.batch_backend()
+        results = {}
+        journal = JobJournal(self.output_dir)
+        state_path = self.output_dir / self.BATCH_STATE_FILE
+        counts = {'done': 0, 'resumed': 0, 'fresh': 0, 'cache': 0, 'ok': 0}
+        # Known once every request is in the job file (or read back from it)
+        total = None
+        
+        def progress() -> str:
+            return f"[{counts['done']}/{total}]" if total is not None else f"[{counts['done']}]"
+        
+        def finish(persona_name: str, filename: str, success: bool, error: Optional[str] = None,
+                   reason: str = 'ok'):
+            counts['done'] += 1
+            if success:
+                counts[reason] += 1
+                if self.variants is not None:
+                    self.variants.submit(filename)
+            if keep_results or not success:
+                results[persona_name] = {'success': success, 'filename': filename, 'error': error}
+        
+        try:
+            if state_path.exists():
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    job = json.load(f)
+                total = len(job['requests'])
+                print(f"\n📦 Resuming batch job {job['name']} ({total} requests)")
+            else:
+                done = journal.completed() if resume else {}
+                requests_path = self.output_dir / self.BATCH_REQUESTS_FILE
+                keyed = {}
+                
+                def entries():
+                    for chunk in chunked(personas, self.PREFILTER_CHUNK):
+                        for persona, prompt in zip(chunk, self.create_portrait_prompts(chunk)):
+                            name = persona['name']
+                            filepath = self.output_path(name)
+                            if self._resumable(done.get(name), prompt):
+                                finish(name, done[name]['filename'], True, reason='resumed')
+                                continue
+                            if self.is_fresh(persona, prompt):
+                                finish(name, str(filepath), True, reason='fresh')
+                                continue
+                            payload = self.build_payload(prompt)
+                            if self._from_cache(payload, filepath):
+                                self._record_output(payload, filepath)
+                                finish(name, str(filepath), True, reason='cache')
+                                continue
+                            key = f"{len(keyed):06d}"
+                            keyed[key] = {'name': name, 'cache_key': self.cache_key(payload)}
+                            journal.record(name, job_journal.PENDING)
+                            yield key, payload
+                
+                count = write_requests_file(requests_path, entries())
+                if not count:
+                    requests_path.unlink()
+                    print(f"\n✓ Nothing to submit: {counts['done']} photos already up to date")
+                    return results
+                
+                total = counts['done'] + count
+                print(f"\n📦 Submitting {count} requests as one batch job using {self.model_name}...")
+                job = {
+                    'name': backend.submit(requests_path, f"persona-photos-{time.strftime('%Y%m%dT%H%M%S')}"),
+                    'model': self.model_name,
+                    'submitted_at': round(time.time(), 3),
+                    'requests': keyed,
+                }
+                # Remember the job before anything else can fail, so it is never submitted twice
+                tmp_path = state_path.with_name(state_path.name + '.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(job, f, ensure_ascii=False)
+                tmp_path.replace(state_path)
+                requests_path.unlink()
+                for entry in keyed.values():
+                    journal.record(entry['name'], job_journal.IN_FLIGHT)
+                print(f"   Job: {job['name']}")
+            
+            # Poll with backoff; batch jobs take minutes to hours
+            delay = poll_interval if poll_interval is not None else self.BATCH_POLL_INTERVAL
+            start = time.monotonic()
+            last_state = None
+            while True:
+                status = backend.poll(job['name'])
+                if status.state != last_state:
+                    stats = f" {status.stats}" if status.stats else ""
+                    print(f"   ⏳ {status.state}{stats} after {time.monotonic() - start:.0f}s")
+                    last_state = status.state
+                if status.done:
+                    break
+                if max_wait is not None and time.monotonic() - start + delay > max_wait:
+                    print(f"\n⏸️  Job {job['name']} still {status.state}; run again to collect its results")
+                    return results
+                time.sleep(delay)
+                delay = min(delay * self.BATCH_POLL_BACKOFF, self.BATCH_POLL_MAX_INTERVAL)
+            
+            requests_by_key = job['requests']
+            if status.succeeded:
+                for key, response, error in backend.results(job['name']):
+                    entry = requests_by_key.pop(key, None)
+                    if entry is None:
+                        continue
+                    name = entry['name']
+                    filepath = self.output_path(name)
+                    if response is not None:
+                        try:
+                            write_inline_image(response, filepath)
+                        except Exception as e:
+                            error = str(e)
+                    if error is None:
+                        self.manifest.record(filepath.name, entry['cache_key'], job['model'])
+                        if self.cache is not None:
+                            self.cache.put(entry['cache_key'], filepath)
+                        journal.record(name, job_journal.DONE, filename=str(filepath),
+                                       sha256=file_sha256(filepath), prompt_hash=entry['cache_key'])
+                        finish(name, str(filepath), True)
+                        print(f"✓ {progress()} {name}: {filepath}")
+                    else:
+                        journal.record(name, job_journal.FAILED, error=error)
+                        finish(name, str(filepath), False, error)
+                        print(f"✗ {progress()} {name}: {error}")
+            
+            # Requests without a result (or a failed/expired job) are failures to retry
+            job_error = status.error or (None if status.succeeded else f"Batch job {status.state}")
+            for entry in requests_by_key.values():
+                error = job_error or "No result in batch output"
+                journal.record(entry['name'], job_journal.FAILED, error=error)
+                finish(entry['name'], None, False, error)
+                print(f"✗ {progress()} {entry['name']}: {error}")
+            state_path.unlink()
+        finally:
+            journal.close()
+            self.manifest.save()
+            if self.cache is not None:
+                self.cache.save()
+            if self.variants is not None:
+                self.variants.drain()
+        
+        processed = counts['done']
+        successful = counts['ok'] + counts['resumed'] + counts['fresh'] + counts['cache']
+        if counts['resumed'] or counts['fresh']:
+            print(f"\n⏭️  {counts['resumed']} already done (journal), {counts['fresh']} up to date")
+        print(f"\n📊 Summary: {successful}/{processed} photos generated successfully")
+        if counts['cache']:
+            print(f"♻️  {counts['cache']} served from cache ({self.cache.cache_dir})")
+        if self.variants is not None:
+            print(self.variants.summary())
+        if successful < processed:
+            print(f"⚠️  {processed - successful} failed - check error messages above")
         
         return results
 
 
 def load_personas_from_file(filepath: str) -> List[Dict]:
-    """Load personas from JSON file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    # Handle both direct list and {"personas": [...]} format
-    if isinstance(data, list):
-        return data
-    elif 'personas' in data:
-        return data['personas']
-    else:
-        raise ValueError("JSON must be a list or contain 'personas' key")
+    """Load personas from a JSON (list or {"personas": [...]}) or JSONL file"""
+    return list(iter_personas(filepath))
 
 
 def interactive_mode(generator: GeminiPhotoGenerator):
@@ -437,30 +1127,124 @@ def interactive_mode(generator: GeminiPhotoGenerator):
 
 def main():
     parser = argparse.ArgumentParser(description="Generate persona photos with Gemini API")
-    parser.add_argument('--api-key', required=True, help="Gemini API key")
-    parser.add_argument('--personas', help="JSON file with persona data")
+    parser.add_argument('--api-key', help="Gemini API key (comma-separate several to shard across projects)")
+    parser.add_argument('--api-keys-file',
+                        help=f"File with one API key per line; keys from --api-key and ${KEYS_ENV} are added")
+    parser.add_argument('--personas', help="JSON or JSONL file with persona data (streamed)")
+    parser.add_argument('--range', help="Only personas whose id is in this inclusive range (e.g. P011-P020)")
+    parser.add_argument('--ids', help="Only these persona ids (comma-separated)")
     parser.add_argument('--interactive', action='store_true', help="Interactive mode for single persona")
     parser.add_argument('--output-dir', default="generated_photos", help="Output directory")
-    parser.add_argument('--workers', type=int, default=3, help="Max parallel workers (default: 3)")
+    parser.add_argument('--workers', type=int, help="Max in-flight requests (default: paced by --rpm/--tpm only)")
+    parser.add_argument('--rpm', type=float, default=GeminiPhotoGenerator.DEFAULT_RPM,
+                        help=f"API requests-per-minute quota (default: {GeminiPhotoGenerator.DEFAULT_RPM})")
+    parser.add_argument('--tpm', type=float, default=GeminiPhotoGenerator.DEFAULT_TPM,
+                        help="API tokens-per-minute quota (default: not limited)")
+    parser.add_argument('--pool-size', type=int,
+                        help="Keep-alive HTTP connections to hold open (default: --workers or 10)")
+    parser.add_argument('--cache-dir', default=str(DEFAULT_CACHE_DIR), help="Result cache directory")
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help=f"Result cache size limit in MB (default: {DEFAULT_MAX_BYTES // 1024 ** 2})")
+    parser.add_argument('--no-cache', action='store_true', help="Disable the result cache")
+    parser.add_argument('--refresh', action='store_true', help="Regenerate all photos, updating the cache")
+    parser.add_argument('--max-attempts', type=int, default=5,
+                        help="Attempts per photo on 429/5xx/timeouts (default: 5)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip personas already completed in output-dir's batch journal")
+    parser.add_argument('--queue-size', type=int,
+                        help="Max personas submitted but not finished (default: 4x concurrency, min 64)")
+    parser.add_argument('--endpoint', help="Override the generateContent endpoint (e.g. mock_gemini_server.py)")
     parser.add_argument('--flash', action='store_true', help="Use Flash model (faster, 1024px)")
+    parser.add_argument('--timeout', type=float, default=GeminiPhotoGenerator.REQUEST_TIMEOUT,
+                        help=f"Seconds before a request is abandoned (default: {GeminiPhotoGenerator.REQUEST_TIMEOUT})")
+    parser.add_argument('--hedge', choices=['flash', 'duplicate'],
+                        help="Hedge requests slower than --hedge-percentile with a Flash (or duplicate) request; "
+                             "the first image wins")
+    parser.add_argument('--hedge-percentile', type=float, default=0.9,
+                        help="Observed-latency percentile that triggers a hedge (default: 0.9)")
+    parser.add_argument('--fallback-endpoint', help="Override the Flash endpoint used by --hedge flash")
+    parser.add_argument('--variants',
+                        help=f"Also write web-ready variants of each photo, comma-separated "
+                             "(e.g. card,thumb,retina; see VARIANTS in image_variants.py, needs Pillow)")
+    parser.add_argument('--variants-dir', help="Directory for variants (default: <output-dir>/web)")
+    parser.add_argument('--variant-workers', type=int, help="Post-processing processes (default: CPU count)")
+    parser.add_argument('--metrics-dir',
+                        help="Append per-request spans (spans.jsonl) and write a Prometheus snapshot "
+                             "(gemini_batch.prom) here")
+    parser.add_argument('--batch-mode', action='store_true',
+                        help="Submit all prompts as one Batch API job and poll for the results "
+                             "(half price, not interactive; rerun to pick up a pending job)")
+    parser.add_argument('--batch-poll', type=float, default=GeminiPhotoGenerator.BATCH_POLL_INTERVAL,
+                        help=f"First batch poll interval in seconds (default: {GeminiPhotoGenerator.BATCH_POLL_INTERVAL})")
+    parser.add_argument('--batch-max-wait', type=float,
+                        help="Stop polling after this many seconds; the job keeps running (default: wait)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Render prompts and cache keys and report what would be generated, without API calls")
     
     args = parser.parse_args()
     
+    api_keys = load_keys([args.api_key] if args.api_key else [], args.api_keys_file)
+    if not api_keys:
+        parser.error(f"An API key is required (--api-key, --api-keys-file or ${KEYS_ENV})")
+    
+    cache = None
+    if not args.no_cache:
+        cache = ImageCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 ** 2)
+    
     # Initialize generator
     generator = GeminiPhotoGenerator(
-        api_key=args.api_key,
+        api_key=api_keys[0],
+        api_keys=api_keys[1:],
         output_dir=args.output_dir,
-        use_pro=not args.flash
+        use_pro=not args.flash,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        pool_size=args.pool_size,
+        cache=cache,
+        refresh_cache=args.refresh,
+        retry_policy=RetryPolicy(max_attempts=args.max_attempts),
+        metrics_dir=args.metrics_dir,
+        request_timeout=args.timeout,
+        hedge=HedgePolicy(args.hedge_percentile, fallback=args.hedge == 'flash') if args.hedge else None
     )
     
+    if args.variants and not args.dry_run:
+        from image_variants import VariantPool
+        generator.variants = VariantPool(
+            args.variants_dir or Path(args.output_dir) / 'web',
+            args.variants,
+            workers=args.variant_workers
+        )
+    
+    if args.endpoint:
+        generator.endpoint = args.endpoint
+    if args.fallback_endpoint:
+        generator.fallback_endpoint = args.fallback_endpoint
+    
     # Run in appropriate mode
-    if args.interactive:
-        interactive_mode(generator)
-    elif args.personas:
-        personas = load_personas_from_file(args.personas)
-        generator.generate_batch(personas, max_workers=args.workers)
-    else:
-        parser.error("Either --personas or --interactive must be specified")
+    with generator:
+        if args.interactive:
+            interactive_mode(generator)
+        elif args.personas:
+            # Read lazily so large cohorts never sit in memory as a whole
+            personas = select_personas(
+                iter_personas(args.personas),
+                id_range=args.range,
+                ids=[i.strip() for i in args.ids.split(',') if i.strip()] if args.ids else None
+            )
+            if args.range or args.ids:
+                # A bounded selection fits in memory; listing it gives progress a total
+                personas = list(personas)
+            if args.dry_run:
+                generator.dry_run(personas)
+            elif args.batch_mode:
+                generator.generate_batch_job(personas, resume=args.resume, poll_interval=args.batch_poll,
+                                             max_wait=args.batch_max_wait, keep_results=False)
+            else:
+                generator.generate_batch(personas, max_workers=args.workers, resume=args.resume,
+                                         queue_size=args.queue_size, keep_results=False)
+        else:
+            parser.error("Either --personas or --interactive must be specified")
 
 
 if __name__ == "__main__":
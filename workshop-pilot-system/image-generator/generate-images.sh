@@ -39,7 +39,7 @@ case $CHOICE in
         WORKERS=3
         echo "📊 Mode: Batch 1 (P001-P010)"
         echo "⚠️  Note: Will generate first 10 personas only"
-        # TODO: 10명만 추출하는 로직 필요
+        RANGE="P001-P010"
         ;;
     3)
         PERSONAS_FILE="../2-personas/personas.json"
@@ -47,7 +47,7 @@ case $CHOICE in
         WORKERS=3
         echo "📊 Mode: Batch 2 (P011-P020)"
         echo "⚠️  Note: Will generate personas 11-20 only"
-        # TODO: 11-20번 추출하는 로직 필요
+        RANGE="P011-P020"
         ;;
     4)
         PERSONAS_FILE="../2-personas/personas.json"
@@ -55,7 +55,7 @@ case $CHOICE in
         WORKERS=3
         echo "📊 Mode: Batch 3 (P021-P030)"
         echo "⚠️  Note: Will generate personas 21-30 only"
-        # TODO: 21-30번 추출하는 로직 필요
+        RANGE="P021-P030"
         ;;
     5)
         PERSONAS_FILE="../2-personas/personas.json"
@@ -82,12 +82,19 @@ echo ""
 echo "🚀 Starting generation..."
 echo ""
 
+# 배치 모드는 ID 범위만 생성 (파일은 스트리밍으로 읽음)
+EXTRA_ARGS=()
+if [ -n "$RANGE" ]; then
+    EXTRA_ARGS+=(--range "$RANGE")
+fi
+
 # 실행
 python3 gemini_api.py \
     --api-key "$API_KEY" \
     --personas "$PERSONAS_FILE" \
     --output-dir "$OUTPUT_DIR" \
-    --workers $WORKERS
+    --workers $WORKERS \
+    "${EXTRA_ARGS[@]}"
 
 # API 키 변수 정리
 unset API_KEY
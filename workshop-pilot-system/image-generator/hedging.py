@@ -0,0 +1,148 @@
+"""
+Hedged requests for long-tail image latency
+
+A request still running after a high percentile of recently observed
+latencies is probably a straggler. HedgePolicy tracks those latencies and
+decides when to launch a second request - a duplicate, or the same prompt on
+a faster fallback model - and `race` runs both, keeps whichever finishes
+first and cancels the other. Hedges are capped at a fraction of requests so
+a slow API does not double the quota spent.
+
+Used by gemini_api.py (--hedge).
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+PRIMARY = 'primary'
+BACKUP = 'backup'
+
+
+class HedgePolicy:
+    """When to launch a backup request, learned from observed latencies"""
+
+    def __init__(self, percentile: float = 0.9, fallback: bool = True, initial_delay: float = 45.0,
+                 min_delay: float = 1.0, min_samples: int = 8, window: int = 256,
+                 max_ratio: float = 0.15, min_hedges: int = 2):
+        """
+        Initialize policy
+
+        Args:
+            percentile: Latency percentile after which a request is hedged
+            fallback: Hedge on the fallback (Flash) model instead of duplicating the request
+            initial_delay: Hedge delay until `min_samples` latencies are observed
+            min_delay: Shortest hedge delay
+            min_samples: Observations needed before the percentile is trusted
+            window: Most recent latencies kept
+            max_ratio: Hedges allowed per started request
+            min_hedges: Hedges allowed regardless of batch size
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.fallback = fallback
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.min_hedges = min_hedges
+        self.latencies = deque(maxlen=window)
+        self.requests = 0
+        self.hedged = 0
+        self.backup_wins = 0
+
+    def observe(self, seconds: float):
+        """Record how long a primary request ran (a lower bound when it lost a race)"""
+        self.latencies.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        """
+        Seconds to wait before hedging the request being started
+
+        Returns:
+            Delay, or None when the hedge budget is spent
+        """
+        self.requests += 1
+        if self.hedged >= max(self.min_hedges, math.floor(self.requests * self.max_ratio)):
+            return None
+        if len(self.latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
+
+    def summary(self) -> str:
+        """One-line description of the hedges sent so far"""
+        target = "fallback model" if self.fallback else "duplicate"
+        return (f"⚡ Hedged {self.hedged}/{self.requests} requests past p{self.percentile * 100:g} "
+                f"({target}), backup won {self.backup_wins}")
+
+
+async def race(primary: Awaitable, start_backup: Callable[[], Awaitable],
+               delay: Optional[float], policy: Optional[HedgePolicy] = None) -> Tuple[Any, str]:
+    """
+    Await `primary`, starting a backup if it is still running after `delay`
+
+    The first of the two to succeed wins and the other is cancelled. A failure
+    only counts once both have failed; if they finish together the primary wins.
+    The primary's run time goes to the policy whatever the outcome; when the
+    backup wins it counts as at least `delay`, so stragglers still raise the
+    percentile instead of dropping out of it.
+
+    Args:
+        primary: Original request
+        start_backup: Creates the backup request
+        delay: Seconds before hedging (None never hedges)
+        policy: Policy whose latencies and hedge counters are updated
+
+    Returns:
+        (result, PRIMARY or BACKUP)
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    def observe(at_least: float = 0.0):
+        if policy is not None:
+            policy.observe(max(at_least, loop.time() - started))
+
+    first = asyncio.ensure_future(primary)
+    try:
+        # Without a delay this waits for the primary alone
+        done, _ = await asyncio.wait({first}, timeout=delay)
+    except BaseException:
+        first.cancel()
+        raise
+    if done:
+        observe()
+        return first.result(), PRIMARY
+
+    if policy is not None:
+        policy.hedged += 1
+    labels = {first: PRIMARY, asyncio.ensure_future(start_backup()): BACKUP}
+    pending = set(labels)
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if first in done:
+                observe()
+            for task in sorted(done, key=lambda t: labels[t] != PRIMARY):
+                if task.cancelled():
+                    error = error or asyncio.CancelledError()
+                    continue
+                if task.exception() is None:
+                    if labels[task] == BACKUP:
+                        if not first.done():
+                            observe(delay)
+                        if policy is not None:
+                            policy.backup_wins += 1
+                    return task.result(), labels[task]
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,167 @@
+"""
+Content-addressed on-disk cache for generated photos
+
+Images are stored under a hash of (endpoint, prompt, generationConfig), so a
+byte-identical request is served by hard-linking (or copying) the stored
+file instead of calling the API. Total size is bounded with LRU eviction.
+
+Cached files share their inode with the outputs linked to them, so access
+times are kept in a sidecar (access.json) instead of file mtimes - touching
+the file would change the outputs' mtime and defeat OutputManifest's
+freshness check.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+from inline_stream import atomic_output
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'gemini-persona-photos'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ACCESS_FILENAME = 'access.json'
+
+
+class ImageCache:
+    """Size-bounded LRU cache of generated images keyed by request content"""
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initialize cache
+
+        Args:
+            cache_dir: Directory holding cached images
+            max_bytes: Total size above which least recently used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.access_path = self.cache_dir / ACCESS_FILENAME
+        # key -> (size, last access time); files never accessed since they were stored use their mtime
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        self._dirty = False
+        try:
+            with open(self.access_path, 'r', encoding='utf-8') as f:
+                accessed = json.load(f)
+        except (FileNotFoundError, ValueError):
+            accessed = {}
+        for path in self.cache_dir.glob('*.png'):
+            stat = path.stat()
+            self._entries[path.stem] = (stat.st_size, accessed.get(path.stem, stat.st_mtime))
+
+    @staticmethod
+    def make_key(endpoint: str, prompt: str, generation_config: Dict) -> str:
+        """
+        Hash the request fields that determine the generated image
+
+        Args:
+            endpoint: Model endpoint URL
+            prompt: Prompt text
+            generation_config: generationConfig block of the request
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        canonical = json.dumps(
+            {'endpoint': endpoint, 'prompt': prompt, 'generationConfig': generation_config},
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for size, _ in self._entries.values())
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` is cached (without touching its LRU position)"""
+        with self._lock:
+            return key in self._entries and self._path(key).exists()
+
+    def get(self, key: str, dest: Union[str, Path]) -> bool:
+        """
+        Materialize a cached image at `dest`
+
+        Args:
+            key: Cache key from make_key()
+            dest: Output path to link or copy the cached image to
+
+        Returns:
+            True on a cache hit
+        """
+        path = self._path(key)
+        with self._lock:
+            if key not in self._entries or not path.exists():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return False
+            self._entries[key] = (self._entries[key][0], time.time())
+            self._dirty = True
+            self.hits += 1
+        _link_or_copy(path, Path(dest))
+        return True
+
+    def put(self, key: str, src: Union[str, Path]):
+        """
+        Store a freshly generated image under `key` and evict if over budget
+
+        Args:
+            key: Cache key from make_key()
+            src: Generated image file
+        """
+        path = self._path(key)
+        _link_or_copy(Path(src), path)
+        stat = path.stat()
+        with self._lock:
+            self._entries[key] = (stat.st_size, time.time())
+            self._dirty = True
+            self._evict()
+
+    def save(self):
+        """Write access times to the sidecar if they changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            accessed = {key: at for key, (_, at) in self._entries.items()}
+            self._dirty = False
+        with atomic_output(self.access_path) as f:
+            f.write(json.dumps(accessed, separators=(',', ':')).encode('utf-8'))
+
+    def _evict(self):
+        total = self.total_bytes
+        if total <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            del self._entries[key]
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _link_or_copy(src: Path, dest: Path):
+    """Hard-link `src` to `dest`, falling back to an atomic copy across devices"""
+    tmp = dest.with_name(f".{dest.name}.link")
+    try:
+        if tmp.exists():
+            tmp.unlink()
+        os.link(src, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        if tmp.exists():
+            tmp.unlink()
+        with open(src, 'rb') as fsrc, atomic_output(dest) as fdst:
+            shutil.copyfileobj(fsrc, fdst)
@@ -0,0 +1,346 @@
+"""
+Web-ready image variants
+
+Generated photos are multi-megabyte PNGs; pages need small JPEG/WebP files.
+Each finished image is decoded once in a worker process and written out as
+a configured set of resized variants (card, thumbnail, retina), each with a
+quality and an optional byte budget. variants.json in the output directory
+records every variant's dimensions and byte size, plus the source's size and
+mtime so unchanged sources are skipped on the next run.
+
+Used by gemini_api.py (--variants) and
+profilecard/scripts/generate_persona_photos.py; run directly to convert an
+existing folder:
+
+    python image_variants.py generated_photos/full --out generated_photos/full/web
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp', 'AVIF': '.avif'}
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True, 'progressive': True},
+    'WEBP': {'method': 4},
+    'AVIF': {},
+}
+# Lowest quality tried when shrinking a variant to fit its byte budget
+MIN_QUALITY = 50
+
+
+@dataclass(frozen=True)
+class Variant:
+    """One output size/format of every source image"""
+
+    name: str
+    width: int                       # target width; height follows the source aspect ratio
+    format: str                      # 'JPEG', 'WEBP' or 'AVIF'
+    quality: int = 82
+    max_bytes: Optional[int] = None  # lower quality (down to MIN_QUALITY) until the file fits
+    suffix: str = ''                 # appended to the source stem, e.g. '.thumb'
+
+    def filename(self, stem: str) -> str:
+        return f"{stem}{self.suffix}{EXTENSIONS[self.format]}"
+
+
+VARIANTS = {
+    # What PersonaCard loads (/images/personas/<id>.jpg), ~100 KB
+    'card': Variant('card', 768, 'JPEG', quality=85, max_bytes=120 * 1024),
+    'card-webp': Variant('card-webp', 768, 'WEBP', quality=80),
+    'card-avif': Variant('card-avif', 768, 'AVIF', quality=60),
+    # 160 CSS px photo slot at 1x and 2x
+    'thumb': Variant('thumb', 160, 'WEBP', quality=80, suffix='.thumb'),
+    'retina': Variant('retina', 320, 'WEBP', quality=80, suffix='@2x'),
+}
+DEFAULT_VARIANTS = ('card', 'thumb', 'retina')
+
+
+def resolve_variants(names: Union[str, Iterable[str]]) -> List[Variant]:
+    """
+    Look up variants by name
+
+    Args:
+        names: Comma-separated string or iterable of VARIANTS keys
+
+    Returns:
+        Variants, largest first
+    """
+    if isinstance(names, str):
+        names = [n.strip() for n in names.split(',') if n.strip()]
+    unknown = [n for n in names if n not in VARIANTS]
+    if unknown:
+        raise ValueError(f"Unknown image variant(s): {', '.join(unknown)} (available: {', '.join(VARIANTS)})")
+    Image.init()
+    unsupported = [n for n in names if VARIANTS[n].format not in Image.SAVE]
+    if unsupported:
+        raise ValueError(f"This Pillow build cannot write {', '.join(unsupported)}")
+    return sorted((VARIANTS[n] for n in dict.fromkeys(names)), key=lambda v: -v.width)
+
+
+def encode(image: Image.Image, variant: Variant) -> Tuple[bytes, int]:
+    """
+    Encode at the variant's quality, lowering it until max_bytes is met
+
+    Returns:
+        (encoded bytes, quality used)
+    """
+    def at(quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, variant.format, quality=quality, **SAVE_OPTIONS[variant.format])
+        return buffer.getvalue()
+
+    data = at(variant.quality)
+    if variant.max_bytes is None or len(data) <= variant.max_bytes:
+        return data, variant.quality
+
+    # Binary search for the highest quality that fits
+    best, best_quality = None, MIN_QUALITY
+    low, high = MIN_QUALITY, variant.quality - 1
+    while low <= high:
+        quality = (low + high) // 2
+        candidate = at(quality)
+        if len(candidate) <= variant.max_bytes:
+            best, best_quality = candidate, quality
+            low = quality + 1
+        else:
+            high = quality - 1
+    return (best, best_quality) if best is not None else (at(MIN_QUALITY), MIN_QUALITY)
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def process_image(source: str, out_dir: str, variants: Sequence[Variant]) -> Dict:
+    """
+    Decode `source` once and write every variant into `out_dir`
+
+    Runs in a worker process.
+
+    Args:
+        source: Generated image path
+        out_dir: Directory for the variants
+        variants: Variants to write
+
+    Returns:
+        Manifest entry: source size/mtime/dimensions and per-variant
+        file, format, width, height, bytes, quality
+    """
+    source_path = Path(source)
+    stat = source_path.stat()
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    with Image.open(source_path) as image:
+        width, height = image.size
+        # JPEG sources (e.g. placeholder photos) can decode straight at reduced scale
+        largest = max(v.width for v in variants)
+        image.draft('RGB', (largest, largest * height // width))
+        pixels = image.convert('RGB')
+
+    entry = {
+        'source': {'width': width, 'height': height, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns},
+        'variants': {},
+    }
+    for variant in variants:
+        target_width = min(variant.width, pixels.width)
+        target = (target_width, max(1, round(pixels.height * target_width / pixels.width)))
+        resized = pixels if target == pixels.size else pixels.resize(
+            target, Image.LANCZOS, reducing_gap=3.0
+        )
+        data, quality = encode(resized, variant)
+        filename = variant.filename(source_path.stem)
+        if (out_path / filename).resolve() == source_path.resolve():
+            raise ValueError(f"Variant '{variant.name}' would overwrite its source {source}")
+        _write_atomic(out_path / filename, data)
+        entry['variants'][variant.name] = {
+            'file': filename,
+            'format': variant.format,
+            'width': target[0],
+            'height': target[1],
+            'bytes': len(data),
+            'quality': quality,
+            'spec': asdict(variant),
+        }
+    return entry
+
+
+class VariantPool:
+    """Post-process finished images in a process pool while generation continues"""
+
+    MANIFEST = 'variants.json'
+
+    def __init__(self, out_dir: Union[str, Path], variants: Union[str, Iterable[str]] = DEFAULT_VARIANTS,
+                 workers: Optional[int] = None):
+        """
+        Initialize pool
+
+        Args:
+            out_dir: Directory for variants and variants.json
+            variants: Variant names (see VARIANTS)
+            workers: Worker processes (default: CPU count)
+        """
+        self.out_dir = Path(out_dir)
+        self.variants = resolve_variants(variants)
+        self.manifest_path = self.out_dir / self.MANIFEST
+        self.entries: Dict[str, Dict] = {}
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+        # spawn: workers must not inherit the event loop / connection threads of the parent
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self._lock = threading.Lock()
+        self._pending: Dict[Future, str] = {}
+        self._dirty = False
+        self.processed = 0
+        self.skipped = 0
+        self.source_bytes = 0
+        self.output_bytes = 0
+        self.errors: Dict[str, str] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def is_fresh(self, source: Path) -> bool:
+        """Whether `source` is unchanged and all its current variants exist"""
+        entry = self.entries.get(source.name)
+        if entry is None:
+            return False
+        try:
+            stat = source.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry['source'].get('size') or stat.st_mtime_ns != entry['source'].get('mtime_ns'):
+            return False
+        recorded = entry.get('variants', {})
+        return all(
+            v.name in recorded and recorded[v.name].get('spec') == asdict(v)
+            and (self.out_dir / recorded[v.name]['file']).exists()
+            for v in self.variants
+        )
+
+    def submit(self, source: Union[str, Path]) -> Optional[Future]:
+        """
+        Queue `source` for post-processing (non-blocking)
+
+        Returns:
+            Future of the manifest entry, or None if its variants are up to date
+        """
+        source = Path(source)
+        if self.is_fresh(source):
+            self.skipped += 1
+            return None
+        future = self.executor.submit(process_image, str(source), str(self.out_dir), self.variants)
+        with self._lock:
+            self._pending[future] = source.name
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future):
+        with self._lock:
+            name = self._pending.pop(future)
+            try:
+                entry = future.result()
+            except Exception as e:
+                self.errors[name] = str(e)
+                print(f"⚠️  Variants failed for {name}: {e}")
+                return
+            self.entries[name] = entry
+            self._dirty = True
+            self.processed += 1
+            self.source_bytes += entry['source']['size']
+            self.output_bytes += sum(v['bytes'] for v in entry['variants'].values())
+
+    def drain(self) -> Dict:
+        """
+        Wait for queued images and save the manifest
+
+        Returns:
+            Counts and byte totals since the pool was created
+        """
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                break
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass  # reported by _on_done
+        self.save()
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'failed': len(self.errors),
+            'source_bytes': self.source_bytes,
+            'output_bytes': self.output_bytes,
+        }
+
+    def summary(self) -> str:
+        """One-line description of the work done so far"""
+        line = f"🖼️  Variants: {self.processed} images → {len(self.variants)} sizes each in {self.out_dir}"
+        if self.processed:
+            line += f" ({self.source_bytes / 1024 ** 2:.1f} MB → {self.output_bytes / 1024:.0f} KB)"
+        if self.skipped:
+            line += f", {self.skipped} up to date"
+        if self.errors:
+            line += f", {len(self.errors)} failed"
+        return line
+
+    def save(self):
+        """Write variants.json atomically if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            data = json.dumps(self.entries, indent=2, ensure_ascii=False, sort_keys=True)
+            self._dirty = False
+        _write_atomic(self.manifest_path, data.encode('utf-8'))
+
+    def close(self):
+        """Finish queued work and stop the worker processes"""
+        self.drain()
+        self.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write web-ready variants of generated images")
+    parser.add_argument('source_dir', help="Directory of generated images")
+    parser.add_argument('--out', help="Output directory (default: <source_dir>/web)")
+    parser.add_argument('--pattern', default='*.png', help="Source file glob (default: *.png)")
+    parser.add_argument('--variants', default=','.join(DEFAULT_VARIANTS),
+                        help=f"Comma-separated variants (available: {', '.join(VARIANTS)})")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    sources = sorted(Path(args.source_dir).glob(args.pattern))
+    print(f"🖼️  Processing {len(sources)} images from {args.source_dir}...")
+    with VariantPool(args.out or Path(args.source_dir) / 'web', args.variants, workers=args.workers) as pool:
+        for source in sources:
+            pool.submit(source)
+        pool.drain()
+        print(pool.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Streaming extraction of inlineData images from generateContent responses
+
+Finds the first `inlineData.data` field in a JSON byte stream and
+base64-decodes it chunk by chunk into a temp file that is atomically
+renamed into place, so peak memory stays constant regardless of image size.
+"""
+
+import base64
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterable, BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+CHUNK_SIZE = 64 * 1024
+
+_INLINE_KEY = b'"inlineData"'
+_DATA_KEY = re.compile(rb'"data"\s*:\s*"')
+# Longest suffix that could still be the start of a key split across chunks
+_KEEP_TAIL = 64
+# JSON may escape '/' as '\/'; base64 contains no other escapable characters
+_STRIP = b'\\\r\n\t '
+
+
+class InlineDataDecoder:
+    """Incrementally decode the first inlineData.data field of a JSON stream"""
+
+    SEEK_INLINE, SEEK_DATA, DATA, DONE = range(4)
+
+    def __init__(self, out: BinaryIO):
+        """
+        Initialize decoder
+
+        Args:
+            out: Binary file object receiving the decoded image bytes
+        """
+        self.out = out
+        self.state = self.SEEK_INLINE
+        self.bytes_written = 0
+        # Time spent base64-decoding and writing, reported as span phases
+        self.decode_seconds = 0.0
+        self.write_seconds = 0.0
+        self._buf = b''
+
+    @property
+    def found(self) -> bool:
+        """Whether a complete inlineData.data field has been decoded"""
+        return self.state == self.DONE
+
+    def feed(self, chunk: bytes):
+        """Consume the next chunk of the response body"""
+        if self.state == self.DONE:
+            return
+        self._buf += chunk
+
+        if self.state == self.SEEK_INLINE:
+            idx = self._buf.find(_INLINE_KEY)
+            if idx < 0:
+                self._buf = self._buf[-_KEEP_TAIL:]
+                return
+            self._buf = self._buf[idx + len(_INLINE_KEY):]
+            self.state = self.SEEK_DATA
+
+        if self.state == self.SEEK_DATA:
+            match = _DATA_KEY.search(self._buf)
+            if match is None:
+                self._buf = self._buf[-_KEEP_TAIL:]
+                return
+            self._buf = self._buf[match.end():]
+            self.state = self.DATA
+
+        end = self._buf.find(b'"')
+        if end >= 0:
+            self._write(self._buf[:end].translate(None, _STRIP), final=True)
+            self._buf = b''
+            self.state = self.DONE
+        else:
+            self._buf = self._write(self._buf.translate(None, _STRIP), final=False)
+
+    def _write(self, encoded: bytes, final: bool) -> bytes:
+        """Decode whole 4-character groups and return the undecoded remainder"""
+        usable = len(encoded) if final else len(encoded) - len(encoded) % 4
+        if usable:
+            start = time.perf_counter()
+            decoded = base64.b64decode(encoded[:usable])
+            decoded_at = time.perf_counter()
+            self.out.write(decoded)
+            self.decode_seconds += decoded_at - start
+            self.write_seconds += time.perf_counter() - decoded_at
+            self.bytes_written += len(decoded)
+        return encoded[usable:]
+
+
+@contextmanager
+def atomic_output(dest: Union[str, Path]) -> Iterator[BinaryIO]:
+    """
+    Open a temp file next to `dest` and rename it into place on success
+
+    The temp file is removed if the block raises.
+    """
+    dest = Path(dest)
+    fd, tmp_path = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.", suffix=".part")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+        # mkstemp creates 0600 files; match what a plain open() would produce
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _report_timings(decoder: InlineDataDecoder, finalize: float, timings: Optional[Dict[str, float]]):
+    if timings is not None:
+        timings['decode'] = timings.get('decode', 0.0) + decoder.decode_seconds
+        timings['write'] = (timings.get('write', 0.0) + decoder.write_seconds
+                            + time.perf_counter() - finalize)
+
+
+class NoInlineData(Exception):
+    """Response stream did not contain an inlineData image"""
+
+
+def stream_inline_image(chunks: Iterable[bytes], dest: Union[str, Path],
+                        timings: Optional[Dict[str, float]] = None) -> int:
+    """
+    Decode the inlineData image from a response byte stream into `dest`
+
+    Args:
+        chunks: Iterable of response body chunks
+        dest: Final image path
+        timings: If given, receives 'decode' and 'write' seconds (write
+                 includes flushing and renaming the file into place)
+
+    Returns:
+        Number of image bytes written
+
+    Raises:
+        NoInlineData: If the stream ended without an image
+    """
+    with atomic_output(dest) as f:
+        decoder = InlineDataDecoder(f)
+        for chunk in chunks:
+            decoder.feed(chunk)
+        if not decoder.found:
+            raise NoInlineData("No image data in response")
+        finalize = time.perf_counter()
+    _report_timings(decoder, finalize, timings)
+    return decoder.bytes_written
+
+
+async def stream_inline_image_async(chunks: AsyncIterable[bytes], dest: Union[str, Path],
+                                    timings: Optional[Dict[str, float]] = None) -> int:
+    """Async variant of stream_inline_image for aiohttp response streams"""
+    with atomic_output(dest) as f:
+        decoder = InlineDataDecoder(f)
+        async for chunk in chunks:
+            decoder.feed(chunk)
+        if not decoder.found:
+            raise NoInlineData("No image data in response")
+        finalize = time.perf_counter()
+    _report_timings(decoder, finalize, timings)
+    return decoder.bytes_written
+
+
+def write_inline_image(response: Dict, dest: Union[str, Path]) -> int:
+    """
+    Write the first inlineData image of an already parsed response to `dest`
+
+    Used for Batch API results, which arrive as one JSON document per request.
+
+    Returns:
+        Number of image bytes written
+
+    Raises:
+        NoInlineData: If the response holds no image
+    """
+    for candidate in response.get('candidates') or []:
+        for part in (candidate.get('content') or {}).get('parts') or []:
+            data = (part.get('inlineData') or {}).get('data')
+            if data:
+                image = base64.b64decode(data)
+                with atomic_output(dest) as f:
+                    f.write(image)
+                return len(image)
+    raise NoInlineData("No image data in response")
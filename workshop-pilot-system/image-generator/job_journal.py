@@ -0,0 +1,121 @@
+"""
+Append-only job journal for resumable batch runs
+
+Each state change of a persona is appended as one JSON line to
+`batch_journal.jsonl` in the output directory. The last line for a persona
+wins, so a crashed or interrupted batch can be resumed by skipping entries
+whose last state is `done`, whose file still matches the recorded hash and
+whose prompt hash (as recorded in OutputManifest) matches the current
+request - a persona whose prompt changed since is generated again.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class JobJournal:
+    """JSONL journal of per-persona batch states"""
+
+    FILENAME = 'batch_journal.jsonl'
+
+    def __init__(self, output_dir: Union[str, Path]):
+        """
+        Initialize journal
+
+        Args:
+            output_dir: Batch output directory holding the journal file
+        """
+        self.path = Path(output_dir) / self.FILENAME
+        self._file = None
+
+    def load(self) -> Dict[str, Dict]:
+        """
+        Replay the journal
+
+        Returns:
+            Last recorded entry for each persona name
+        """
+        entries = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a torn last line
+                    continue
+                entries[entry['persona']] = entry
+        return entries
+
+    def completed(self) -> Dict[str, Dict]:
+        """
+        Entries whose last state is done and whose file is still intact
+
+        Returns:
+            Mapping of persona name to its `done` entry
+        """
+        completed = {}
+        for name, entry in self.load().items():
+            if entry['state'] != DONE:
+                continue
+            filename = entry.get('filename')
+            if filename and Path(filename).exists() and file_sha256(filename) == entry.get('sha256'):
+                completed[name] = entry
+        return completed
+
+    def record(self, persona_name: str, state: str, filename: Optional[str] = None,
+               sha256: Optional[str] = None, error: Optional[str] = None,
+               prompt_hash: Optional[str] = None):
+        """
+        Append a state change for a persona
+
+        Args:
+            persona_name: Persona name (result dict key)
+            state: One of pending / in_flight / done / failed
+            filename: Output file (done)
+            sha256: Output file hash (done)
+            error: Error message (failed)
+            prompt_hash: Prompt hash the output was produced with (done)
+        """
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        entry = {'persona': persona_name, 'state': state, 'ts': round(time.time(), 3)}
+        if filename is not None:
+            entry['filename'] = filename
+        if sha256 is not None:
+            entry['sha256'] = sha256
+        if error is not None:
+            entry['error'] = error
+        if prompt_hash is not None:
+            entry['prompt_hash'] = prompt_hash
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    @staticmethod
+    def is_current(entry: Dict, digest: str) -> bool:
+        """Whether a done entry was produced by the request hashing to `digest`"""
+        return entry.get('prompt_hash') == digest
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
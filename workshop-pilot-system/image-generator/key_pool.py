@@ -0,0 +1,180 @@
+"""
+API key pool for sharding batches across projects
+
+Each key (one per Google Cloud project) has its own quota, so each gets its
+own RateLimiter and health state. Every request takes quota from the key
+with the most headroom - the shortest expected wait for its rate limiter -
+and reports back how the request went. A key answering 401/403 is ejected
+for good; one that keeps answering 429 is benched for a cooldown that
+doubles each time, while the other keys carry the batch.
+
+Keys come from --api-key, --api-keys-file (one per line) or the
+GEMINI_API_KEYS environment variable (comma-separated).
+
+Used by gemini_api.py.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from rate_limiter import RateLimiter
+from retry_policy import RequestFailed, error_status
+
+KEYS_ENV = 'GEMINI_API_KEYS'
+
+REJECTED_STATUS = frozenset({401, 403})
+
+
+class KeysExhausted(RequestFailed):
+    """Every key in the pool has been rejected"""
+
+
+def is_rejection(exc: BaseException) -> bool:
+    """Whether a failure means the key itself is invalid or revoked"""
+    return error_status(exc) in REJECTED_STATUS
+
+
+def mask_key(key: str) -> str:
+    """Printable form of a key: its last four characters"""
+    return f"…{key[-4:]}"
+
+
+def load_keys(keys: Iterable[str] = (), keys_file: Optional[Union[str, Path]] = None,
+              env: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Collect API keys from arguments, a keys file and the environment
+
+    Args:
+        keys: Keys given directly (each may be a comma-separated list)
+        keys_file: File with one key per line ('#' starts a comment)
+        env: Environment to read GEMINI_API_KEYS from (default: os.environ)
+
+    Returns:
+        Unique keys, in the order found
+    """
+    found = []
+    for value in keys:
+        found.extend(value.split(','))
+    if keys_file is not None:
+        with open(keys_file, 'r', encoding='utf-8') as f:
+            found.extend(line.split('#', 1)[0] for line in f)
+    found.extend((env if env is not None else os.environ).get(KEYS_ENV, '').split(','))
+    return list(dict.fromkeys(key.strip() for key in found if key.strip()))
+
+
+class ApiKey:
+    """One key with its own rate limiter and health state"""
+
+    def __init__(self, key: str, limiter: RateLimiter, max_throttles: int, cooldown: float):
+        self.key = key
+        self.label = mask_key(key)
+        self.limiter = limiter
+        self.max_throttles = max_throttles
+        self.cooldown = cooldown
+        self.rejected = False
+        self.benched_until = 0.0
+        self.throttle_streak = 0
+        self.benchings = 0
+        self.waiting = 0
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'errors': 0}
+
+    @property
+    def usable(self) -> bool:
+        return not self.rejected and time.monotonic() >= self.benched_until
+
+    def expected_wait(self) -> float:
+        """Seconds until this key's next request could start, counting queued requests"""
+        bucket = self.limiter.requests
+        return max(0.0, (1 + self.waiting - bucket.available) / bucket.rate)
+
+    def report(self, exc: Optional[BaseException] = None):
+        """Record the outcome of a request sent with this key"""
+        if exc is None:
+            self.stats['ok'] += 1
+            self.throttle_streak = 0
+            return
+        status = error_status(exc)
+        if is_rejection(exc):
+            self.stats['errors'] += 1
+            if not self.rejected:
+                self.rejected = True
+                print(f"   🔑 Key {self.label} rejected ({status}) - removed from the pool")
+        elif status == 429:
+            self.stats['throttled'] += 1
+            self.throttle_streak += 1
+            if self.throttle_streak >= self.max_throttles and self.usable:
+                pause = self.cooldown * 2 ** self.benchings
+                self.benchings += 1
+                self.throttle_streak = 0
+                self.benched_until = time.monotonic() + pause
+                print(f"   🔑 Key {self.label} throttled {self.max_throttles}x in a row - benched for {pause:.0f}s")
+        else:
+            self.stats['errors'] += 1
+
+
+class KeyPool:
+    """Per-key rate limiters; each request goes to the key with the most headroom"""
+
+    def __init__(self, keys: Iterable[str], requests_per_minute: float,
+                 tokens_per_minute: Optional[float] = None, max_throttles: int = 3, cooldown: float = 60.0):
+        """
+        Initialize pool
+
+        Args:
+            keys: API keys, one per project
+            requests_per_minute: Request quota of each key
+            tokens_per_minute: Token quota of each key (None to ignore tokens)
+            max_throttles: Consecutive 429s before a key is benched
+            cooldown: First bench duration in seconds (doubles on each benching)
+        """
+        self.keys = [
+            ApiKey(key, RateLimiter(requests_per_minute, tokens_per_minute), max_throttles, cooldown)
+            for key in dict.fromkeys(keys)
+        ]
+        if not self.keys:
+            raise ValueError("At least one API key is required")
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    async def acquire(self, tokens: int = 0) -> ApiKey:
+        """
+        Wait for quota on the key with the most headroom
+
+        Returns:
+            Key to send the request with; pass the outcome to its report()
+
+        Raises:
+            KeysExhausted: If every key has been rejected
+        """
+        while True:
+            live = [k for k in self.keys if not k.rejected]
+            if not live:
+                raise KeysExhausted("All API keys were rejected (401/403)", status=401)
+            usable = [k for k in live if k.usable]
+            if usable:
+                break
+            # Every key is benched: wait for the first to come back
+            await asyncio.sleep(min(k.benched_until for k in live) - time.monotonic())
+
+        key = min(usable, key=ApiKey.expected_wait)
+        key.waiting += 1
+        try:
+            await key.limiter.acquire(tokens)
+        finally:
+            key.waiting -= 1
+        key.stats['requests'] += 1
+        return key
+
+    def summary(self) -> str:
+        """Per-key request counts and health"""
+        lines = [f"🔑 {len(self.keys)} API keys"]
+        for key in self.keys:
+            state = 'rejected' if key.rejected else 'benched' if not key.usable else 'ok'
+            stats = key.stats
+            lines.append(f"   {key.label}: {stats['requests']} requests, {stats['ok']} ok, "
+                         f"{stats['throttled']} throttled, {stats['errors']} errors ({state})")
+        return '\n'.join(lines)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the Gemini generateContent API
+
+Serves the same response shape gemini_api.py consumes (candidates → content →
+parts → inlineData) with a configurable latency distribution, 429/5xx
+injection and image payload size, so the image pipelines can be measured
+without spending API quota. The Batch API endpoints used by --batch-mode
+(Files API upload, :batchGenerateContent, batch polling and the responses
+file download) are faked in memory; jobs finish after --batch-latency and
+return a responses file, or inline responses with --batch-inline.
+Individual API keys can be made to fail (--reject-keys, --throttle-keys) to
+exercise key pools.
+
+Usage:
+    python mock_gemini_server.py --port 8089 --image-size 1K --error-429 0.1
+    python gemini_api.py --api-key test --personas personas-test.json \\
+        --endpoint http://127.0.0.1:8089/v1beta/models/mock-image:generateContent
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aiohttp import web
+
+# Approximate PNG size of one generated image, by imageConfig.imageSize
+PAYLOAD_BYTES = {
+    "1K": 1_500_000,
+    "2K": 5_000_000,
+    "4K": 15_000_000,
+}
+
+
+class MockGeminiServer:
+    """aiohttp server imitating :generateContent with injected latency and errors"""
+
+    def __init__(self, port: int = 0, host: str = "127.0.0.1", image_size: Optional[str] = None,
+                 latency_median: float = 1.0, latency_sigma: float = 0.5,
+                 error_429: float = 0.0, error_5xx: float = 0.0, retry_after: Optional[float] = 1.0,
+                 batch_latency: float = 5.0, rejected_keys: Iterable[str] = (),
+                 throttled_keys: Iterable[str] = (), batch_inline: bool = False,
+                 failed_batch_keys: Iterable[str] = (), seed: Optional[int] = None):
+        """
+        Initialize server
+
+        Args:
+            port: Port to listen on (0 picks a free port)
+            host: Interface to bind
+            image_size: Force a payload size class ("1K", "2K", "4K"); None follows the
+                        request's imageConfig.imageSize
+            latency_median: Median response latency in seconds
+            latency_sigma: Log-normal sigma of the latency (0 for constant latency)
+            error_429: Fraction of requests answered with 429
+            error_5xx: Fraction of requests answered with 503
+            retry_after: Retry-After seconds sent with 429s (None to omit)
+            batch_latency: Seconds a batch job stays RUNNING before it succeeds
+            rejected_keys: API keys answered with 401
+            throttled_keys: API keys always answered with 429
+            batch_inline: Return batch results inline in the job instead of as a responses file
+            failed_batch_keys: Batch request keys always answered with a per-request error
+            seed: Random seed for reproducible runs
+        """
+        self.host = host
+        self.port = port
+        self.image_size = image_size
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.retry_after = retry_after
+        self.batch_latency = batch_latency
+        self.rejected_keys = frozenset(rejected_keys)
+        self.throttled_keys = frozenset(throttled_keys)
+        self.batch_inline = batch_inline
+        self.failed_batch_keys = frozenset(failed_batch_keys)
+        # Requests per API key, for checking how a client spreads load
+        self.key_requests: Counter = Counter()
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'ok': 0, '429': 0, '5xx': 0, 'bytes_sent': 0}
+        self._bodies: Dict[str, bytes] = {}
+        # Batch API state: uploaded request files as (key, imageSize) lists, and jobs
+        self._uploads: Dict[str, str] = {}
+        self._files: Dict[str, List[Tuple[str, str]]] = {}
+        self._batches: Dict[str, Dict] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """generateContent endpoint URL of the running server"""
+        return f"http://{self.host}:{self.port}/v1beta/models/mock-image:generateContent"
+
+    def _body(self, image_size: str) -> bytes:
+        """Pre-rendered success response for a payload size (built once)"""
+        if image_size not in self._bodies:
+            # Random bytes do not compress, like real PNG data
+            image = base64.b64encode(os.urandom(PAYLOAD_BYTES.get(image_size, PAYLOAD_BYTES["1K"])))
+            head = b'{"candidates":[{"content":{"parts":[{"inlineData":{"mimeType":"image/png","data":"'
+            tail = b'"}}],"role":"model"},"finishReason":"STOP"}]}'
+            self._bodies[image_size] = head + image + tail
+        return self._bodies[image_size]
+
+    def _latency(self) -> float:
+        if self.latency_sigma <= 0:
+            return self.latency_median
+        return self.random.lognormvariate(0, self.latency_sigma) * self.latency_median
+
+    def _image_size(self, payload: Dict) -> str:
+        return (self.image_size
+                or payload.get('generationConfig', {}).get('imageConfig', {}).get('imageSize')
+                or "1K")
+
+    async def handle_generate(self, request: web.Request) -> web.Response:
+        self.stats['requests'] += 1
+        api_key = request.headers.get('x-goog-api-key')
+        self.key_requests[api_key] += 1
+        if not api_key or api_key in self.rejected_keys:
+            return web.json_response({'error': {'code': 401, 'message': 'API key not valid'}}, status=401)
+        if request.match_info['model_action'].endswith(':batchGenerateContent'):
+            return await self.handle_batch_create(request)
+
+        payload = await request.json()
+        image_size = self._image_size(payload)
+        await asyncio.sleep(self._latency())
+
+        roll = self.random.random()
+        if roll < self.error_429 or api_key in self.throttled_keys:
+            self.stats['429'] += 1
+            headers = {'Retry-After': f"{self.retry_after:g}"} if self.retry_after is not None else {}
+            return web.json_response(
+                {'error': {'code': 429, 'message': 'Resource has been exhausted', 'status': 'RESOURCE_EXHAUSTED'}},
+                status=429, headers=headers
+            )
+        if roll < self.error_429 + self.error_5xx:
+            self.stats['5xx'] += 1
+            return web.json_response(
+                {'error': {'code': 503, 'message': 'The model is overloaded', 'status': 'UNAVAILABLE'}},
+                status=503
+            )
+
+        body = self._body(image_size)
+        self.stats['ok'] += 1
+        self.stats['bytes_sent'] += len(body)
+        return web.Response(body=body, content_type='application/json')
+
+    async def handle_upload(self, request: web.Request) -> web.Response:
+        """Files API resumable upload: 'start' hands out an upload URL, 'upload, finalize' stores the file"""
+        command = request.headers.get('X-Goog-Upload-Command', '')
+        if command == 'start':
+            if not request.headers.get('x-goog-api-key'):
+                return web.json_response({'error': {'code': 401, 'message': 'API key not valid'}}, status=401)
+            upload_id = uuid.uuid4().hex
+            self._uploads[upload_id] = (await request.json()).get('file', {}).get('display_name', '')
+            return web.json_response({}, headers={
+                'X-Goog-Upload-URL': f"http://{self.host}:{self.port}/upload/v1beta/files?upload_id={upload_id}",
+                'X-Goog-Upload-Status': 'active',
+            })
+        upload_id = request.query.get('upload_id')
+        if upload_id not in self._uploads or 'finalize' not in command:
+            return web.json_response({'error': {'code': 400, 'message': 'Bad upload'}}, status=400)
+        del self._uploads[upload_id]
+        requests = []
+        async for line in request.content:
+            if line.strip():
+                item = json.loads(line)
+                requests.append((item['key'], self._image_size(item['request'])))
+        name = f"files/{upload_id[:12]}"
+        self._files[name] = requests
+        return web.json_response({'file': {'name': name, 'mimeType': 'application/jsonl', 'state': 'ACTIVE'}})
+
+    async def handle_batch_create(self, request: web.Request) -> web.Response:
+        batch = (await request.json()).get('batch', {})
+        file_name = batch.get('input_config', {}).get('file_name')
+        if file_name not in self._files:
+            return web.json_response({'error': {'code': 404, 'message': f'File {file_name} not found'}}, status=404)
+        name = f"batches/{uuid.uuid4().hex[:12]}"
+        self._batches[name] = {'file': file_name, 'created': time.monotonic(),
+                               'display_name': batch.get('display_name', '')}
+        return web.json_response({'name': name, 'metadata': {'state': 'BATCH_STATE_PENDING'}})
+
+    async def handle_batch_get(self, request: web.Request) -> web.Response:
+        name = f"batches/{request.match_info['batch_id']}"
+        batch = self._batches.get(name)
+        if batch is None:
+            return web.json_response({'error': {'code': 404, 'message': f'{name} not found'}}, status=404)
+        count = len(self._files[batch['file']])
+        operation = {'name': name, 'metadata': {'displayName': batch['display_name'],
+                                                'batchStats': {'requestCount': str(count)}}}
+        if time.monotonic() - batch['created'] < self.batch_latency:
+            operation['metadata']['state'] = 'BATCH_STATE_RUNNING'
+            operation['metadata']['batchStats']['pendingRequestCount'] = str(count)
+        else:
+            operation['done'] = True
+            operation['metadata']['state'] = 'BATCH_STATE_SUCCEEDED'
+            operation['metadata']['batchStats']['successfulRequestCount'] = str(count)
+            if self.batch_inline:
+                if 'inlined' not in batch:
+                    batch['inlined'] = [self._inlined(line) for line in self._batch_lines(batch['file'])]
+                operation['response'] = {'inlinedResponses': {'inlinedResponses': batch['inlined']}}
+            else:
+                operation['response'] = {'responsesFile': f"{batch['file']}-responses"}
+        return web.json_response(operation)
+
+    def _batch_lines(self, file_name: str) -> Iterator[bytes]:
+        """One {"key", "response"|"error"} JSON line per request of an uploaded file"""
+        for key, image_size in self._files[file_name]:
+            self.stats['requests'] += 1
+            head = b'{"key":' + json.dumps(key).encode()
+            if key in self.failed_batch_keys or self.random.random() < self.error_429 + self.error_5xx:
+                self.stats['5xx'] += 1
+                yield head + b',"error":{"code":503,"message":"The model is overloaded"}}\n'
+            else:
+                body = self._body(image_size)
+                self.stats['ok'] += 1
+                self.stats['bytes_sent'] += len(body)
+                yield head + b',"response":' + body + b'}\n'
+
+    @staticmethod
+    def _inlined(line: bytes) -> Dict:
+        """InlinedResponse shape of a responses file line: the key moves into metadata"""
+        item = json.loads(line)
+        return {'metadata': {'key': item.pop('key')}, **item}
+
+    async def handle_download(self, request: web.Request) -> web.StreamResponse:
+        """Stream a finished job's responses file, one {"key", "response"|"error"} line per request"""
+        file_name = f"files/{request.match_info['file_action'].split(':')[0]}".removesuffix('-responses')
+        if file_name not in self._files:
+            return web.json_response({'error': {'code': 404, 'message': 'File not found'}}, status=404)
+        response = web.StreamResponse(headers={'Content-Type': 'application/jsonl'})
+        await response.prepare(request)
+        for line in self._batch_lines(file_name):
+            await response.write(line)
+        await response.write_eof()
+        return response
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({**self.stats, 'keys': dict(self.key_requests)})
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.stats = {key: 0 for key in self.stats}
+        self.key_requests.clear()
+        return web.json_response(self.stats)
+
+    def make_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 ** 2)
+        app.router.add_post('/v1beta/models/{model_action}', self.handle_generate)
+        app.router.add_post('/upload/v1beta/files', self.handle_upload)
+        app.router.add_get('/v1beta/batches/{batch_id}', self.handle_batch_get)
+        app.router.add_get('/download/v1beta/files/{file_action}', self.handle_download)
+        app.router.add_get('/stats', self.handle_stats)
+        app.router.add_post('/reset', self.handle_reset)
+        return app
+
+    async def start_async(self):
+        """Start serving on the current event loop"""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop_async(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start(self) -> 'MockGeminiServer':
+        """Start serving on a background thread with its own event loop"""
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start_async())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="mock-gemini", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        """Stop a server started with start()"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop_async(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini generateContent server")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--image-size', choices=sorted(PAYLOAD_BYTES),
+                        help="Force payload size (default: follow the request's imageConfig.imageSize)")
+    parser.add_argument('--latency-median', type=float, default=1.0, help="Median latency in seconds")
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help="Log-normal latency sigma")
+    parser.add_argument('--error-429', type=float, default=0.0, help="Fraction of requests returning 429")
+    parser.add_argument('--error-5xx', type=float, default=0.0, help="Fraction of requests returning 503")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After seconds on 429")
+    parser.add_argument('--batch-latency', type=float, default=5.0,
+                        help="Seconds a batch job runs before succeeding")
+    parser.add_argument('--reject-keys', default='', help="Comma-separated API keys answered with 401")
+    parser.add_argument('--throttle-keys', default='', help="Comma-separated API keys always answered with 429")
+    parser.add_argument('--batch-inline', action='store_true',
+                        help="Return batch results inline instead of as a responses file")
+    parser.add_argument('--fail-batch-keys', default='',
+                        help="Comma-separated batch request keys answered with a per-request error")
+    parser.add_argument('--seed', type=int, help="Random seed")
+    args = parser.parse_args()
+
+    server = MockGeminiServer(
+        port=args.port, host=args.host, image_size=args.image_size,
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        error_429=args.error_429, error_5xx=args.error_5xx,
+        retry_after=args.retry_after, batch_latency=args.batch_latency,
+        rejected_keys=[k for k in args.reject_keys.split(',') if k],
+        throttled_keys=[k for k in args.throttle_keys.split(',') if k], batch_inline=args.batch_inline,
+        failed_batch_keys=[k for k in args.fail_batch_keys.split(',') if k], seed=args.seed
+    )
+    print(f"🧪 Mock Gemini server on {server.url}")
+    print(json.dumps({k: v for k, v in vars(args).items() if k not in ('host', 'port')}))
+    web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
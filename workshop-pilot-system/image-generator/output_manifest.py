@@ -0,0 +1,92 @@
+"""
+Output manifest for skip-if-fresh image generation
+
+Maps each output file in a directory to the prompt hash and model that
+produced it, plus the file's size and mtime. An output is fresh when the
+recorded hash and model match the current request and the file on disk is
+unchanged, so reruns can skip it without any network call.
+
+Used by gemini_api.py and profilecard/scripts/generate_persona_photos.py.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+def prompt_hash(prompt: str, config: Optional[Dict] = None) -> str:
+    """Hex SHA-256 of a prompt and its generation config"""
+    canonical = json.dumps({'prompt': prompt, 'config': config or {}},
+                           sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class OutputManifest:
+    """JSON manifest of generated files in one output directory"""
+
+    FILENAME = 'manifest.json'
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Load the manifest of `directory` (empty if none exists yet)
+
+        Args:
+            directory: Output directory holding the images and manifest
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / self.FILENAME
+        self.entries: Dict[str, Dict] = {}
+        self._dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self.entries = {}
+
+    def is_fresh(self, filename: str, digest: str, model: str) -> bool:
+        """
+        Whether `filename` was produced by this exact prompt and model
+
+        Args:
+            filename: Output file name, relative to the directory
+            digest: Prompt hash of the current request
+            model: Model of the current request
+        """
+        entry = self.entries.get(filename)
+        if entry is None or entry.get('prompt_hash') != digest or entry.get('model') != model:
+            return False
+        try:
+            stat = (self.directory / filename).stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+    def record(self, filename: str, digest: str, model: str):
+        """Record that `filename` was just produced by this prompt and model"""
+        stat = (self.directory / filename).stat()
+        self.entries[filename] = {
+            'prompt_hash': digest,
+            'model': model,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        self._dirty = True
+
+    def discard(self, filename: str):
+        """Forget `filename` (e.g. replaced by a placeholder image)"""
+        if self.entries.pop(filename, None) is not None:
+            self._dirty = True
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        if not self._dirty:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
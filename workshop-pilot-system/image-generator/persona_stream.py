@@ -0,0 +1,288 @@
+"""
+Streaming persona input
+
+Reads personas one at a time from JSONL files or from large JSON documents
+(a top-level list or {"personas": [...]}) without loading the whole file,
+and filters them by id range or id list on the way through. ArrayItemParser
+does the same for text pushed in pieces, such as a streamed model response.
+"""
+
+import json
+import re
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+CHUNK_SIZE = 64 * 1024
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+
+_ID_PATTERN = re.compile(r'^([A-Za-z_]*)(\d+)$')
+_WHITESPACE = ' \t\n\r'
+_NUMBER_TAIL = ('', '.', 'e', 'E', '+', '-', *'0123456789')
+
+
+class _JsonStream:
+    """Incremental reader over a text file for json.JSONDecoder.raw_decode"""
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping the consumed prefix; False at EOF"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at EOF), without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        ch = self.peek()
+        if not ch or ch not in chars:
+            raise ValueError(f"Invalid persona JSON: expected one of {chars!r}, got {ch or 'end of file'!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next complete JSON value, reading more input as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut off by the chunk boundary decodes as a shorter number
+            if isinstance(value, (int, float)) and not self.eof and self.buffer[end:end + 1] in _NUMBER_TAIL:
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def array_items(self) -> Iterator:
+        """Yield the elements of the array whose '[' was just consumed"""
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+class ArrayItemParser:
+    """
+    Push parser for a JSON array arriving in pieces (e.g. a streamed model response)
+
+    feed() returns each top-level element as soon as its closing character
+    arrives. Text before the opening '[' (such as a ```json fence) and after
+    the closing ']' is ignored; an element that fails to decode is counted
+    in `errors` and skipped, so one malformed object does not lose the rest.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.depth = 0           # 0 until '[' is seen, 1 between elements
+        self.closed = False      # the array's closing ']' was seen
+        self.errors = 0
+        self._scan = 0
+        self._item_start: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def pending(self) -> bool:
+        """Whether an element has started but not completed (a truncated tail, at the end)"""
+        return self._item_start is not None
+
+    def _emit(self, text: str, items: List):
+        try:
+            items.append(json.loads(text))
+        except json.JSONDecodeError:
+            self.errors += 1
+        self._item_start = None
+
+    def feed(self, text: str) -> List:
+        """
+        Add the next piece of text
+
+        Returns:
+            Elements completed by this piece, in array order
+        """
+        items = []
+        buffer = self.buffer + text
+        i, n = self._scan, len(buffer)
+        while i < n and not self.closed:
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self.depth == 0:
+                if ch == '[':
+                    self.depth = 1
+            elif ch == '"':
+                self._in_string = True
+                if self.depth == 1 and self._item_start is None:
+                    self._item_start = i
+            elif ch in '[{':
+                if self.depth == 1:
+                    self._item_start = i
+                self.depth += 1
+            elif ch in ']}':
+                if self.depth == 1:
+                    # ']' closing the array; a scalar element may end here
+                    if self._item_start is not None:
+                        self._emit(buffer[self._item_start:i], items)
+                    self.closed = True
+                else:
+                    self.depth -= 1
+                    if self.depth == 1:
+                        self._emit(buffer[self._item_start:i + 1], items)
+            elif self.depth == 1:
+                if ch == ',':
+                    if self._item_start is not None:
+                        self._emit(buffer[self._item_start:i], items)
+                elif ch not in _WHITESPACE and self._item_start is None:
+                    self._item_start = i
+            i += 1
+
+        # Keep only the unfinished element
+        if self._item_start is not None:
+            self.buffer = buffer[self._item_start:]
+            self._scan = i - self._item_start
+            self._item_start = 0
+        else:
+            self.buffer = ''
+            self._scan = 0
+        return items
+
+
+def _iter_json(f: TextIO) -> Iterator[Dict]:
+    stream = _JsonStream(f)
+    if stream.expect('[{') == '[':
+        yield from stream.array_items()
+        return
+
+    # Object: stream the "personas" array, skip any other keys
+    if stream.peek() == '}':
+        raise ValueError("JSON must be a list or contain 'personas' key")
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'personas':
+            stream.expect('[')
+            yield from stream.array_items()
+            return
+        stream.value()
+        if stream.expect(',}') == '}':
+            raise ValueError("JSON must be a list or contain 'personas' key")
+
+
+def _iter_jsonl(f: TextIO, filepath: str) -> Iterator[Dict]:
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{filepath}:{line_no}: invalid JSON line ({e.msg})") from None
+
+
+def iter_personas(filepath: str) -> Iterator[Dict]:
+    """
+    Lazily yield personas from a JSON or JSONL file
+
+    Args:
+        filepath: .jsonl/.ndjson (one persona per line), or JSON holding a
+                  list or {"personas": [...]}
+
+    Yields:
+        Persona dictionaries in file order
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.lower().endswith(JSONL_SUFFIXES):
+            yield from _iter_jsonl(f, filepath)
+        else:
+            yield from _iter_json(f)
+
+
+def parse_id_range(spec: str) -> Callable[[str], bool]:
+    """
+    Predicate for an inclusive id range such as "P011-P020"
+
+    Args:
+        spec: "<start>-<end>" with a shared prefix, or a single id
+
+    Returns:
+        Function returning True for ids inside the range
+    """
+    start, _, end = spec.strip().partition('-')
+    start_match = _ID_PATTERN.match(start.strip())
+    end_match = _ID_PATTERN.match((end or start).strip())
+    if not start_match or not end_match or start_match.group(1) != end_match.group(1):
+        raise ValueError(f"Invalid id range '{spec}' (expected e.g. P011-P020)")
+    prefix = start_match.group(1)
+    low, high = int(start_match.group(2)), int(end_match.group(2))
+
+    def in_range(persona_id: str) -> bool:
+        match = _ID_PATTERN.match(str(persona_id))
+        return bool(match) and match.group(1) == prefix and low <= int(match.group(2)) <= high
+
+    return in_range
+
+
+def select_personas(personas: Iterable[Dict], id_range: Optional[str] = None,
+                    ids: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Filter a persona stream by id
+
+    Args:
+        personas: Persona iterable (e.g. from iter_personas)
+        id_range: Inclusive range such as "P011-P020"
+        ids: Explicit ids to keep
+        limit: Stop after this many matches
+
+    Yields:
+        Matching personas, in input order
+    """
+    in_range = parse_id_range(id_range) if id_range else None
+    wanted = set(ids) if ids else None
+    selected = (
+        p for p in personas
+        if (in_range is None or in_range(p.get('id', '')))
+        and (wanted is None or p.get('id') in wanted)
+    )
+    return islice(selected, limit) if limit is not None else selected
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Consecutive lists of up to `size` items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
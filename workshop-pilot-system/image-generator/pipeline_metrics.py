@@ -0,0 +1,270 @@
+"""
+Per-request spans and batch metrics for the image pipelines
+
+A Tracer records one Span per API request (an image, or a planning chunk)
+with timed phases - prompt build, queue wait (concurrency + rate limiter),
+HTTP, decode, write, retry backoff, and the run time of a hedged backup
+request (which overlaps the primary's HTTP time) - plus response bytes, attempts and the
+status of every attempt. Finished spans are appended to a JSONL file as they
+complete and folded into fixed-bucket histograms, so memory stays constant
+for any batch size. At the end of a batch the histograms are written as a
+Prometheus text snapshot (<pipeline>.prom, one file per pipeline as the
+node_exporter textfile collector expects) and printed as a per-phase latency
+table, showing whether time goes to the API, to throttling or to local I/O.
+
+Used by gemini_api.py (--metrics-dir) and
+profilecard/scripts/generate_persona_photos.py.
+"""
+
+import bisect
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from retry_policy import error_status, is_timeout_or_connection
+
+# Phases in reporting order; 'total' is the span's wall time
+PHASES = ('prompt', 'cache', 'queue', 'http', 'decode', 'write', 'backoff', 'hedge')
+# Phases that run alongside others; left out of the share denominator
+OVERLAPPING_PHASES = ('hedge',)
+# Histogram upper bounds in seconds (+Inf implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+SPANS_FILENAME = 'spans.jsonl'
+
+
+def status_label(exc: Optional[BaseException] = None) -> str:
+    """Status of one attempt: '200', the HTTP status, 'timeout' or 'error'"""
+    if exc is None:
+        return '200'
+    status = error_status(exc)
+    if status is not None:
+        return str(status)
+    return 'timeout' if is_timeout_or_connection(exc) else 'error'
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket, like histogram_quantile()"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else low
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Span:
+    """Timing and outcome of one request"""
+
+    def __init__(self, tracer: 'Tracer', kind: str, key: str):
+        self.tracer = tracer
+        self.kind = kind
+        self.key = key
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.statuses: List[str] = []
+        self.bytes = 0
+        self.outcome: Optional[str] = None
+        self.error: Optional[str] = None
+        self.duration = 0.0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator['Span']:
+        """Add the block's wall time to `name` (accumulates across attempts)"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def attempt(self, exc: Optional[BaseException] = None):
+        """Record the status of one finished attempt"""
+        self.statuses.append(status_label(exc))
+
+    def finish(self, outcome: str, error: Optional[str] = None):
+        """
+        Close the span and hand it to the tracer
+
+        Args:
+            outcome: 'ok', 'cache' or 'failed'
+            error: Error message for failed spans
+        """
+        if self.outcome is not None:
+            return
+        self.duration = time.perf_counter() - self._t0
+        self.outcome = outcome
+        self.error = error
+        self.tracer._finish(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'run': self.tracer.run_id,
+            'pipeline': self.tracer.pipeline,
+            'kind': self.kind,
+            'key': self.key,
+            'start': round(self.started_at, 6),
+            'duration': round(self.duration, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'attempts': len(self.statuses),
+            'retries': max(0, len(self.statuses) - 1),
+            'statuses': self.statuses,
+            'bytes': self.bytes,
+            'outcome': self.outcome,
+            'error': self.error,
+        }
+
+
+class Tracer:
+    """Collects spans for one batch run"""
+
+    def __init__(self, pipeline: str, directory: Optional[Union[str, Path]] = None):
+        """
+        Initialize tracer
+
+        Args:
+            pipeline: Pipeline name used as a label (e.g. 'gemini_batch')
+            directory: Where spans.jsonl is appended and <pipeline>.prom written
+                       (None keeps only the in-memory histograms)
+        """
+        self.pipeline = pipeline
+        self.run_id = time.strftime('%Y%m%dT%H%M%S')
+        self.directory = Path(directory) if directory is not None else None
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.outcomes: Dict[tuple, int] = {}
+        self.statuses: Dict[tuple, int] = {}
+        self.bytes: Dict[str, int] = {}
+        self.prometheus_path = self.directory / f"{pipeline}.prom" if self.directory is not None else None
+        self._spans_file = None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._spans_file = open(self.directory / SPANS_FILENAME, 'a', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def span(self, key: str, kind: str = 'image') -> Span:
+        """Start a span for one request"""
+        return Span(self, kind, key)
+
+    def _finish(self, span: Span):
+        histograms = self.histograms.setdefault(span.kind, {})
+        for name, seconds in (('total', span.duration), *span.phases.items()):
+            histograms.setdefault(name, Histogram()).observe(seconds)
+        outcome_key = (span.kind, span.outcome)
+        self.outcomes[outcome_key] = self.outcomes.get(outcome_key, 0) + 1
+        for status in span.statuses:
+            self.statuses[(span.kind, status)] = self.statuses.get((span.kind, status), 0) + 1
+        self.bytes[span.kind] = self.bytes.get(span.kind, 0) + span.bytes
+        if self._spans_file is not None:
+            self._spans_file.write(json.dumps(span.to_dict(), ensure_ascii=False) + '\n')
+
+    def prometheus_text(self) -> str:
+        """Snapshot of all metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP image_pipeline_phase_seconds Time spent per request phase',
+            '# TYPE image_pipeline_phase_seconds histogram',
+        ]
+        for kind, histograms in sorted(self.histograms.items()):
+            for phase, hist in sorted(histograms.items()):
+                labels = f'pipeline="{self.pipeline}",kind="{kind}",phase="{phase}"'
+                cumulative = 0
+                for bound, n in zip((*map(str, hist.buckets), '+Inf'), hist.counts):
+                    cumulative += n
+                    lines.append(f'image_pipeline_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'image_pipeline_phase_seconds_sum{{{labels}}} {hist.sum:.6f}')
+                lines.append(f'image_pipeline_phase_seconds_count{{{labels}}} {hist.count}')
+        lines += [
+            '# HELP image_pipeline_requests_total Finished requests by outcome',
+            '# TYPE image_pipeline_requests_total counter',
+        ]
+        for (kind, outcome), n in sorted(self.outcomes.items()):
+            lines.append(f'image_pipeline_requests_total{{pipeline="{self.pipeline}",kind="{kind}",'
+                         f'outcome="{outcome}"}} {n}')
+        lines += [
+            '# HELP image_pipeline_attempts_total API attempts by status',
+            '# TYPE image_pipeline_attempts_total counter',
+        ]
+        for (kind, status), n in sorted(self.statuses.items()):
+            lines.append(f'image_pipeline_attempts_total{{pipeline="{self.pipeline}",kind="{kind}",'
+                         f'status="{status}"}} {n}')
+        lines += [
+            '# HELP image_pipeline_response_bytes_total Decoded response bytes',
+            '# TYPE image_pipeline_response_bytes_total counter',
+        ]
+        for kind, n in sorted(self.bytes.items()):
+            lines.append(f'image_pipeline_response_bytes_total{{pipeline="{self.pipeline}",kind="{kind}"}} {n}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self, kind: str = 'image', width: int = 30) -> str:
+        """Per-phase latency table and a histogram of total request time"""
+        histograms = self.histograms.get(kind)
+        if not histograms:
+            return ''
+        total = histograms['total']
+        phase_sum = sum(h.sum for name, h in histograms.items()
+                        if name != 'total' and name not in OVERLAPPING_PHASES) or 1.0
+        lines = [f"⏱️  {kind} latency ({total.count} requests)",
+                 f"   {'phase':<8} {'sum s':>8} {'share':>6} {'p50 s':>7} {'p95 s':>7}"]
+        for name in PHASES:
+            hist = histograms.get(name)
+            if hist is None:
+                continue
+            lines.append(f"   {name:<8} {hist.sum:8.2f} {hist.sum / phase_sum:6.0%} "
+                         f"{hist.quantile(0.5):7.2f} {hist.quantile(0.95):7.2f}")
+        lines.append(f"   {'total':<8} {total.sum:8.2f} {'':>6} {total.quantile(0.5):7.2f} {total.quantile(0.95):7.2f}")
+
+        # Text histogram of total latency, trimmed to the occupied buckets
+        occupied = [i for i, n in enumerate(total.counts) if n]
+        peak = max(total.counts)
+        lines.append("")
+        for i in range(occupied[0], occupied[-1] + 1):
+            label = f"≤{total.buckets[i]:g}s" if i < len(total.buckets) else f">{total.buckets[-1]:g}s"
+            n = total.counts[i]
+            lines.append(f"   {label:>7} {'█' * max(1 if n else 0, round(width * n / peak))} {n}")
+        return '\n'.join(lines)
+
+    def write_prometheus(self) -> Optional[Path]:
+        """Write <pipeline>.prom atomically; returns its path (None without a directory)"""
+        if self.prometheus_path is None:
+            return None
+        path = self.prometheus_path
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        tmp_path.replace(path)
+        return path
+
+    def close(self):
+        """Flush spans and write the Prometheus snapshot"""
+        if self._spans_file is not None:
+            self._spans_file.close()
+            self._spans_file = None
+        self.write_prometheus()
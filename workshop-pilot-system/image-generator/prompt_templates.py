@@ -0,0 +1,135 @@
+"""
+Prompt templates parsed once
+
+Templates use str.format syntax ({field}, {{ and }} for literal braces) plus
+an optional filter, {field|filter}, for values derived from a field. Each
+template is parsed once into its field list and the filters it applies, so
+rendering is one dict build and one str.format_map call: rendering many
+prompts (cache keys, dry runs) costs little more than building their
+contexts.
+
+Used by gemini_api.py (portrait styles) and
+profilecard/scripts/generate_persona_photos.py (planning prompt).
+"""
+
+import operator
+import string
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+def first_clause(value: str) -> str:
+    """Text before the first comma"""
+    return value.split(',')[0]
+
+
+def comma_prefixed(value: str) -> str:
+    """', value' if value is non-empty, else ''"""
+    return ', ' + value if value else ''
+
+
+# Filters usable as {field|name}; results are memoized since values repeat a lot
+FILTERS: Dict[str, Callable[[str], str]] = {
+    'first_clause': lru_cache(maxsize=1024)(first_clause),
+    'comma_prefixed': lru_cache(maxsize=1024)(comma_prefixed),
+}
+
+
+class PromptTemplate:
+    """Template parsed once into its fields and filtered slots"""
+
+    def __init__(self, source: str, name: Optional[str] = None):
+        """
+        Compile a template
+
+        Args:
+            source: Template text in str.format syntax, with optional {field|filter}
+            name: Name for error messages and the registry
+        """
+        self.source = source
+        self.name = name
+        self.slots: List[Tuple[str, Optional[Callable[[str], str]]]] = []
+        # (format_map key, field, filter) for every {field|filter} slot
+        self._filtered: List[Tuple[str, str, Callable[[str], str]]] = []
+        for _, slot, spec, conversion in string.Formatter().parse(source):
+            if slot is None:
+                continue
+            if spec or conversion:
+                raise ValueError(f"Template {name or ''}: format specs are not supported ({{{slot}}})")
+            field, _, filter_name = slot.partition('|')
+            if not field or field.isdigit() or '.' in field or '[' in field:
+                raise ValueError(f"Template {name or ''}: only named fields are supported ({{{slot}}})")
+            if filter_name and filter_name not in FILTERS:
+                raise ValueError(f"Template {name or ''}: unknown filter '{filter_name}'")
+            apply = FILTERS[filter_name] if filter_name else None
+            self.slots.append((field, apply))
+            if apply is not None:
+                self._filtered.append((slot, field, apply))
+        self.fields = tuple(dict.fromkeys(field for field, _ in self.slots))
+        self._filtered = list(dict.fromkeys(self._filtered))
+        # Slot names are the format_map keys, so the source is the format string as-is
+        self._format = source.format_map
+        self._key = operator.itemgetter(*self.fields) if self.fields else (lambda context: ())
+
+    def _render(self, context: Mapping) -> str:
+        values = {field: context[field] for field in self.fields}
+        for slot, field, apply in self._filtered:
+            values[slot] = apply(values[field])
+        return self._format(values)
+
+    def render(self, context: Mapping) -> str:
+        """
+        Render with values from `context`
+
+        Args:
+            context: Mapping with every field the template uses
+        """
+        try:
+            return self._render(context)
+        except KeyError as e:
+            raise KeyError(f"Template {self.name or ''} is missing field {e}") from None
+
+    def render_many(self, contexts: Iterable[Mapping]) -> List[str]:
+        """
+        Render once per context
+
+        Contexts with identical field values share one rendered string, which
+        keeps large synthetic cohorts cheap in both time and memory.
+        """
+        memo: Dict = {}
+        rendered = []
+        for context in contexts:
+            try:
+                values = self._key(context)
+                # Types are part of the key: 40 == 40.0 but they render differently
+                key = (values, tuple(map(type, values))) if len(self.fields) > 1 else (values, type(values))
+                prompt = memo.get(key)
+                if prompt is None:
+                    prompt = memo[key] = self.render(context)
+            except (KeyError, TypeError):
+                # Missing fields raise from render(); unhashable values skip the memo
+                prompt = self.render(context)
+            rendered.append(prompt)
+        return rendered
+
+
+_REGISTRY: Dict[str, PromptTemplate] = {}
+
+
+def register_template(name: str, source: str) -> PromptTemplate:
+    """Compile `source` and make it available as get_template(name)"""
+    template = PromptTemplate(source, name=name)
+    _REGISTRY[name] = template
+    return template
+
+
+def get_template(name: str) -> PromptTemplate:
+    """Registered template by name"""
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Unknown prompt template '{name}' (registered: {', '.join(sorted(_REGISTRY))})") from None
+
+
+def template_names() -> List[str]:
+    return sorted(_REGISTRY)
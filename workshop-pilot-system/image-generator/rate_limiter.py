@@ -0,0 +1,181 @@
+"""
+Async rate limiting for Gemini API batches
+
+Token buckets that pace request starts by the real API quota
+(requests-per-minute and tokens-per-minute) instead of a thread count, and
+an AIMD concurrency limit that backs off when the API starts throttling.
+"""
+
+import asyncio
+import math
+import time
+from typing import Optional
+
+# Approximate output token cost of one generated image, by imageConfig.imageSize
+IMAGE_OUTPUT_TOKENS = {
+    "1K": 1290,
+    "2K": 1680,
+    "4K": 2520,
+}
+
+
+def estimate_request_tokens(prompt: str, image_size: str = "4K") -> int:
+    """
+    Estimate the quota tokens consumed by one image request
+
+    Args:
+        prompt: Prompt text sent to the model
+        image_size: imageConfig.imageSize of the request
+
+    Returns:
+        Estimated prompt + output tokens (roughly 4 bytes per prompt token)
+    """
+    prompt_tokens = math.ceil(len(prompt.encode('utf-8')) / 4)
+    return prompt_tokens + IMAGE_OUTPUT_TOKENS.get(image_size, IMAGE_OUTPUT_TOKENS["4K"])
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Initialize bucket
+
+        Args:
+            rate_per_minute: Tokens added per minute
+            capacity: Maximum burst size (defaults to one minute of tokens)
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (may be negative while in debt)"""
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Wait until `amount` tokens can be taken, then take them
+
+        Requests larger than the capacity wait for a full bucket and leave
+        it in debt, so the long-run rate is still enforced.
+
+        Returns:
+            Seconds spent waiting
+        """
+        needed = min(amount, self.capacity)
+        waited = 0.0
+        # Holding the lock while sleeping keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+class RateLimiter:
+    """Combined requests-per-minute / tokens-per-minute limiter"""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: Optional[float] = None,
+                 burst: float = 1):
+        """
+        Initialize limiter
+
+        Args:
+            requests_per_minute: Request quota (RPM)
+            tokens_per_minute: Token quota (TPM), None to ignore tokens
+            burst: Requests that may start back-to-back before pacing kicks in
+        """
+        self.requests = TokenBucket(requests_per_minute, capacity=burst)
+        self.tokens = None
+        if tokens_per_minute:
+            self.tokens = TokenBucket(
+                tokens_per_minute,
+                capacity=tokens_per_minute * burst / requests_per_minute
+            )
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait for quota to start one request costing `tokens`
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = await self.requests.acquire(1)
+        if self.tokens is not None and tokens:
+            waited += await self.tokens.acquire(tokens)
+        return waited
+
+
+class AdaptiveConcurrency:
+    """AIMD cap on in-flight requests: grow on success, halve on throttling"""
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: Optional[int] = None,
+                 decrease_factor: float = 0.5, cooldown: float = 2.0):
+        """
+        Initialize limiter
+
+        Args:
+            initial: Starting concurrency limit
+            minimum: Floor the limit never drops below
+            maximum: Ceiling the limit never grows above (None for no ceiling)
+            decrease_factor: Multiplier applied on throttling
+            cooldown: Seconds after a decrease during which further throttles are
+                      attributed to the same burst and ignored
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, initial))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.throttle_events = 0
+        self._last_decrease = float('-inf')
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.release()
+
+    def on_success(self):
+        """Additive increase: about +1 slot per `limit` successful requests"""
+        self.limit += 1.0 / self.limit
+        if self.maximum is not None:
+            self.limit = min(self.limit, float(self.maximum))
+
+    def on_throttle(self):
+        """Multiplicative decrease, at most once per cooldown window"""
+        self.throttle_events += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.minimum), self.limit * self.decrease_factor)
@@ -0,0 +1,253 @@
+"""
+Shared retry policy for Gemini API calls
+
+Used by gemini_api.py and profilecard/scripts/generate_persona_photos.py.
+Classifies 429/5xx/timeouts as retryable, honors Retry-After, backs off with
+decorrelated jitter and caps total retries per batch with a retry budget.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+THROTTLE_STATUS = frozenset({429})
+
+# google.rpc status names (google-genai APIError.status) -> HTTP status
+_RPC_STATUS = {
+    'RESOURCE_EXHAUSTED': 429,
+    'UNAVAILABLE': 503,
+    'DEADLINE_EXCEEDED': 504,
+    'INTERNAL': 500,
+}
+
+
+class RequestFailed(Exception):
+    """Non-success API response"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value: Delay in seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if absent/unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _http_status(value) -> Optional[int]:
+    if isinstance(value, int) and not isinstance(value, bool) and 100 <= value <= 599:
+        return int(value)
+    return None
+
+
+def error_status(exc: BaseException) -> Optional[int]:
+    """
+    HTTP status of an exception from requests, aiohttp or google-genai
+
+    Only structured fields are read (status/code/status_code on the exception or
+    its response); the message text is never parsed, so a number that happens
+    to appear in it (a byte count, a port) is not mistaken for a status.
+    """
+    for attr in ('status', 'code', 'status_code'):
+        status = _http_status(getattr(exc, attr, None))
+        if status is not None:
+            return status
+    response = getattr(exc, 'response', None)
+    for attr in ('status_code', 'status'):
+        status = _http_status(getattr(response, attr, None))
+        if status is not None:
+            return status
+    rpc_status = getattr(exc, 'status', None)
+    if isinstance(rpc_status, str):
+        return _RPC_STATUS.get(rpc_status)
+    return None
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Retry-After delay carried by an exception, if any"""
+    if isinstance(exc, RequestFailed):
+        return exc.retry_after
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if headers is not None:
+        return parse_retry_after(headers.get('Retry-After'))
+    return None
+
+
+def _transient_errors() -> tuple:
+    """Timeout and connection exception types of the HTTP clients that are installed"""
+    types = [asyncio.TimeoutError, TimeoutError, ConnectionError]
+    try:
+        import aiohttp
+        types += [aiohttp.ClientConnectionError, aiohttp.ServerTimeoutError]
+    except ImportError:
+        pass
+    try:
+        import requests
+        types += [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    except ImportError:
+        pass
+    try:
+        # Transport of google-genai
+        import httpx
+        types += [httpx.TimeoutException, httpx.NetworkError]
+    except ImportError:
+        pass
+    return tuple(dict.fromkeys(types))
+
+
+TRANSIENT_ERRORS = _transient_errors()
+
+
+def is_timeout_or_connection(exc: BaseException) -> bool:
+    """Whether a failure is a timeout or a dropped/refused connection"""
+    return isinstance(exc, TRANSIENT_ERRORS)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Whether a failed call is worth retrying"""
+    if is_timeout_or_connection(exc):
+        return True
+    return error_status(exc) in RETRYABLE_STATUS
+
+
+def is_throttled(exc: BaseException) -> bool:
+    """Whether a failure means the client is over its quota"""
+    return error_status(exc) in THROTTLE_STATUS
+
+
+class RetryBudget:
+    """Upper bound on retries spent across one batch"""
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self.spent = 0
+
+    @classmethod
+    def for_requests(cls, requests: int, ratio: float = 0.5, minimum: int = 5) -> 'RetryBudget':
+        """
+        Budget proportional to batch size
+
+        Args:
+            requests: Number of requests in the batch
+            ratio: Retries allowed per request on average
+            minimum: Retries allowed regardless of batch size
+        """
+        return cls(max(minimum, int(requests * ratio)))
+
+    def scale_to(self, requests: int, ratio: float = 0.5, minimum: int = 5):
+        """Resize like for_requests() as a streamed batch grows to `requests`"""
+        self.max_retries = max(minimum, int(requests * ratio))
+
+    def spend(self) -> bool:
+        """Take one retry from the budget; False when exhausted"""
+        if self.spent >= self.max_retries:
+            return False
+        self.spent += 1
+        return True
+
+
+class RetryPolicy:
+    """Retry with decorrelated-jitter backoff and Retry-After support"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 max_retry_after: float = 300.0):
+        """
+        Initialize policy
+
+        Args:
+            max_attempts: Attempts per call, including the first
+            base_delay: Minimum backoff in seconds
+            max_delay: Maximum jittered backoff in seconds
+            max_retry_after: Longest server-requested Retry-After to honor
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def next_delay(self, previous: float, retry_after: Optional[float] = None) -> float:
+        """
+        Backoff before the next attempt
+
+        Decorrelated jitter: uniform(base, previous * 3), capped at max_delay.
+        A Retry-After from the server takes precedence when it is longer.
+        """
+        delay = min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+    def should_retry(self, attempt: int, exc: BaseException, budget: Optional[RetryBudget] = None) -> bool:
+        """
+        Decide whether to retry after a failed attempt
+
+        Args:
+            attempt: Number of attempts made so far
+            exc: Failure of the last attempt
+            budget: Batch retry budget to spend from
+        """
+        if attempt >= self.max_attempts or not is_retryable(exc):
+            return False
+        return budget is None or budget.spend()
+
+    def call(self, fn: Callable, *args, budget: Optional[RetryBudget] = None,
+             on_retry: Optional[Callable] = None, **kwargs):
+        """
+        Call `fn(*args, **kwargs)`, retrying retryable failures
+
+        Args:
+            budget: Batch retry budget
+            on_retry: Called as on_retry(attempt, exc, delay) before each wait
+
+        Returns:
+            Result of the first successful call; the last error is re-raised
+        """
+        delay = self.base_delay
+        for attempt in itertools.count(1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(attempt, e, budget):
+                    raise
+                delay = self.next_delay(delay, retry_after_of(e))
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                time.sleep(delay)
+
+    async def call_async(self, fn: Callable, *args, budget: Optional[RetryBudget] = None,
+                         on_retry: Optional[Callable] = None, **kwargs):
+        """Async variant of call() for coroutine functions"""
+        delay = self.base_delay
+        for attempt in itertools.count(1):
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not self.should_retry(attempt, e, budget):
+                    raise
+                delay = self.next_delay(delay, retry_after_of(e))
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                await asyncio.sleep(delay)
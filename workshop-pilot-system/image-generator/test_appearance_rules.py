@@ -0,0 +1,166 @@
+"""
+Appearance rules must match the original hand-written code
+
+legacy_infer_appearance below is the if/else chain that gemini_api.py used
+before the rules moved to appearance_rules.py; every persona must produce
+identical output, one at a time and in bulk.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from appearance_rules import infer_appearance, infer_appearance_bulk
+
+PERSONAS_FILE = Path(__file__).with_name('personas-test.json')
+
+
+def legacy_infer_appearance(persona: Dict) -> Dict:
+    age = persona.get('age', 35)
+    category = persona.get('category', '')
+    department = persona.get('department', '')
+
+    personality = persona.get('personality', {})
+    tech_savvy = personality.get('techSavvy', 5)
+    stress = personality.get('stressLevel', 5)
+    confidence = personality.get('confidenceLevel', 5)
+    patience = personality.get('patience', 5)
+
+    name = persona.get('name', '')
+    female_endings = ['진', '영', '희', '미', '선', '아', '연']
+    is_female = any(name.endswith(e) for e in female_endings)
+    gender = 'woman' if is_female else 'man'
+
+    if gender == 'man':
+        if age <= 35:
+            hair = "short, modern professional style with slight texture"
+        elif age <= 40:
+            hair = "short, neatly styled with conservative professionalism"
+        else:
+            hair = "short, refined style with distinguished gray streaks"
+    else:
+        if age <= 35:
+            hair = "shoulder-length modern professional styling"
+        elif age <= 40:
+            hair = "neat, sophisticated styling at shoulder length"
+        else:
+            hair = "elegant, mature styling reflecting leadership presence"
+
+    glasses_prob = 0.5
+    if category == 'IT' or 'IT' in department:
+        glasses_prob += 0.2
+    if tech_savvy >= 9:
+        glasses_prob += 0.3
+    elif tech_savvy >= 7:
+        glasses_prob += 0.2
+    if age >= 40:
+        glasses_prob += 0.2
+
+    has_glasses = glasses_prob > 0.6
+    glasses_desc = "behind modern thin-framed glasses" if has_glasses else ""
+
+    if category == 'IT' or 'IT' in department or '개발' in department:
+        attire = "Navy blue or charcoal gray collared shirt, smart casual professional style"
+    else:
+        attire = "Business professional attire with blazer"
+
+    expression = "Professional"
+    if confidence >= 8:
+        expression += " and confident"
+    elif confidence >= 6:
+        expression += " with balanced authority"
+    else:
+        expression += " with humble approachability"
+
+    if stress >= 8:
+        expression += ", showing determination under pressure"
+    elif stress >= 6:
+        expression += ", composed despite challenges"
+
+    if patience >= 8:
+        expression += ", warm and approachable smile"
+    elif patience >= 6:
+        expression += ", pleasant professional demeanor"
+
+    return {
+        'gender': gender,
+        'hair': hair,
+        'glasses': glasses_desc,
+        'attire': attire,
+        'expression': expression
+    }
+
+
+def random_ts_persona(rng: random.Random, n: int) -> Dict:
+    persona = {
+        'id': f'P{n:03d}',
+        'leaderProfile': {},
+        'personality': {},
+    }
+    # Leave fields out now and then so the defaults are covered too
+    optional = {
+        'name': rng.choice(['김지훈', '이수진', '박서영', '최민희', '정하늘', '한지아', '오세연', '', '진']),
+        'age': rng.choice([29, 35, 35.5, 36, 40, 41, 55]),
+        'category': rng.choice(['IT', 'Marketing', 'HR', '']),
+        'department': rng.choice(['IT전략팀', '개발1팀', '디지털마케팅팀', '인사팀', '']),
+        'role': rng.choice(['팀장', 'Team Lead']),
+        'company': rng.choice(['SK플래닛', 'ACME, Inc.']),
+    }
+    persona.update({k: v for k, v in optional.items() if rng.random() < 0.9})
+    for field in ('techSavvy', 'stressLevel', 'confidenceLevel', 'patience'):
+        if rng.random() < 0.9:
+            persona['personality'][field] = rng.choice([1, 5, 6, 7, 7.5, 8, 9, 10])
+    for field, values in (('yearsInRole', [0.5, 1, 2.0]),
+                          ('previousRole', ['시니어 기획자', 'engineer {lead}']),
+                          ('leadershipStyle', ['코칭형', 'hands-on, data-driven'])):
+        if rng.random() < 0.8:
+            persona['leaderProfile'][field] = rng.choice(values)
+    return persona
+
+
+def random_manual_persona(rng: random.Random, n: int) -> Dict:
+    persona = {'id': f'M{n:03d}', 'age': rng.choice([25, 31, 47])}
+    optional = {
+        'gender': rng.choice(['man', 'woman']),
+        'occupation': 'data analyst',
+        'clothing': 'grey hoodie',
+        'expression': 'calm, focused look',
+        'background': 'blurred office, {bokeh}',
+    }
+    persona.update({k: v for k, v in optional.items() if rng.random() < 0.7})
+    appearance = {k: v for k, v in {
+        'hair': 'short black hair', 'face': 'round face', 'eyes': 'dark eyes',
+        'skin': 'tan skin', 'features': rng.choice(['', 'small scar', 'freckles, dimples']),
+    }.items() if rng.random() < 0.7}
+    if appearance:
+        persona['appearance'] = appearance
+    return persona
+
+
+def make_cohort(seed: int = 1234) -> List[Dict]:
+    """personas-test.json plus random TS and manual personas, shuffled"""
+    rng = random.Random(seed)
+    cohort = json.loads(PERSONAS_FILE.read_text(encoding='utf-8'))
+    cohort += [random_ts_persona(rng, n) for n in range(300)]
+    cohort += [random_manual_persona(rng, n) for n in range(100)]
+    rng.shuffle(cohort)
+    return cohort
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    return make_cohort()
+
+
+def test_appearance_matches_legacy_rules(cohort):
+    ts = [p for p in cohort if 'leaderProfile' in p]
+    expected = [legacy_infer_appearance(p) for p in ts]
+    assert [infer_appearance(p) for p in ts] == expected
+    assert infer_appearance_bulk(ts) == expected
+
+
+def test_appearance_bulk_of_nothing():
+    assert infer_appearance_bulk([]) == []
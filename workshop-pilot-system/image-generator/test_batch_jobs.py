@@ -0,0 +1,134 @@
+import json
+from pathlib import Path
+
+import pytest
+import requests
+
+import job_journal
+from batch_jobs import GeminiBatchBackend, normalize_state, write_requests_file
+from job_journal import JobJournal
+from retry_policy import RequestFailed, RetryPolicy
+
+
+def run_job(generator, personas, **kwargs):
+    kwargs.setdefault('poll_interval', 0.01)
+    return generator.generate_batch_job(personas, **kwargs)
+
+
+def test_normalize_state():
+    assert normalize_state('BATCH_STATE_RUNNING') == 'RUNNING'
+    assert normalize_state('JOB_STATE_SUCCEEDED') == 'SUCCEEDED'
+    assert normalize_state(None) == 'PENDING'
+
+
+def test_job_from_responses_file(make_generator, mock_server, personas):
+    generator = make_generator()
+    results = run_job(generator, personas)
+    assert len(results) == len(personas)
+    assert all(r['success'] for r in results.values())
+    for result in results.values():
+        assert Path(result['filename']).stat().st_size > 0
+    assert not (generator.output_dir / generator.BATCH_STATE_FILE).exists()
+    assert not (generator.output_dir / generator.BATCH_REQUESTS_FILE).exists()
+    assert mock_server.stats['ok'] == len(personas)
+
+    # Everything is up to date, so nothing is submitted again
+    assert run_job(make_generator(), personas) == results
+    assert len(mock_server._batches) == 1
+
+
+def test_job_from_inline_results(make_generator, mock_server, personas):
+    mock_server.batch_inline = True
+    results = run_job(make_generator(), personas)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas)
+
+
+@pytest.mark.parametrize('inline', [False, True])
+def test_partial_failure_is_retried_next_run(make_generator, mock_server, personas, inline):
+    mock_server.batch_inline = inline
+    # Request keys are numbered in submission order
+    mock_server.failed_batch_keys = frozenset({'000001'})
+    generator = make_generator()
+    results = run_job(generator, personas)
+    failed = [name for name, r in results.items() if not r['success']]
+    assert failed == [personas[1]['name']]
+    assert results[failed[0]]['error'].startswith('503')
+    entries = JobJournal(generator.output_dir).load()
+    assert entries[failed[0]]['state'] == job_journal.FAILED
+    assert sum(e['state'] == job_journal.DONE for e in entries.values()) == len(personas) - 1
+
+    # Only the failed persona goes into the next job
+    mock_server.failed_batch_keys = frozenset()
+    results = run_job(make_generator(), personas, resume=True)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas)
+    first, second = mock_server._batches.values()
+    assert len(mock_server._files[second['file']]) == 1
+
+
+def test_in_flight_job_is_resumed_not_resubmitted(make_generator, mock_server, personas):
+    mock_server.batch_latency = 3600
+    generator = make_generator()
+    assert run_job(generator, personas, poll_interval=1, max_wait=0) == {}
+    state_path = generator.output_dir / generator.BATCH_STATE_FILE
+    job = json.loads(state_path.read_text(encoding='utf-8'))
+    assert job['name'] in mock_server._batches
+    assert sorted(entry['name'] for entry in job['requests'].values()) == sorted(p['name'] for p in personas)
+    entries = JobJournal(generator.output_dir).load()
+    assert {e['state'] for e in entries.values()} == {job_journal.IN_FLIGHT}
+
+    # The next run polls the remembered job; the personas are not read again
+    mock_server.batch_latency = 0
+    results = run_job(make_generator(), [])
+    assert sorted(results) == sorted(p['name'] for p in personas)
+    assert all(r['success'] for r in results.values())
+    assert list(mock_server._batches) == [job['name']]
+    assert not state_path.exists()
+
+
+class FlakySession(requests.Session):
+    """Session answering the first N calls to a URL suffix with 503"""
+
+    def __init__(self, suffix, failures):
+        super().__init__()
+        self.suffix = suffix
+        self.failures = failures
+        self.calls = 0
+
+    def request(self, method, url, *args, **kwargs):
+        if url.endswith(self.suffix):
+            self.calls += 1
+            if self.calls <= self.failures:
+                response = requests.Response()
+                response.status_code = 503
+                response._content = b'{"error": {"code": 503}}'
+                return response
+        return super().request(method, url, *args, **kwargs)
+
+
+def submit(mock_server, tmp_path, session, retry_policy):
+    requests_file = tmp_path / 'requests.jsonl'
+    write_requests_file(requests_file, [('000000', {'contents': []})])
+    backend = GeminiBatchBackend.from_endpoint('test-key', mock_server.url, session=session,
+                                               retry_policy=retry_policy)
+    return backend, backend.submit(requests_file, 'test')
+
+
+def test_submit_is_retried(mock_server, tmp_path):
+    session = FlakySession(':batchGenerateContent', failures=2)
+    backend, job = submit(mock_server, tmp_path, session, RetryPolicy(base_delay=0.01, max_delay=0.01))
+    assert session.calls == 3
+    assert list(mock_server._batches) == [job]
+    assert backend.poll(job).succeeded
+
+    session = FlakySession(':batchGenerateContent', failures=5)
+    with pytest.raises(RequestFailed) as excinfo:
+        submit(mock_server, tmp_path, session, RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01))
+    assert excinfo.value.status == 503
+    assert session.calls == 2
+
+
+def test_endpoint_must_name_a_model():
+    with pytest.raises(ValueError):
+        GeminiBatchBackend.from_endpoint('test-key', 'http://127.0.0.1:1/generate')
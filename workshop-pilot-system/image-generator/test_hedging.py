@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from hedging import BACKUP, PRIMARY, HedgePolicy, race
+
+
+def test_delay_follows_observed_percentile():
+    policy = HedgePolicy(percentile=0.9, initial_delay=45.0, min_delay=1.0, min_samples=4)
+    assert policy.delay() == 45.0
+    for seconds in (2.0, 3.0, 4.0):
+        policy.observe(seconds)
+    assert policy.delay() == 45.0
+    policy.observe(10.0)
+    assert policy.delay() == 10.0
+    for seconds in (0.1,) * 40:
+        policy.observe(seconds)
+    assert policy.delay() == 1.0
+    with pytest.raises(ValueError):
+        HedgePolicy(percentile=1.0)
+
+
+def test_hedges_are_capped():
+    policy = HedgePolicy(max_ratio=0.1, min_hedges=2)
+    policy.hedged = 2
+    assert [policy.delay() is None for _ in range(30)] == [True] * 29 + [False]
+    assert policy.requests == 30
+
+
+async def result(value, seconds=0.0):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def failure(message, seconds=0.0):
+    await asyncio.sleep(seconds)
+    raise RuntimeError(message)
+
+
+def run_race(primary, backup, delay, policy):
+    started = []
+
+    def start_backup():
+        started.append(True)
+        return backup
+
+    async def main():
+        try:
+            return await race(primary, start_backup, delay, policy)
+        finally:
+            backup.close()
+
+    return asyncio.run(main()), bool(started)
+
+
+def test_fast_primary_is_not_hedged():
+    policy = HedgePolicy()
+    (value, winner), hedged = run_race(result('a'), result('b'), 1.0, policy)
+    assert (value, winner, hedged) == ('a', PRIMARY, False)
+    assert (policy.hedged, len(policy.latencies)) == (0, 1)
+    assert policy.latencies[0] < 1.0
+
+
+def test_backup_win_records_primary_as_at_least_the_delay():
+    policy = HedgePolicy()
+    cancelled = []
+
+    async def straggler():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    (value, winner), _ = run_race(straggler(), result('b'), 0.05, policy)
+    assert (value, winner) == ('b', BACKUP)
+    assert cancelled == [True]
+    assert (policy.hedged, policy.backup_wins) == (1, 1)
+    # The lost race still feeds the percentile, so later requests are not hedged too early
+    [latency] = policy.latencies
+    assert latency >= 0.05
+
+
+def test_primary_failure_is_observed_and_backup_wins():
+    policy = HedgePolicy()
+    (value, winner), _ = run_race(failure('primary', 0.1), result('b', 0.2), 0.05, policy)
+    assert (value, winner) == ('b', BACKUP)
+    [latency] = policy.latencies
+    assert latency >= 0.1
+
+
+def test_both_failing_raises_first_error():
+    policy = HedgePolicy()
+    with pytest.raises(RuntimeError, match='backup'):
+        run_race(failure('primary', 0.2), failure('backup'), 0.05, policy)
+    assert len(policy.latencies) == 1
+
+
+def test_cancelled_backup_does_not_break_the_race():
+    async def cancelled_backup():
+        raise asyncio.CancelledError()
+
+    policy = HedgePolicy()
+    (value, winner), _ = run_race(result('a', 0.1), cancelled_backup(), 0.05, policy)
+    assert (value, winner) == ('a', PRIMARY)
+    assert policy.latencies[0] >= 0.1
+
+
+def test_no_delay_never_hedges():
+    policy = HedgePolicy()
+    (value, winner), hedged = run_race(result('a', 0.05), result('b'), None, policy)
+    assert (value, winner, hedged) == ('a', PRIMARY, False)
+    with pytest.raises(RuntimeError):
+        run_race(failure('primary'), result('b'), None, policy)
+    assert len(policy.latencies) == 2
@@ -0,0 +1,59 @@
+import os
+import time
+
+from image_cache import ACCESS_FILENAME, ImageCache
+
+
+def store(cache: ImageCache, tmp_path, key: str, size: int = 100):
+    src = tmp_path / f'{key}-src.png'
+    src.write_bytes(key.encode() * size)
+    cache.put(key, src)
+    return src
+
+
+def test_hit_links_without_touching_outputs(tmp_path):
+    cache = ImageCache(tmp_path / 'cache')
+    src = store(cache, tmp_path, 'a')
+    mtime = src.stat().st_mtime_ns
+    time.sleep(0.01)
+    dest = tmp_path / 'P001.png'
+    assert cache.get('a', dest)
+    assert dest.read_bytes() == src.read_bytes()
+    # Outputs sharing the cached inode keep their mtime, so OutputManifest still sees them as fresh
+    assert src.stat().st_mtime_ns == mtime
+    assert dest.stat().st_mtime_ns == mtime
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert not cache.get('missing', tmp_path / 'P002.png')
+    assert cache.misses == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(tmp_path / 'cache', max_bytes=250)
+    store(cache, tmp_path, 'a')
+    store(cache, tmp_path, 'b')
+    assert cache.get('a', tmp_path / 'out.png')
+    store(cache, tmp_path, 'c')
+    assert cache.contains('a')
+    assert not cache.contains('b')
+    assert cache.contains('c')
+
+
+def test_access_times_survive_reload(tmp_path):
+    cache = ImageCache(tmp_path / 'cache', max_bytes=250)
+    store(cache, tmp_path, 'a')
+    store(cache, tmp_path, 'b')
+    assert cache.get('a', tmp_path / 'out.png')
+    cache.save()
+    assert (tmp_path / 'cache' / ACCESS_FILENAME).exists()
+
+    reloaded = ImageCache(tmp_path / 'cache', max_bytes=250)
+    store(reloaded, tmp_path, 'c')
+    assert reloaded.contains('a')
+    assert not reloaded.contains('b')
+
+
+def test_reload_without_sidecar_uses_file_mtimes(tmp_path):
+    cache = ImageCache(tmp_path / 'cache')
+    store(cache, tmp_path, 'a')
+    os.utime(tmp_path / 'cache' / 'a.png', (1, 1))
+    assert ImageCache(tmp_path / 'cache')._entries['a'] == (100, 1.0)
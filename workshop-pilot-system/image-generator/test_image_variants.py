@@ -0,0 +1,102 @@
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from image_variants import MIN_QUALITY, VARIANTS, Variant, VariantPool, encode, process_image, resolve_variants
+
+
+def noise(size, seed=0) -> Image.Image:
+    """Random pixels, so JPEG sizes depend on quality"""
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8))
+
+
+def write_photo(path, size=(1200, 1600), seed=0):
+    noise(size, seed).save(path)
+    return path
+
+
+def test_resolve_variants_orders_largest_first():
+    assert [v.name for v in resolve_variants('thumb, card,retina')] == ['card', 'retina', 'thumb']
+    with pytest.raises(ValueError, match='poster'):
+        resolve_variants(['card', 'poster'])
+
+
+def test_encode_meets_quality_or_byte_budget():
+    image = noise((320, 320))
+    data, quality = encode(image, Variant('free', 320, 'JPEG', quality=90))
+    assert quality == 90
+
+    budget = len(data) // 2
+    data, quality = encode(image, Variant('budget', 320, 'JPEG', quality=90, max_bytes=budget))
+    assert len(data) <= budget
+    assert MIN_QUALITY <= quality < 90
+    # The next quality step up would not have fit
+    assert len(encode(image, Variant('next', 320, 'JPEG', quality=quality + 1))[0]) > budget
+
+    # An unreachable budget falls back to the lowest quality
+    _, quality = encode(image, Variant('tiny', 320, 'JPEG', quality=90, max_bytes=100))
+    assert quality == MIN_QUALITY
+
+
+def test_process_image_dimensions_and_byte_sizes(tmp_path):
+    source = write_photo(tmp_path / 'P001.png')
+    out = tmp_path / 'web'
+    entry = process_image(str(source), str(out), resolve_variants('card,thumb,retina'))
+
+    assert entry['source'] == {'width': 1200, 'height': 1600, 'size': source.stat().st_size,
+                               'mtime_ns': source.stat().st_mtime_ns}
+    expected = {'card': ('P001.jpg', 768, 1024), 'retina': ('P001@2x.webp', 320, 427),
+                'thumb': ('P001.thumb.webp', 160, 213)}
+    for name, (filename, width, height) in expected.items():
+        variant = entry['variants'][name]
+        assert (variant['file'], variant['width'], variant['height']) == (filename, width, height)
+        with Image.open(out / filename) as image:
+            assert image.size == (width, height)
+            assert image.format == VARIANTS[name].format
+        assert variant['bytes'] == (out / filename).stat().st_size
+    # Random noise cannot fit the card budget at q85
+    card = entry['variants']['card']
+    assert card['bytes'] <= VARIANTS['card'].max_bytes or card['quality'] == MIN_QUALITY
+    assert card['quality'] < VARIANTS['card'].quality
+
+
+def test_small_sources_are_not_upscaled(tmp_path):
+    source = write_photo(tmp_path / 'small.png', (100, 150))
+    entry = process_image(str(source), str(tmp_path / 'web'), resolve_variants('card,thumb'))
+    assert (entry['variants']['card']['width'], entry['variants']['card']['height']) == (100, 150)
+
+
+def test_variant_may_not_overwrite_its_source(tmp_path):
+    source = tmp_path / 'P001.jpg'
+    Image.new('RGB', (64, 64)).save(source)
+    with pytest.raises(ValueError, match='overwrite'):
+        process_image(str(source), str(tmp_path), resolve_variants('card'))
+
+
+def test_pool_manifest_and_skip_unchanged(tmp_path):
+    sources = [write_photo(tmp_path / f'P00{n}.png', (400, 600), seed=n) for n in (1, 2)]
+    out = tmp_path / 'web'
+    with VariantPool(out, 'card,thumb', workers=1) as pool:
+        for source in sources:
+            pool.submit(source)
+        stats = pool.drain()
+    assert stats['processed'] == 2
+    manifest = json.loads((out / VariantPool.MANIFEST).read_text(encoding='utf-8'))
+    assert sorted(manifest) == ['P001.png', 'P002.png']
+    on_disk = sum((out / v['file']).stat().st_size for e in manifest.values() for v in e['variants'].values())
+    assert stats['output_bytes'] == on_disk
+    assert stats['source_bytes'] == sum(s.stat().st_size for s in sources)
+
+    # Unchanged sources are skipped; a rewritten one and a new variant set are not
+    write_photo(sources[1], (400, 600), seed=9)
+    with VariantPool(out, 'card,thumb', workers=1) as pool:
+        assert pool.submit(sources[0]) is None
+        assert pool.submit(sources[1]) is not None
+        assert pool.drain()['skipped'] == 1
+    with VariantPool(out, 'card,thumb,retina', workers=1) as pool:
+        assert pool.submit(sources[0]) is not None
+    assert os.path.exists(out / 'P001@2x.webp')
@@ -0,0 +1,105 @@
+import base64
+import io
+import json
+import os
+
+import pytest
+
+from inline_stream import InlineDataDecoder, NoInlineData, stream_inline_image, write_inline_image
+
+IMAGE = os.urandom(3000) + b'\xff\xd8 tail'
+
+
+def response_body(image: bytes = IMAGE, escape_slashes: bool = False, wrap: int = 0) -> bytes:
+    """generateContent response carrying `image`, as the API serializes it"""
+    data = base64.b64encode(image).decode('ascii')
+    if wrap:
+        data = '\n'.join(data[i:i + wrap] for i in range(0, len(data), wrap))
+    body = json.dumps({
+        'candidates': [{'content': {'parts': [
+            {'text': 'Here is the "data": you asked for'},
+            {'inlineData': {'mimeType': 'image/png', 'data': '@DATA@'}},
+        ]}}],
+        'usageMetadata': {'data': 'not this one'},
+    }, indent=1)
+    if escape_slashes:
+        data = data.replace('/', '\\/')
+    # json.dumps would escape the wrapping newlines; splice the field in raw
+    return body.replace('@DATA@', data).encode('ascii')
+
+
+def decode(chunks) -> bytes:
+    out = io.BytesIO()
+    decoder = InlineDataDecoder(out)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    assert decoder.found
+    assert decoder.bytes_written == len(out.getvalue())
+    return out.getvalue()
+
+
+def split_at(body: bytes, *cuts: int):
+    bounds = [0, *cuts, len(body)]
+    return [body[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_decodes_whole_body():
+    assert decode([response_body()]) == IMAGE
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5, 7, 64, 1000])
+def test_decodes_fixed_size_chunks(size):
+    body = response_body()
+    assert decode(body[i:i + size] for i in range(0, len(body), size)) == IMAGE
+
+
+def test_decodes_every_split_point():
+    image = b'split me at every byte!'
+    body = response_body(image, escape_slashes=True)
+    for cut in range(1, len(body)):
+        assert decode(split_at(body, cut)) == image, cut
+
+
+def test_splits_inside_base64_groups_and_keys():
+    body = response_body()
+    start = body.index(b'"inlineData"')
+    data = body.index(b'"data": "', start) + len(b'"data": "')
+    # Inside the key, inside the '"data": "' separator, then off a 4-char boundary
+    cuts = [start + 5, data - 3, data + 1, data + 6, data + 4003]
+    assert decode(split_at(body, *cuts)) == IMAGE
+
+
+def test_escaped_slashes_and_wrapped_lines():
+    body = response_body(escape_slashes=True, wrap=76)
+    assert b'\\/' in body
+    assert decode(body[i:i + 9] for i in range(0, len(body), 9)) == IMAGE
+
+
+def test_stops_after_first_image():
+    body = response_body(b'first') + response_body(b'second')
+    assert decode([body]) == b'first'
+
+
+def test_stream_inline_image_writes_atomically(tmp_path):
+    dest = tmp_path / 'P001.png'
+    body = response_body()
+    timings = {}
+    assert stream_inline_image((body[i:i + 100] for i in range(0, len(body), 100)), dest, timings) == len(IMAGE)
+    assert dest.read_bytes() == IMAGE
+    assert set(timings) == {'decode', 'write'}
+    assert [p.name for p in tmp_path.iterdir()] == ['P001.png']
+
+
+def test_missing_image_leaves_no_file(tmp_path):
+    dest = tmp_path / 'P001.png'
+    with pytest.raises(NoInlineData):
+        stream_inline_image([b'{"candidates": [{"finishReason": "SAFETY"}]}'], dest)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_write_inline_image(tmp_path):
+    dest = tmp_path / 'P001.png'
+    assert write_inline_image(json.loads(response_body()), dest) == len(IMAGE)
+    assert dest.read_bytes() == IMAGE
+    with pytest.raises(NoInlineData):
+        write_inline_image({'candidates': []}, dest)
@@ -0,0 +1,80 @@
+import json
+
+import job_journal
+from job_journal import JobJournal, file_sha256
+
+
+def write(path, data: bytes = b'image'):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_last_entry_wins_and_torn_line_is_ignored(tmp_path):
+    journal = JobJournal(tmp_path)
+    journal.record('a', job_journal.IN_FLIGHT)
+    journal.record('a', job_journal.FAILED, error='boom')
+    journal.record('b', job_journal.PENDING)
+    journal.close()
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"persona": "b", "state": "do')
+    entries = JobJournal(tmp_path).load()
+    assert entries['a']['state'] == job_journal.FAILED
+    assert entries['a']['error'] == 'boom'
+    assert entries['b']['state'] == job_journal.PENDING
+
+
+def test_completed_requires_intact_file(tmp_path):
+    journal = JobJournal(tmp_path)
+    kept = write(tmp_path / 'kept.png')
+    edited = write(tmp_path / 'edited.png')
+    gone = write(tmp_path / 'gone.png')
+    for filename in (kept, edited, gone):
+        journal.record(filename, job_journal.DONE, filename=filename, sha256=file_sha256(filename),
+                       prompt_hash='h')
+    journal.close()
+    write(tmp_path / 'edited.png', b'retouched')
+    (tmp_path / 'gone.png').unlink()
+    assert list(JobJournal(tmp_path).completed()) == [kept]
+
+
+def test_is_current_compares_prompt_hash():
+    assert JobJournal.is_current({'state': 'done', 'prompt_hash': 'abc'}, 'abc')
+    assert not JobJournal.is_current({'state': 'done', 'prompt_hash': 'abc'}, 'def')
+    # Entries written before prompt hashes were journaled are never trusted on their own
+    assert not JobJournal.is_current({'state': 'done'}, 'abc')
+
+
+def test_resume_skips_completed_personas(make_generator, mock_server, personas):
+    results = make_generator().generate_batch(personas)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas)
+
+    # Without the manifest only the journal can vouch for the photos
+    generator = make_generator()
+    generator.manifest.entries.clear()
+    results = generator.generate_batch(personas, resume=True)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas)
+
+
+def test_resume_survives_torn_journal_line(make_generator, mock_server, personas):
+    generator = make_generator()
+    generator.generate_batch(personas)
+    with open(generator.output_dir / JobJournal.FILENAME, 'a', encoding='utf-8') as f:
+        f.write('{"persona": "' + personas[0]['name'] + '", "state": "fai')
+    make_generator().generate_batch(personas, resume=True)
+    assert mock_server.stats['ok'] == len(personas)
+
+
+def test_resume_regenerates_changed_prompt(make_generator, mock_server, personas):
+    make_generator().generate_batch(personas)
+    changed = json.loads(json.dumps(personas))
+    changed[1]['age'] += 1
+
+    generator = make_generator()
+    results = generator.generate_batch(changed, resume=True)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas) + 1
+    # The new photo is journaled with the new prompt, so the next resume skips it
+    make_generator().generate_batch(changed, resume=True)
+    assert mock_server.stats['ok'] == len(personas) + 1
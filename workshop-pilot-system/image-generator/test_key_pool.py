@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from key_pool import KeyPool, KeysExhausted, is_rejection, load_keys, mask_key
+from retry_policy import RequestFailed
+
+THROTTLED = RequestFailed('quota', status=429)
+FORBIDDEN = RequestFailed('forbidden', status=403)
+
+
+def acquire(pool: KeyPool, n: int = 1):
+    async def run():
+        return [(await pool.acquire()).key for _ in range(n)]
+
+    return asyncio.run(run())
+
+
+def test_requests_spread_across_keys(clock):
+    pool = KeyPool(['key-a', 'key-b', 'key-c'], requests_per_minute=60)
+    assert sorted(acquire(pool, 3)) == ['key-a', 'key-b', 'key-c']
+    # Each key keeps its own 60/min pace, so six requests take one second
+    acquire(pool, 3)
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test_rejected_key_is_ejected_for_good(clock, capsys):
+    pool = KeyPool(['key-a', 'key-b'], requests_per_minute=600)
+    a, b = pool.keys
+    a.report(FORBIDDEN)
+    a.report(FORBIDDEN)
+    assert a.rejected
+    assert a.stats['errors'] == 2
+    assert capsys.readouterr().out.count('rejected') == 1
+    assert set(acquire(pool, 5)) == {'key-b'}
+    clock.now += 3600
+    assert set(acquire(pool, 2)) == {'key-b'}
+
+
+def test_all_keys_rejected_raises(clock):
+    pool = KeyPool(['key-a', 'key-b'], requests_per_minute=60)
+    for key in pool.keys:
+        key.report(RequestFailed('unauthorized', status=401))
+    with pytest.raises(KeysExhausted) as info:
+        acquire(pool)
+    assert info.value.status == 401
+
+
+def test_throttle_streak_benches_key_with_doubling_cooldown(clock):
+    pool = KeyPool(['key-a', 'key-b'], requests_per_minute=600, max_throttles=3, cooldown=10.0)
+    a, _ = pool.keys
+    a.report(THROTTLED)
+    a.report(THROTTLED)
+    assert a.usable
+    a.report(THROTTLED)
+    assert not a.usable
+    assert a.benched_until == pytest.approx(clock.now + 10.0)
+    assert a.stats['throttled'] == 3
+    assert set(acquire(pool, 4)) == {'key-b'}
+
+    clock.now = a.benched_until
+    assert a.usable
+    for _ in range(3):
+        a.report(THROTTLED)
+    assert a.benched_until == pytest.approx(clock.now + 20.0)
+
+
+def test_success_resets_throttle_streak(clock):
+    pool = KeyPool(['key-a'], requests_per_minute=60, max_throttles=2)
+    key = pool.keys[0]
+    key.report(THROTTLED)
+    key.report()
+    key.report(THROTTLED)
+    assert key.usable
+    assert key.stats == {'requests': 0, 'ok': 1, 'throttled': 2, 'errors': 0}
+
+
+def test_benched_pool_waits_for_first_key_back(clock):
+    pool = KeyPool(['key-a', 'key-b'], requests_per_minute=600, max_throttles=1, cooldown=30.0)
+    a, b = pool.keys
+    a.report(THROTTLED)
+    clock.now += 10
+    b.report(THROTTLED)
+    assert acquire(pool) == ['key-a']
+    assert clock.now == pytest.approx(1030.0)
+
+
+def test_other_errors_do_not_bench_or_eject(clock):
+    pool = KeyPool(['key-a'], requests_per_minute=60, max_throttles=1)
+    key = pool.keys[0]
+    key.report(RequestFailed('down', status=503))
+    key.report(TimeoutError())
+    assert key.usable
+    assert key.stats['errors'] == 2
+
+
+def test_summary_states(clock):
+    pool = KeyPool(['key-aaaa', 'key-bbbb', 'key-cccc'], requests_per_minute=60, max_throttles=1)
+    pool.keys[0].report(FORBIDDEN)
+    pool.keys[1].report(THROTTLED)
+    summary = pool.summary()
+    assert '…aaaa: 0 requests, 0 ok, 0 throttled, 1 errors (rejected)' in summary
+    assert '(benched)' in summary
+    assert '…cccc: 0 requests, 0 ok, 0 throttled, 0 errors (ok)' in summary
+
+
+def test_pool_needs_keys():
+    with pytest.raises(ValueError):
+        KeyPool([], requests_per_minute=60)
+    assert len(KeyPool(['k', 'k'], requests_per_minute=60)) == 1
+
+
+def test_load_keys(tmp_path):
+    keys_file = tmp_path / 'keys.txt'
+    keys_file.write_text('# project keys\nkey-b\n  key-c  # spare\n\n', encoding='utf-8')
+    env = {'GEMINI_API_KEYS': 'key-d, key-a,'}
+    assert load_keys(['key-a,key-b'], keys_file, env=env) == ['key-a', 'key-b', 'key-c', 'key-d']
+    assert load_keys(env={}) == []
+
+
+def test_helpers():
+    assert mask_key('AIzaSyExample1234') == '…1234'
+    assert is_rejection(RequestFailed('x', status=401))
+    assert not is_rejection(THROTTLED)
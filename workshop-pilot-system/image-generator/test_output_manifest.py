@@ -0,0 +1,74 @@
+import json
+import os
+
+from output_manifest import OutputManifest, prompt_hash
+
+
+def test_prompt_hash_covers_prompt_and_config():
+    digest = prompt_hash('portrait', {'size': '1K', 'ratio': '3:4'})
+    assert digest == prompt_hash('portrait', {'ratio': '3:4', 'size': '1K'})
+    assert digest != prompt_hash('portrait', {'size': '2K', 'ratio': '3:4'})
+    assert digest != prompt_hash('portrait.', {'size': '1K', 'ratio': '3:4'})
+    assert prompt_hash('portrait') == prompt_hash('portrait', {})
+
+
+def test_fresh_only_for_same_prompt_model_and_file(tmp_path):
+    (tmp_path / 'P001.png').write_bytes(b'image')
+    manifest = OutputManifest(tmp_path)
+    manifest.record('P001.png', 'h1', 'pro')
+    assert manifest.is_fresh('P001.png', 'h1', 'pro')
+    assert not manifest.is_fresh('P001.png', 'h2', 'pro')
+    assert not manifest.is_fresh('P001.png', 'h1', 'flash')
+    assert not manifest.is_fresh('P002.png', 'h1', 'pro')
+
+    # Same size but touched on disk
+    stat = (tmp_path / 'P001.png').stat()
+    os.utime(tmp_path / 'P001.png', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not manifest.is_fresh('P001.png', 'h1', 'pro')
+    (tmp_path / 'P001.png').unlink()
+    assert not manifest.is_fresh('P001.png', 'h1', 'pro')
+
+
+def test_save_is_atomic_and_only_when_dirty(tmp_path):
+    (tmp_path / 'P001.png').write_bytes(b'image')
+    manifest = OutputManifest(tmp_path)
+    manifest.save()
+    assert not manifest.path.exists()
+
+    manifest.record('P001.png', 'h1', 'pro')
+    manifest.save()
+    assert not (tmp_path / 'manifest.json.tmp').exists()
+    assert OutputManifest(tmp_path).is_fresh('P001.png', 'h1', 'pro')
+
+    manifest.discard('P001.png')
+    manifest.discard('P404.png')
+    manifest.save()
+    assert json.loads(manifest.path.read_text(encoding='utf-8')) == {}
+
+
+def test_corrupt_manifest_starts_empty(tmp_path):
+    (tmp_path / OutputManifest.FILENAME).write_text('{"P001.png": {', encoding='utf-8')
+    assert OutputManifest(tmp_path).entries == {}
+
+
+def test_rerun_skips_fresh_outputs(make_generator, mock_server, personas):
+    make_generator().generate_batch(personas)
+    assert mock_server.stats['ok'] == len(personas)
+
+    generator = make_generator()
+    results = generator.generate_batch(personas)
+    assert all(r['success'] for r in results.values())
+    assert mock_server.stats['ok'] == len(personas)
+
+    # A retouched output is regenerated, the others stay skipped
+    photo = next(generator.output_dir.glob('*.png'))
+    photo.write_bytes(b'retouched')
+    make_generator().generate_batch(personas)
+    assert mock_server.stats['ok'] == len(personas) + 1
+    assert photo.read_bytes() != b'retouched'
+
+
+def test_refresh_cache_regenerates_fresh_outputs(make_generator, mock_server, personas):
+    make_generator().generate_batch(personas)
+    make_generator(refresh_cache=True).generate_batch(personas)
+    assert mock_server.stats['ok'] == 2 * len(personas)
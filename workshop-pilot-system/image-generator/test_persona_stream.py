@@ -0,0 +1,154 @@
+import io
+import json
+import random
+import re
+
+import pytest
+
+from persona_stream import (ArrayItemParser, _JsonStream, _iter_json, chunked, iter_personas,
+                            parse_id_range, select_personas)
+
+PERSONAS = [
+    {'id': 'P001', 'name': '김지훈', 'age': 37, 'score': 12345.6789e-2},
+    {'id': 'P002', 'name': 'Lee "Jay", Jr.', 'notes': 'braces } ] { [ and \\ backslash', 'age': 100000},
+    {'id': 'P003', 'tags': [], 'nested': {'list': [1, [2, {'x': None}]], 'ok': True}, 'age': -42},
+    {'id': 'P004', 'emoji': '📸', 'escaped': 'é\n\t', 'age': 1e21},
+]
+
+
+def read_json(text: str, chunk_size: int):
+    stream = _JsonStream(io.StringIO(text), chunk_size=chunk_size)
+    stream.expect('[')
+    return list(stream.array_items())
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 8, 13, 4096])
+def test_json_stream_across_chunk_boundaries(chunk_size):
+    text = json.dumps(PERSONAS, ensure_ascii=False, indent=2)
+    assert read_json(text, chunk_size) == PERSONAS
+
+
+def test_json_stream_numbers_split_at_every_position():
+    values = [123456789, -0.000123, 6.02e23, 42, 7]
+    text = json.dumps(values, separators=(',', ':'))
+    for chunk_size in range(1, len(text) + 1):
+        assert read_json(text, chunk_size) == values, chunk_size
+
+
+def test_json_stream_bare_number_at_end_of_file():
+    stream = _JsonStream(io.StringIO('  12345'), chunk_size=2)
+    assert stream.value() == 12345
+
+
+def test_json_stream_empty_array_and_errors():
+    assert read_json('[ ]', 1) == []
+    with pytest.raises(ValueError):
+        read_json('[{"id": 1} {"id": 2}]', 3)
+
+
+class Trickle(io.StringIO):
+    """Text file returning at most `size` characters per read()"""
+
+    def __init__(self, text: str, size: int):
+        super().__init__(text)
+        self.size = size
+
+    def read(self, n=-1):
+        return super().read(self.size if n < 0 else min(n, self.size))
+
+
+@pytest.mark.parametrize('size', [1, 7])
+def test_iter_json_object_with_other_keys_first(size):
+    doc = {'meta': {'personas': 'not this', 'n': [1, 2]}, 'personas': PERSONAS, 'after': 1}
+    assert list(_iter_json(Trickle(json.dumps(doc), size))) == PERSONAS
+
+
+def test_iter_json_requires_personas_key():
+    with pytest.raises(ValueError):
+        list(_iter_json(io.StringIO('{"people": []}')))
+
+
+def test_iter_personas_json_and_jsonl(tmp_path):
+    json_path = tmp_path / 'personas.json'
+    json_path.write_text(json.dumps({'personas': PERSONAS}), encoding='utf-8')
+    jsonl_path = tmp_path / 'personas.jsonl'
+    jsonl_path.write_text('\n'.join(json.dumps(p) for p in PERSONAS) + '\n\n', encoding='utf-8')
+    assert list(iter_personas(str(json_path))) == PERSONAS
+    assert list(iter_personas(str(jsonl_path))) == PERSONAS
+
+
+def test_select_personas_by_range_ids_and_limit():
+    personas = [{'id': f'P{n:03d}'} for n in range(1, 31)]
+    assert [p['id'] for p in select_personas(personas, id_range='P011-P013')] == ['P011', 'P012', 'P013']
+    assert [p['id'] for p in select_personas(personas, ids=['P030', 'P002'])] == ['P002', 'P030']
+    assert len(list(select_personas(personas, limit=4))) == 4
+    assert parse_id_range('P005')('P005')
+    with pytest.raises(ValueError):
+        parse_id_range('P001-X009')
+
+
+def test_chunked():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+
+
+def test_progress_shows_total_when_known(make_generator, personas, capsys):
+    make_generator().generate_batch(personas)
+    assert re.findall(r'✓ \[(\d+/\d+)\]', capsys.readouterr().out) == ['1/3', '2/3', '3/3']
+    # A stream has no length, so only the running count is shown
+    make_generator(refresh_cache=True).generate_batch(iter(personas))
+    assert re.findall(r'✓ \[([\d/]+)\]', capsys.readouterr().out) == ['1', '2', '3']
+
+
+def feed_pieces(pieces):
+    parser = ArrayItemParser()
+    items = []
+    for piece in pieces:
+        items.extend(parser.feed(piece))
+    return parser, items
+
+
+def test_array_parser_one_character_at_a_time():
+    text = '```json\n' + json.dumps(PERSONAS, ensure_ascii=False, indent=2) + '\n```'
+    parser, items = feed_pieces(text)
+    assert items == PERSONAS
+    assert parser.closed
+    assert not parser.pending
+    assert parser.errors == 0
+
+
+def test_array_parser_random_splits():
+    text = json.dumps(PERSONAS, ensure_ascii=False)
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(text)), rng.randint(1, 12)))
+        pieces = [text[a:b] for a, b in zip([0, *cuts], [*cuts, len(text)])]
+        assert feed_pieces(pieces)[1] == PERSONAS
+
+
+def test_array_parser_emits_items_as_soon_as_they_close():
+    parser = ArrayItemParser()
+    assert parser.feed('Sure! [{"id": "P001"}, {"id": ') == [{'id': 'P001'}]
+    assert parser.pending
+    assert parser.feed('"P0') == []
+    assert parser.feed('02"}') == [{'id': 'P002'}]
+    assert parser.feed(']  trailing [{"id": "ignored"}]') == []
+    assert parser.closed
+
+
+def test_array_parser_scalars_and_strings():
+    _, items = feed_pieces(['[1, "a,]b"', ', tru', 'e, null, 2.5', ']'])
+    assert items == [1, 'a,]b', True, None, 2.5]
+
+
+def test_array_parser_skips_malformed_items():
+    parser, items = feed_pieces(['[{"id": "P001"}, {"id": P002}, {"id": "P003"}]'])
+    assert items == [{'id': 'P001'}, {'id': 'P003'}]
+    assert parser.errors == 1
+
+
+def test_array_parser_truncated_tail_is_pending():
+    parser, items = feed_pieces(['[{"id": "P001"}, {"id": "P00'])
+    assert items == [{'id': 'P001'}]
+    assert parser.pending
+    assert not parser.closed
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import pipeline_metrics
+from pipeline_metrics import BUCKETS, SPANS_FILENAME, Histogram, Tracer, status_label
+from retry_policy import RequestFailed
+
+
+@pytest.fixture
+def perf(monkeypatch):
+    """Manually advanced perf_counter for span durations"""
+    now = SimpleNamespace(value=0.0)
+    monkeypatch.setattr(pipeline_metrics, 'time', SimpleNamespace(
+        perf_counter=lambda: now.value, time=lambda: 1.7e9, strftime=time.strftime))
+    return now
+
+
+def test_histogram_buckets_and_quantiles():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.0, 1.5, 2.0, 3.0, 9.0):
+        hist.observe(value)
+    # Upper bounds are inclusive, like Prometheus' le
+    assert hist.counts == [2, 2, 1, 1]
+    assert (hist.count, hist.sum) == (6, 17.0)
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.quantile(0.25) == pytest.approx(0.75)
+    # Values past the last bound report that bound
+    assert hist.quantile(1.0) == 4.0
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_status_labels():
+    assert status_label() == '200'
+    assert status_label(RequestFailed('busy', status=429)) == '429'
+    assert status_label(asyncio.TimeoutError()) == 'timeout'
+    assert status_label(ValueError('bad json')) == 'error'
+
+
+def test_span_phases_attempts_and_finish(perf):
+    tracer = Tracer('test')
+    span = tracer.span('P001')
+    with span.phase('http'):
+        perf.value += 2.0
+    span.attempt(RequestFailed('busy', status=503))
+    span.add('backoff', 1.5)
+    perf.value += 1.5
+    with span.phase('http'):
+        perf.value += 1.0
+    span.attempt()
+    span.bytes = 2048
+    span.finish('ok')
+    # A second finish is ignored
+    span.finish('failed', 'late')
+
+    record = span.to_dict()
+    assert record['duration'] == 4.5
+    assert record['phases'] == {'http': 3.0, 'backoff': 1.5}
+    assert (record['attempts'], record['retries'], record['statuses']) == (2, 1, ['503', '200'])
+    assert (record['outcome'], record['error'], record['bytes']) == ('ok', None, 2048)
+    assert tracer.outcomes == {('image', 'ok'): 1}
+    assert tracer.histograms['image']['total'].sum == 4.5
+
+
+def finish_spans(tracer, perf, durations, kind='image', outcome='ok'):
+    for n, seconds in enumerate(durations):
+        span = tracer.span(f'P{n:03d}', kind=kind)
+        with span.phase('http'):
+            perf.value += seconds
+        span.add('hedge', seconds / 2)
+        span.attempt()
+        span.bytes = 100
+        span.finish(outcome)
+
+
+def test_spans_file_and_prometheus_snapshot(tmp_path, perf):
+    with Tracer('gemini_batch', tmp_path) as tracer:
+        finish_spans(tracer, perf, [0.3, 0.3, 7.0])
+        finish_spans(tracer, perf, [0.02], kind='plan', outcome='failed')
+    assert not (tmp_path / 'gemini_batch.prom.tmp').exists()
+
+    spans = [json.loads(line) for line in (tmp_path / SPANS_FILENAME).read_text(encoding='utf-8').splitlines()]
+    assert [(s['kind'], s['key'], s['duration']) for s in spans] == [
+        ('image', 'P000', 0.3), ('image', 'P001', 0.3), ('image', 'P002', 7.0), ('plan', 'P000', 0.02)]
+
+    metrics = {}
+    for line in (tmp_path / 'gemini_batch.prom').read_text(encoding='utf-8').splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            metrics[name] = float(value)
+    labels = 'pipeline="gemini_batch",kind="image",phase="total"'
+    # Buckets are cumulative and end at +Inf == count
+    assert metrics[f'image_pipeline_phase_seconds_bucket{{{labels},le="0.25"}}'] == 0
+    assert metrics[f'image_pipeline_phase_seconds_bucket{{{labels},le="0.5"}}'] == 2
+    assert metrics[f'image_pipeline_phase_seconds_bucket{{{labels},le="5.0"}}'] == 2
+    assert metrics[f'image_pipeline_phase_seconds_bucket{{{labels},le="10.0"}}'] == 3
+    assert metrics[f'image_pipeline_phase_seconds_bucket{{{labels},le="+Inf"}}'] == 3
+    assert metrics[f'image_pipeline_phase_seconds_count{{{labels}}}'] == 3
+    assert metrics[f'image_pipeline_phase_seconds_sum{{{labels}}}'] == pytest.approx(7.6)
+    buckets = [n for name, n in metrics.items() if name.startswith(f'image_pipeline_phase_seconds_bucket{{{labels}')]
+    assert len(buckets) == len(BUCKETS) + 1
+    assert buckets == sorted(buckets)
+    assert metrics['image_pipeline_requests_total{pipeline="gemini_batch",kind="image",outcome="ok"}'] == 3
+    assert metrics['image_pipeline_requests_total{pipeline="gemini_batch",kind="plan",outcome="failed"}'] == 1
+    assert metrics['image_pipeline_attempts_total{pipeline="gemini_batch",kind="image",status="200"}'] == 3
+    assert metrics['image_pipeline_response_bytes_total{pipeline="gemini_batch",kind="image"}'] == 300
+
+
+def test_spans_are_appended_across_runs(tmp_path, perf):
+    for _ in range(2):
+        with Tracer('gemini_batch', tmp_path) as tracer:
+            finish_spans(tracer, perf, [0.1])
+    assert len((tmp_path / SPANS_FILENAME).read_text(encoding='utf-8').splitlines()) == 2
+
+
+def test_report_table_and_histogram(perf):
+    tracer = Tracer('test')
+    assert tracer.report() == ''
+    finish_spans(tracer, perf, [0.3, 0.3, 7.0])
+    lines = tracer.report().splitlines()
+    assert lines[0] == '⏱️  image latency (3 requests)'
+    rows = {line.split()[0]: line.split() for line in lines[2:] if line.strip() and line.strip()[0] not in '≤>'}
+    # hedge overlaps http, so http alone is 100% of the phase time
+    assert rows['http'][1:3] == ['7.60', '100%']
+    assert rows['hedge'][1:3] == ['3.80', '50%']
+    assert rows['total'][1] == '7.60'
+    bars = [line.split() for line in lines if line.strip().startswith('≤')]
+    # Occupied range only, including empty buckets in between
+    assert [bar[0] for bar in bars] == ['≤0.5s', '≤1s', '≤2.5s', '≤5s', '≤10s']
+    assert bars[0][-1] == '2' and bars[-1][-1] == '1' and bars[1] == ['≤1s', '0']
@@ -0,0 +1,128 @@
+"""
+Portrait prompts must match the original hand-written f-strings
+
+legacy_portrait_prompt below is the f-string code that gemini_api.py used
+before the prompts became registered templates; every persona must produce
+a byte-identical prompt, one at a time and in bulk.
+"""
+
+from typing import Dict
+
+import pytest
+
+from gemini_api import GeminiPhotoGenerator
+from test_appearance_rules import legacy_infer_appearance, make_cohort
+
+
+def legacy_portrait_prompt(persona: Dict) -> str:
+    age = persona.get('age', 30)
+    role = persona.get('role', '')
+    company = persona.get('company', '')
+
+    if 'leaderProfile' in persona:
+        appearance_data = legacy_infer_appearance(persona)
+        gender = appearance_data['gender']
+        hair = appearance_data['hair']
+        glasses = appearance_data['glasses']
+        attire = appearance_data['attire']
+        expression = appearance_data['expression']
+
+        leader_profile = persona.get('leaderProfile', {})
+        years_in_role = leader_profile.get('yearsInRole', 1.0)
+        previous_role = leader_profile.get('previousRole', 'senior professional')
+        leadership_style = leader_profile.get('leadershipStyle', 'balanced leadership')
+
+        personality = persona.get('personality', {})
+        stress = personality.get('stressLevel', 5)
+        confidence = personality.get('confidenceLevel', 5)
+
+        return f"""Professional portrait photograph of a {age}-year-old Korean {gender},
+newly promoted {role} at {company} (promoted {years_in_role} years ago).
+
+Leadership background: Recently promoted from {previous_role}.
+Leadership approach: {leadership_style}
+
+Physical appearance:
+- Hair: {hair}, black hair styled professionally
+- Face: Mature yet approachable features showing {age} years of professional experience
+- Eyes: {expression.split(',')[0] if ',' in expression else expression} gaze {glasses}
+- Skin: Fair to medium Korean skin tone appropriate for age {age}
+- Overall: Professional demeanor of a new team leader
+
+Attire: {attire}
+
+Expression: {expression}
+
+Context: New team leader workshop participant, ID card photo
+Demeanor: Balancing confidence (level {confidence}/10) with workplace demands (stress {stress}/10)
+
+Photography specs:
+- 3:4 portrait aspect ratio for workshop ID card
+- Professional corporate lighting with soft shadows
+- Shallow depth of field, f/2.8
+- Corporate headshot composition, shoulders visible
+- Sharp focus on eyes and facial expression
+- Neutral background (light gray gradient)
+- High resolution, photorealistic style
+- Natural skin texture showing authenticity, no AI smoothing
+- Professional workshop participant quality
+
+Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
+Style: Contemporary Korean corporate leadership portrait
+"""
+
+    gender = persona.get('gender', 'person')
+    occupation = persona.get('occupation', 'professional')
+
+    appearance = persona.get('appearance', {})
+    hair = appearance.get('hair', 'neat hairstyle')
+    face = appearance.get('face', 'friendly features')
+    eyes = appearance.get('eyes', 'expressive eyes')
+    skin = appearance.get('skin', 'healthy skin tone')
+    features = appearance.get('features', '')
+
+    clothing = persona.get('clothing', 'professional attire')
+    expression = persona.get('expression', 'confident professional smile')
+    background = persona.get('background', 'neutral gray background')
+
+    return f"""Professional portrait photograph of a {age}-year-old Korean {gender}, {occupation}.
+
+Physical appearance: {hair}, {face}, {eyes}, {skin}{', ' + features if features else ''}.
+
+Attire: {clothing}.
+
+Expression: {expression}.
+
+Photography specs:
+- 3:4 portrait aspect ratio
+- Professional studio lighting with soft shadows
+- Shallow depth of field, f/2.8
+- Professional headshot composition
+- Sharp focus on eyes and face
+- {background}
+- High resolution, photorealistic style
+- Natural skin texture with visible pores, no AI smoothing
+- Professional ID photo quality
+
+Camera: Shot with Canon EOS R5, 85mm f/1.8 portrait lens
+Style: Modern corporate headshot photography, natural and authentic"""
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    return make_cohort()
+
+
+@pytest.fixture
+def generator(tmp_path):
+    with GeminiPhotoGenerator('test-key', output_dir=str(tmp_path)) as gen:
+        yield gen
+
+
+def test_prompt_matches_legacy(generator, cohort):
+    for persona in cohort:
+        assert generator.create_portrait_prompt(persona) == legacy_portrait_prompt(persona), persona.get('id')
+
+
+def test_batch_prompts_match_legacy(generator, cohort):
+    assert generator.create_portrait_prompts(cohort) == [legacy_portrait_prompt(p) for p in cohort]
@@ -0,0 +1,64 @@
+import pytest
+
+from prompt_templates import PromptTemplate, get_template, register_template, template_names
+
+
+def test_fields_and_filters():
+    template = PromptTemplate("{name}: {title|first_clause} gaze{glasses|comma_prefixed} ({name})")
+    assert template.fields == ('name', 'title', 'glasses')
+    context = {'name': 'Kim', 'title': 'Confident, warm', 'glasses': ''}
+    assert template.render(context) == "Kim: Confident gaze (Kim)"
+    assert template.render({**context, 'glasses': 'thin frames'}) == "Kim: Confident gaze, thin frames (Kim)"
+
+
+def test_literal_braces_quotes_and_newlines():
+    source = "{{literal}} 'single' \"double\" \\ back\n{value}}}"
+    assert PromptTemplate(source).render({'value': 'x'}) == "{literal} 'single' \"double\" \\ back\nx}"
+
+
+def test_values_render_like_str_format():
+    template = PromptTemplate("{age}-{years}-{missing}")
+    assert template.render({'age': 40, 'years': 1.0, 'missing': None}) == "40-1.0-None"
+    # Values are inserted as-is, never parsed as templates
+    assert template.render({'age': '{years}', 'years': '}}', 'missing': ''}) == "{years}-}}-"
+
+
+def test_same_filter_used_twice():
+    template = PromptTemplate("{a|first_clause}/{a|first_clause}/{a}")
+    assert template.render({'a': 'x, y'}) == "x/x/x, y"
+
+
+def test_missing_field_names_the_template():
+    with pytest.raises(KeyError, match="Template demo is missing field 'b'"):
+        PromptTemplate("{a} {b}", name='demo').render({'a': 1})
+
+
+@pytest.mark.parametrize('source', ["{age:>3}", "{age!r}", "{a|shout}", "{}", "{0}", "{a.b}", "{a[0]}"])
+def test_rejects_unsupported_syntax(source):
+    with pytest.raises(ValueError):
+        PromptTemplate(source)
+
+
+def test_render_many_memoizes_by_value_and_type():
+    template = PromptTemplate("{age}/{name}")
+    contexts = [{'age': 40, 'name': 'a'}, {'age': 40.0, 'name': 'a'}, {'age': 40, 'name': 'a'},
+                {'age': [1], 'name': 'a'}]
+    assert template.render_many(contexts) == ["40/a", "40.0/a", "40/a", "[1]/a"]
+    single = PromptTemplate("{age}")
+    assert single.render_many([{'age': 1}, {'age': 1.0}, {'age': True}]) == ["1", "1.0", "True"]
+    with pytest.raises(KeyError):
+        template.render_many([{'age': 1}])
+
+
+def test_template_without_fields():
+    template = PromptTemplate("plain {{text}}")
+    assert template.fields == ()
+    assert template.render_many([{}, {'unused': 1}]) == ["plain {text}", "plain {text}"]
+
+
+def test_registry():
+    template = register_template('test_registry', "Hello {who}")
+    assert get_template('test_registry') is template
+    assert 'test_registry' in template_names()
+    with pytest.raises(KeyError, match='test_registry'):
+        get_template('no_such_template')
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from rate_limiter import AdaptiveConcurrency, RateLimiter, TokenBucket, estimate_request_tokens
+
+
+def test_bucket_paces_requests_after_burst(clock):
+    bucket = TokenBucket(60, capacity=2)
+
+    async def run():
+        return [await bucket.acquire() for _ in range(5)]
+
+    waits = asyncio.run(run())
+    # Two start back-to-back, then one per second at 60/min
+    assert waits == pytest.approx([0.0, 0.0, 1.0, 1.0, 1.0])
+    assert clock.now == pytest.approx(1003.0)
+
+
+def test_bucket_refills_while_idle(clock):
+    bucket = TokenBucket(60, capacity=3)
+    asyncio.run(bucket.acquire(3))
+    assert bucket.available == pytest.approx(0.0)
+    clock.now += 1.5
+    assert bucket.available == pytest.approx(1.5)
+    clock.now += 60
+    assert bucket.available == pytest.approx(3.0)
+
+
+def test_oversized_request_leaves_bucket_in_debt(clock):
+    bucket = TokenBucket(60, capacity=10)
+
+    async def run():
+        first = await bucket.acquire(25)
+        debt = bucket.available
+        second = await bucket.acquire(1)
+        return first, debt, second
+
+    first, debt, second = asyncio.run(run())
+    # A full bucket is enough to start, the rest becomes debt...
+    assert first == 0.0
+    assert debt == pytest.approx(-15.0)
+    # ...which must be repaid before anything else starts
+    assert second == pytest.approx(16.0)
+
+
+def test_waiters_are_served_in_order(clock):
+    bucket = TokenBucket(60, capacity=1)
+    order = []
+
+    async def worker(n):
+        await bucket.acquire()
+        order.append(n)
+
+    async def run():
+        await asyncio.gather(*(worker(n) for n in range(5)))
+
+    asyncio.run(run())
+    assert order == [0, 1, 2, 3, 4]
+    assert clock.now == pytest.approx(1004.0)
+
+
+def test_limiter_applies_token_quota(clock):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=6000, burst=1)
+
+    async def run():
+        return [await limiter.acquire(tokens=300) for _ in range(3)]
+
+    waits = asyncio.run(run())
+    # 300 tokens per request at 100 tokens/s outweighs 1 request/s
+    assert waits == pytest.approx([0.0, 3.0, 3.0])
+
+
+def test_limiter_without_token_quota_ignores_tokens(clock):
+    limiter = RateLimiter(requests_per_minute=120)
+    assert limiter.tokens is None
+
+    async def run():
+        return [await limiter.acquire(tokens=10 ** 6) for _ in range(3)]
+
+    assert asyncio.run(run()) == pytest.approx([0.0, 0.5, 0.5])
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_estimate_request_tokens():
+    assert estimate_request_tokens('abcd' * 10, '1K') == 10 + 1290
+    # Unknown sizes are costed like 4K
+    assert estimate_request_tokens('', '8K') == estimate_request_tokens('', '4K')
+
+
+def test_adaptive_concurrency_aimd(clock):
+    limit = AdaptiveConcurrency(initial=8, minimum=2, maximum=9, cooldown=2.0)
+    limit.on_throttle()
+    assert limit.limit == 4.0
+    # Throttles within the cooldown belong to the same burst
+    limit.on_throttle()
+    assert limit.limit == 4.0
+    clock.now += 2.0
+    limit.on_throttle()
+    limit.on_throttle()
+    assert limit.limit == 2.0
+    assert limit.throttle_events == 4
+    for _ in range(100):
+        limit.on_success()
+    assert limit.limit == 9.0
@@ -0,0 +1,173 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import aiohttp
+import pytest
+import requests
+
+import retry_policy
+from retry_policy import (RequestFailed, RetryBudget, RetryPolicy, error_status, is_retryable,
+                          is_throttled, is_timeout_or_connection, parse_retry_after, retry_after_of)
+
+
+class Flaky:
+    """Callable failing with the given errors before returning 'ok'"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record sleeps of RetryPolicy.call() instead of waiting"""
+    recorded = []
+    monkeypatch.setattr(retry_policy.time, 'sleep', recorded.append)
+    return recorded
+
+
+def test_parse_retry_after_seconds_and_date():
+    assert parse_retry_after('7') == 7.0
+    assert parse_retry_after(' 1.5 ') == 1.5
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(when, usegmt=True)) == pytest.approx(30, abs=2)
+    past = datetime.now(timezone.utc) - timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_retry_after_from_exception():
+    assert retry_after_of(RequestFailed('429', status=429, retry_after=12.0)) == 12.0
+    exc = Exception()
+    exc.response = SimpleNamespace(status_code=503, headers={'Retry-After': '4'})
+    assert retry_after_of(exc) == 4.0
+    assert retry_after_of(ValueError()) is None
+
+
+def test_next_delay_honors_longer_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, max_retry_after=60.0)
+    for _ in range(50):
+        assert 1.0 <= policy.next_delay(1.0) <= 3.0
+        assert policy.next_delay(100.0) <= 5.0
+        # Retry-After wins over the jittered backoff, even past max_delay
+        assert policy.next_delay(1.0, retry_after=30.0) == 30.0
+        # ...but only up to max_retry_after
+        assert policy.next_delay(1.0, retry_after=600.0) == 60.0
+        # A shorter Retry-After never shortens the backoff
+        assert policy.next_delay(1.0, retry_after=0.0) >= 1.0
+
+
+def test_call_waits_for_retry_after(sleeps):
+    fn = Flaky(RequestFailed('busy', status=429, retry_after=20.0), RequestFailed('down', status=503))
+    seen = []
+    result = RetryPolicy(base_delay=0.5, max_delay=2.0).call(fn, on_retry=lambda *args: seen.append(args))
+    assert result == 'ok'
+    assert fn.calls == 3
+    assert sleeps[0] == 20.0
+    assert 0.5 <= sleeps[1] <= 2.0
+    assert [attempt for attempt, _, _ in seen] == [1, 2]
+
+
+def test_call_does_not_retry_client_errors(sleeps):
+    fn = Flaky(RequestFailed('bad request', status=400))
+    with pytest.raises(RequestFailed):
+        RetryPolicy().call(fn)
+    assert fn.calls == 1
+    assert sleeps == []
+
+
+def test_call_stops_at_max_attempts(sleeps):
+    fn = Flaky(*(RequestFailed('down', status=503) for _ in range(5)))
+    with pytest.raises(RequestFailed):
+        RetryPolicy(max_attempts=3).call(fn)
+    assert fn.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_budget_caps_retries_across_calls(sleeps):
+    budget = RetryBudget(1)
+    policy = RetryPolicy()
+    assert policy.call(Flaky(TimeoutError()), budget=budget) == 'ok'
+    fn = Flaky(TimeoutError())
+    with pytest.raises(TimeoutError):
+        policy.call(fn, budget=budget)
+    assert fn.calls == 1
+    assert budget.spent == 1
+
+
+def test_budget_scales_with_batch_size():
+    assert RetryBudget.for_requests(100).max_retries == 50
+    assert RetryBudget.for_requests(2).max_retries == 5
+    budget = RetryBudget.for_requests(0)
+    budget.scale_to(40, ratio=1.0)
+    assert budget.max_retries == 40
+
+
+def test_call_async_waits_for_retry_after(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(retry_policy.asyncio, 'sleep', fake_sleep)
+    errors = [RequestFailed('busy', status=429, retry_after=9.0)]
+
+    async def fn():
+        if errors:
+            raise errors.pop()
+        return 'ok'
+
+    assert asyncio.run(RetryPolicy().call_async(fn)) == 'ok'
+    assert recorded == [9.0]
+
+
+def test_error_status_reads_structured_fields_only():
+    assert error_status(RequestFailed('x', status=502)) == 502
+    exc = Exception('quota')
+    exc.code = 429
+    exc.status = 'RESOURCE_EXHAUSTED'
+    assert error_status(exc) == 429
+    exc = Exception()
+    exc.response = SimpleNamespace(status_code=504)
+    assert error_status(exc) == 504
+    # google-genai status names map to HTTP statuses when no code is usable
+    exc = Exception()
+    exc.code = 8
+    exc.status = 'UNAVAILABLE'
+    assert error_status(exc) == 503
+    # Numbers in the message are not statuses
+    assert error_status(ValueError('wrote 500 bytes to port 5432')) is None
+    assert not is_retryable(ValueError('read 429 personas'))
+
+
+def test_classification():
+    assert is_retryable(RequestFailed('x', status=503))
+    assert is_retryable(ConnectionResetError())
+    assert not is_retryable(RequestFailed('x', status=404))
+    assert is_throttled(RequestFailed('x', status=429))
+    assert not is_throttled(RequestFailed('x', status=503))
+
+
+def test_timeouts_and_connection_errors_by_type():
+    assert is_timeout_or_connection(asyncio.TimeoutError())
+    assert is_timeout_or_connection(ConnectionRefusedError())
+    assert is_timeout_or_connection(aiohttp.ServerDisconnectedError())
+    assert is_timeout_or_connection(aiohttp.ServerTimeoutError())
+    assert is_timeout_or_connection(requests.exceptions.ReadTimeout())
+    assert is_timeout_or_connection(requests.exceptions.ConnectionError())
+    # Class names are not evidence: only the exception types above count
+    ConnectionStringInvalid = type('ConnectionStringInvalid', (ValueError,), {})
+    TimeoutSettingError = type('TimeoutSettingError', (Exception,), {})
+    assert not is_timeout_or_connection(ConnectionStringInvalid())
+    assert not is_retryable(TimeoutSettingError())
+    assert not is_retryable(aiohttp.ContentTypeError(None, ()))
+